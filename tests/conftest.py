@@ -0,0 +1,31 @@
+from types import SimpleNamespace
+
+import pytest
+from scrapy.http import HtmlResponse, Request
+from scrapy.settings import Settings
+from scrapy.statscollectors import StatsCollector
+
+from unifiedscraper.fingerprints import FingerprintStore, SeenLog
+
+
+@pytest.fixture
+def make_spider(tmp_path):
+    """Build a site spider with a stand-in crawler (settings and stats), without running a crawl"""
+    def make(spidercls, incremental=False, **settings):
+        crawler = SimpleNamespace(settings=Settings(settings))
+        crawler.stats = StatsCollector(crawler)
+        spider = spidercls()
+        spider.crawler = crawler
+        spider.settings = crawler.settings
+        if incremental:
+            spider.fingerprints = FingerprintStore(tmp_path / 'state' / f'{spider.name}.sqlite')
+            spider.seen_log = SeenLog(tmp_path / 'seen.jsonl')
+        return spider
+    return make
+
+
+def html_response(url, body='', status=200, headers=None, meta=None):
+    """HtmlResponse of a request with the given meta, as the spider callbacks receive it"""
+    request = Request(url, meta=meta or {})
+    return HtmlResponse(url, status=status, headers=headers, body=f'<html><body>{body}</body></html>',
+                        encoding='utf-8', request=request)
@@ -0,0 +1,85 @@
+from unifiedscraper.middlewares import SlotController
+
+
+def feed(controller, responses, latency=0.1, error=False):
+    changed = [controller.record(latency=latency, error=error) for _ in range(responses)]
+    return changed[-1]
+
+
+def test_good_window_lowers_the_delay_before_raising_concurrency():
+    controller = SlotController(floor=1, ceiling=4, delay=1.0, window=5)
+    assert feed(controller, 5)
+    assert (controller.concurrency, controller.delay) == (1, 0.5)
+    delays = []
+    for _ in range(4):
+        feed(controller, 5)
+        delays.append(controller.delay)
+    # Halved down to 0.1s, then dropped
+    assert delays == [0.25, 0.125, 0.0625, 0.0]
+    assert controller.concurrency == 1
+    feed(controller, 5)
+    assert controller.concurrency == 2
+
+
+def test_concurrency_grows_by_one_up_to_the_ceiling():
+    controller = SlotController(floor=1, ceiling=3, window=5)
+    for _ in range(10):
+        feed(controller, 5)
+    assert controller.concurrency == 3
+
+
+def test_nothing_changes_inside_a_window():
+    controller = SlotController(window=5)
+    assert not feed(controller, 4)
+    assert controller.concurrency == 1
+
+
+def test_slow_window_halves_concurrency():
+    controller = SlotController(floor=1, ceiling=16, concurrency=8, latency=0.1, window=5)
+    assert feed(controller, 5, latency=0.5)
+    assert controller.concurrency == 4
+    assert controller.delay == 0.0
+
+
+def test_errors_halve_concurrency_then_raise_the_delay_at_the_floor():
+    controller = SlotController(floor=2, ceiling=16, concurrency=4, window=5, max_error_rate=0.1)
+    feed(controller, 5, error=True)
+    assert controller.concurrency == 2
+    controller.cooldown = 0
+    feed(controller, 5, error=True)
+    assert (controller.concurrency, controller.delay) == (2, 1.0)
+    controller.cooldown = 0
+    feed(controller, 5, error=True)
+    assert controller.delay == 2.0
+
+
+def test_throttling_decreases_at_once_and_respects_retry_after():
+    controller = SlotController(floor=1, ceiling=16, concurrency=8, window=5)
+    assert controller.record(throttled=True, retry_after=5)
+    assert controller.concurrency == 4
+    assert controller.delay == 5
+    # Answers to requests sent at the old limits do not decrease again
+    assert controller.cooldown == 8
+    assert not controller.record(throttled=True)
+    assert controller.concurrency == 4
+
+
+def test_delay_is_capped():
+    controller = SlotController(floor=1, ceiling=1, delay=50.0, max_delay=60.0)
+    controller.record(throttled=True, retry_after=120)
+    assert controller.delay == 60.0
+
+
+def test_usual_latency_follows_improvements_and_drifts_up_slowly():
+    controller = SlotController(floor=1, ceiling=16, concurrency=4, latency=1.0, window=5)
+    feed(controller, 5, latency=0.2)
+    assert controller.latency == 0.2
+    feed(controller, 5, latency=0.3)
+    assert 0.2 < controller.latency < 0.3
+
+
+def test_state_starts_the_next_crawl():
+    controller = SlotController(floor=1, ceiling=8, concurrency=4, delay=0.5, latency=0.2)
+    assert controller.state() == {'concurrency': 4, 'delay': 0.5, 'latency': 0.2}
+    restored = SlotController(floor=1, ceiling=8, **controller.state())
+    assert (restored.concurrency, restored.delay, restored.latency) == (4, 0.5, 0.2)
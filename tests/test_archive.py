@@ -0,0 +1,160 @@
+import gzip
+from types import SimpleNamespace
+
+import pytest
+from scrapy import Request
+from scrapy.exceptions import NotConfigured
+from scrapy.http import Headers, HtmlResponse
+from scrapy.settings import Settings
+from scrapy.signalmanager import SignalManager
+from scrapy.statscollectors import StatsCollector
+from scrapy.utils.request import RequestFingerprinter
+
+from unifiedscraper.archive import ArchiveDownloadHandler, ArchiveRecorderMiddleware, ResponseArchive
+
+URL = 'https://www.wardow.com/it/brand-0/product-1.html'
+PAGE = b'<html><h1>Product 0-1</h1></html>'
+HEADERS = Headers({'Content-Type': 'text/html; charset=utf-8', 'Set-Cookie': ['a=1', 'b=2']})
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = ResponseArchive(tmp_path, 'wardow')
+    yield archive
+    archive.close()
+
+
+def make_crawler(tmp_path, **settings):
+    crawler = SimpleNamespace(settings=Settings({'ARCHIVE_DIR': str(tmp_path), **settings}),
+                              signals=SignalManager(), request_fingerprinter=RequestFingerprinter())
+    crawler.stats = StatsCollector(crawler)
+    return crawler
+
+
+def download(handler, request, spider):
+    responses = []
+    handler.download_request(request, spider).addCallback(responses.append)
+    return responses[0]
+
+
+def test_lookup_returns_the_stored_response(archive):
+    assert archive.store('f1', URL, 200, HEADERS, PAGE) is True
+    url, status, headers, body = archive.lookup('f1')
+    assert (url, status, body) == (URL, 200, PAGE)
+    assert headers['Set-Cookie'] == ['a=1', 'b=2']
+    assert headers['Content-Type'] == ['text/html; charset=utf-8']
+
+
+def test_same_body_is_stored_once(archive):
+    assert archive.store('f1', URL, 200, HEADERS, PAGE) is True
+    archive.data.flush()
+    size = archive.data_path.stat().st_size
+    assert archive.store('f2', URL + '?color=red', 200, HEADERS, PAGE) is False
+    archive.data.flush()
+    assert archive.data_path.stat().st_size == size
+    assert len(archive) == 2
+    assert archive.lookup('f2')[3] == PAGE
+
+
+def test_unrecorded_request_is_a_miss(archive):
+    assert archive.lookup('f1') is None
+    archive.store('f1', URL, 200, HEADERS, PAGE)
+    assert archive.lookup('f2') is None
+
+
+@pytest.mark.parametrize('status', [200, 203])
+def test_304_never_replaces_a_stored_2xx(archive, status):
+    archive.store('f1', URL, status, HEADERS, PAGE)
+    assert archive.store('f1', URL, 304, Headers(), b'') is None
+    assert archive.lookup('f1') == (URL, status, {'Content-Type': ['text/html; charset=utf-8'],
+                                                  'Set-Cookie': ['a=1', 'b=2']}, PAGE)
+
+
+def test_304_replaces_an_error_and_fills_a_gap(archive):
+    archive.store('f1', URL, 503, Headers(), b'busy')
+    assert archive.store('f1', URL, 304, Headers(), b'') is True
+    assert archive.lookup('f1')[1] == 304
+    archive.store('f2', URL + '?page=2', 304, Headers(), b'')
+    assert archive.lookup('f2')[1] == 304
+
+
+def test_newer_2xx_replaces_the_stored_one(archive):
+    archive.store('f1', URL, 200, HEADERS, PAGE)
+    archive.store('f1', URL, 200, HEADERS, b'<html>new</html>')
+    assert archive.lookup('f1')[3] == b'<html>new</html>'
+    assert len(archive) == 1
+
+
+def test_reopened_archive_keeps_its_index_and_bodies(tmp_path):
+    archive = ResponseArchive(tmp_path, 'wardow')
+    archive.store('f1', URL, 200, HEADERS, PAGE)
+    archive.store('f2', URL + '?page=2', 404, Headers(), b'not found')
+    archive.close()
+
+    archive = ResponseArchive(tmp_path, 'wardow')
+    assert len(archive) == 2
+    assert archive.lookup('f1')[3] == PAGE
+    assert archive.lookup('f2')[1:] == (404, {}, b'not found')
+    # New bodies go after the old ones, and stored bodies are not written again
+    assert archive.store('f3', URL + '?page=3', 200, HEADERS, b'<html>third</html>') is True
+    assert archive.store('f4', URL + '?page=4', 200, HEADERS, PAGE) is False
+    archive.close()
+
+    archive = ResponseArchive(tmp_path, 'wardow')
+    assert [archive.lookup(f)[3] for f in ('f1', 'f2', 'f3', 'f4')] == [PAGE, b'not found', b'<html>third</html>', PAGE]
+    archive.close()
+
+    # The archive is one gzip stream of records, readable without the index
+    records = gzip.decompress(archive.data_path.read_bytes())
+    assert records.count(ResponseArchive.RECORD_VERSION) == 3
+
+
+def test_recorder_stores_each_downloaded_response(tmp_path):
+    crawler = make_crawler(tmp_path, ARCHIVE_MODE='record')
+    spider = SimpleNamespace(name='wardow')
+    recorder = ArchiveRecorderMiddleware.from_crawler(crawler)
+    recorder.spider_opened(spider)
+
+    request = Request(URL)
+    response = HtmlResponse(URL, body=PAGE, headers=HEADERS, request=request)
+    assert recorder.process_response(request, response, spider) is response
+    recorder.process_response(request, response.replace(status=304, body=b''), spider)
+    other = Request(URL + '?page=2')
+    recorder.process_response(other, response.replace(url=other.url, request=other), spider)
+    # A replayed response is not archived again
+    recorder.process_response(request, response.replace(body=b'replayed', flags=['archive']), spider)
+
+    stats = crawler.stats
+    assert (stats.get_value('archive/stored'), stats.get_value('archive/kept'),
+            stats.get_value('archive/deduplicated')) == (1, 1, 1)
+    fingerprint = crawler.request_fingerprinter.fingerprint(request).hex()
+    assert recorder.archive.lookup(fingerprint)[1:] == (200, {'Content-Type': ['text/html; charset=utf-8'],
+                                                              'Set-Cookie': ['a=1', 'b=2']}, PAGE)
+    recorder.archive.close()
+
+
+def test_recorder_is_off_unless_recording(tmp_path):
+    with pytest.raises(NotConfigured):
+        ArchiveRecorderMiddleware.from_crawler(make_crawler(tmp_path, ARCHIVE_MODE='replay'))
+
+
+def test_replay_serves_hits_and_misses(tmp_path):
+    crawler = make_crawler(tmp_path)
+    spider = SimpleNamespace(name='wardow')
+    recorded = Request(URL)
+    archive = ResponseArchive(tmp_path, 'wardow')
+    archive.store(crawler.request_fingerprinter.fingerprint(recorded).hex(), URL, 200, HEADERS, PAGE)
+    archive.close()
+
+    handler = ArchiveDownloadHandler.from_crawler(crawler)
+    hit = download(handler, Request(URL), spider)
+    assert isinstance(hit, HtmlResponse)
+    assert (hit.status, hit.body, hit.flags) == (200, PAGE, ['archive'])
+    assert hit.headers.getlist('Set-Cookie') == [b'a=1', b'b=2']
+
+    missed = Request(URL + '?page=2')
+    miss = download(handler, missed, spider)
+    assert (miss.url, miss.status, miss.body, miss.flags) == (missed.url, 404, b'', ['archive'])
+    assert miss.request is missed
+    assert (crawler.stats.get_value('archive/hit'), crawler.stats.get_value('archive/miss')) == (1, 1)
+    handler.close()
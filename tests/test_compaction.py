@@ -0,0 +1,70 @@
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from unifiedscraper.compaction import compact_parquet_files, conform_batch, unify_schemas
+
+
+def test_unify_schemas_keeps_column_order_and_adds_new_columns():
+    schema = unify_schemas([
+        pa.schema([('Brand', pa.string()), ('CurrentPrice', pa.float64())]),
+        pa.schema([('ProductURL', pa.string()), ('Brand', pa.string())]),
+    ])
+    assert schema.names == ['Brand', 'CurrentPrice', 'ProductURL']
+
+
+def test_unify_schemas_widens_types():
+    schema = unify_schemas([
+        pa.schema([('count', pa.int32()), ('price', pa.int64()), ('name', pa.null()), ('code', pa.binary())]),
+        pa.schema([('count', pa.int64()), ('price', pa.float32()), ('name', pa.string()), ('code', pa.string())]),
+    ])
+    assert schema.field('count').type == pa.int64()
+    assert schema.field('price').type == pa.float64()
+    assert schema.field('name').type == pa.string()
+    assert schema.field('code').type == pa.string()
+
+
+def test_unify_schemas_wraps_scalars_into_lists():
+    schema = unify_schemas([pa.schema([('AvailableSizes', pa.string())]),
+                            pa.schema([('AvailableSizes', pa.list_(pa.string()))])])
+    assert schema.field('AvailableSizes').type == pa.list_(pa.string())
+
+
+def test_unify_schemas_merges_struct_fields():
+    schema = unify_schemas([pa.schema([('offer', pa.struct([('price', pa.int64())]))]),
+                            pa.schema([('offer', pa.struct([('price', pa.float64()), ('currency', pa.string())]))])])
+    assert schema.field('offer').type == pa.struct([('price', pa.float64()), ('currency', pa.string())])
+
+
+def test_unify_schemas_falls_back_to_string():
+    schema = unify_schemas([pa.schema([('Attributes', pa.struct([('color', pa.string())]))]),
+                            pa.schema([('Attributes', pa.string())])])
+    assert schema.field('Attributes').type == pa.string()
+
+
+def test_conform_batch_converts_to_the_unified_schema():
+    batch = pa.RecordBatch.from_pydict({'AvailableSizes': ['M'], 'Attributes': [{'color': 'Nero'}]})
+    schema = pa.schema([('Brand', pa.string()), ('AvailableSizes', pa.list_(pa.string())),
+                        ('Attributes', pa.string())])
+    assert conform_batch(batch, schema).to_pylist() == [
+        {'Brand': None, 'AvailableSizes': ['M'], 'Attributes': '{"color": "Nero"}'}]
+
+
+def test_compact_parquet_files_appends_to_the_combined_file(tmp_path):
+    pq.write_table(pa.table({'Brand': ['A'], 'CurrentPrice': ['1.234,50 €']}), tmp_path / 'one.parquet')
+    assert compact_parquet_files(tmp_path, tmp_path / 'combined.parquet', price_locale='it') == 1
+    pq.write_table(pa.table({'Brand': ['B'], 'sku': ['X1']}), tmp_path / 'two.parquet')
+    assert compact_parquet_files(tmp_path, tmp_path / 'combined.parquet') == 2
+
+    table = pq.read_table(tmp_path / 'combined.parquet')
+    assert table.to_pylist() == [{'Brand': 'A', 'CurrentPrice': 1234.5, 'sku': None},
+                                 {'Brand': 'B', 'CurrentPrice': None, 'sku': 'X1'}]
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['combined.parquet']
+
+
+def test_compact_parquet_files_moves_an_unreadable_combined_file_aside(tmp_path):
+    (tmp_path / 'combined.parquet').write_bytes(b'not parquet')
+    pq.write_table(pa.table({'Brand': ['A']}), tmp_path / 'one.parquet')
+
+    assert compact_parquet_files(tmp_path, tmp_path / 'combined.parquet') == 1
+    assert (tmp_path / 'combined.parquet.corrupt').read_bytes() == b'not parquet'
+    assert pq.read_table(tmp_path / 'combined.parquet').to_pylist() == [{'Brand': 'A'}]
@@ -0,0 +1,81 @@
+import pytest
+
+from unifiedscraper.crawlstate import batch_progress, batch_stop_reason, crawl_remaining
+
+
+@pytest.mark.parametrize('reason, pending, remaining', [
+    ('closespider_itemcount', 812, True),
+    ('closespider_timeout', 5, True),
+    ('closespider_pagecount', 1, True),
+    ('memusage_exceeded', 3, True),
+    ('closespider_itemcount', 0, False),
+    ('finished', 0, False),
+    # An idle crawl with requests queued elsewhere (shared frontier) is done for this worker
+    ('finished', 4, False),
+    ('shutdown', 10, False),
+    (None, 10, False),
+    # Schedulers that do not count their queue
+    ('closespider_itemcount', None, True),
+    ('closespider_timeout', None, False),
+    ('finished', None, False),
+])
+def test_crawl_remaining(reason, pending, remaining):
+    assert crawl_remaining(reason, pending) is remaining
+
+
+def test_batch_progress_counts_items_seen_products_and_good_pages():
+    stats = {
+        'item_scraped_count': 3,
+        'incremental/seen/unchanged': 40,
+        'incremental/seen/not_modified': 5,
+        'downloader/response_status_count/200': 50,
+        'downloader/response_status_count/304': 5,
+        'downloader/response_status_count/403': 7,
+        'downloader/response_status_count/429': 2,
+        'downloader/response_status_count/500': 1,
+        'response_received_count': 65,
+    }
+    assert batch_progress(stats) == 3 + 45 + 55
+
+
+def test_a_blocked_batch_makes_no_progress():
+    assert batch_progress({'downloader/response_status_count/403': 30, 'response_received_count': 30}) == 0
+    assert batch_progress({}) == 0
+
+
+def test_batches_go_on_while_requests_are_left():
+    assert batch_stop_reason('closespider_itemcount', 100, 50, 0) == (None, 0)
+
+
+def test_batches_stop_once_the_queue_is_empty():
+    stop, _ = batch_stop_reason('closespider_itemcount', 0, 50, 0)
+    assert stop == 'the spider has crawled everything queued'
+    stop, _ = batch_stop_reason(None, None, 50, 0)
+    assert stop == 'the crawl did not close cleanly'
+
+
+def test_unchanged_catalogue_batches_do_not_end_the_crawl():
+    # An incremental re-crawl: a timed-out batch with no new items but many unchanged products
+    stats = {'incremental/seen/unchanged': 200, 'downloader/response_status_count/200': 210}
+    empty_batches = 0
+    for _ in range(10):
+        stop, empty_batches = batch_stop_reason('closespider_timeout', 500, batch_progress(stats), empty_batches)
+        assert stop is None
+    assert empty_batches == 0
+
+
+def test_consecutive_empty_batches_stop_the_run():
+    stop, empty_batches = batch_stop_reason('closespider_timeout', 500, 0, 0, max_empty_batches=3)
+    assert (stop, empty_batches) == (None, 1)
+    stop, empty_batches = batch_stop_reason('closespider_timeout', 500, 0, empty_batches, max_empty_batches=3)
+    assert (stop, empty_batches) == (None, 2)
+    stop, empty_batches = batch_stop_reason('closespider_timeout', 500, 0, empty_batches, max_empty_batches=3)
+    assert stop == '3 batches in a row made no progress'
+
+
+def test_progress_resets_the_empty_batch_count():
+    assert batch_stop_reason('closespider_timeout', 500, 1, 2) == (None, 0)
+
+
+def test_progress_below_the_threshold_is_an_empty_batch():
+    assert batch_stop_reason('closespider_timeout', 500, 4, 0, min_progress=5) == (None, 1)
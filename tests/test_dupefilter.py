@@ -0,0 +1,79 @@
+import hashlib
+
+import pytest
+
+from unifiedscraper.dupefilter import BloomFilter, CompactDupeFilter, FingerprintSet, ScalableBloomFilter
+
+
+def fingerprint(number):
+    return hashlib.sha1(str(number).encode()).digest()
+
+
+def test_bloom_filter_reopens_with_its_items(tmp_path):
+    path = tmp_path / 'requests.bloom'
+    bloom = BloomFilter(path, capacity=1000, error_rate=0.01)
+    for number in range(500):
+        assert not bloom.add(fingerprint(number))
+    num_bits = bloom.num_bits
+    bloom.close()
+
+    # The header wins over the arguments of a reopened filter
+    reopened = BloomFilter(path, capacity=5, error_rate=0.5)
+    assert (reopened.capacity, reopened.error_rate, reopened.num_bits, reopened.count) == (1000, 0.01, num_bits, 500)
+    assert all(fingerprint(number) in reopened for number in range(500))
+    assert reopened.add(fingerprint(0))
+    reopened.close()
+
+
+def test_bloom_filter_rejects_other_files(tmp_path):
+    path = tmp_path / 'requests.bloom'
+    path.write_bytes(b'\0' * 128)
+    with pytest.raises(ValueError):
+        BloomFilter(path)
+
+
+def test_bloom_filter_false_positive_rate():
+    bloom = BloomFilter(capacity=10_000, error_rate=0.01)
+    for number in range(10_000):
+        bloom.add(fingerprint(number))
+    false_positives = sum(fingerprint(number) in bloom for number in range(10_000, 30_000))
+    assert false_positives / 20_000 < 0.02
+    bloom.close()
+
+
+def test_scalable_bloom_filter_grows_and_reopens(tmp_path):
+    bloom = ScalableBloomFilter(tmp_path, initial_capacity=100, error_rate=0.01)
+    for number in range(1000):
+        bloom.add(fingerprint(number))
+    slices = len(bloom.slices)
+    assert slices > 1
+    bloom.close()
+
+    reopened = ScalableBloomFilter(tmp_path, initial_capacity=100, error_rate=0.01)
+    assert len(reopened.slices) == slices
+    assert len(reopened) >= 990
+    assert all(reopened.add(fingerprint(number)) for number in range(1000))
+    reopened.close()
+
+
+def test_fingerprint_set_is_exact(tmp_path):
+    fingerprints = FingerprintSet(tmp_path / 'requests.seen.sqlite', commit_every=10)
+    assert not fingerprints.add(fingerprint(1))
+    assert fingerprints.add(fingerprint(1))
+    assert fingerprint(2) not in fingerprints
+    fingerprints.close()
+    assert len(FingerprintSet(tmp_path / 'requests.seen.sqlite')) == 1
+
+
+@pytest.mark.parametrize('mode', ['bloom', 'exact'])
+def test_dupefilter_imports_the_requests_seen_of_scrapy(tmp_path, mode):
+    (tmp_path / 'requests.seen').write_text(fingerprint(1).hex() + '\n')
+    dupefilter = CompactDupeFilter(str(tmp_path), mode=mode, capacity=100)
+    assert fingerprint(1) in dupefilter.fingerprints
+    assert fingerprint(2) not in dupefilter.fingerprints
+    dupefilter.close('finished')
+
+
+def test_dupefilter_rejects_unknown_modes(tmp_path):
+    with pytest.raises(ValueError):
+        CompactDupeFilter(str(tmp_path), mode='set')
@@ -0,0 +1,152 @@
+import json
+import os
+import sys
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from scrapy.exceptions import NotConfigured
+from scrapy.settings import Settings
+from scrapy.signalmanager import SignalManager
+from scrapy.statscollectors import StatsCollector
+
+from unifiedscraper.bench.mockshop import Catalog, MockShop
+from unifiedscraper.events import EventLog, EventLogExtension, parse_event
+from unifiedscraper.run_spider import crawl_batch_subprocess, run_spider_in_batches
+
+from tests.test_run_spider import REPO, TEST_SETTINGS
+
+# A crawl printing events between other output, then failing
+CRAWL = '''
+import json, sys
+from unifiedscraper.events import EventLog
+events = EventLog(sys.argv[sys.argv.index('-s') + 1].split('=', 1)[1])
+print('Scraping wardow')
+events.emit('spider_opened', spider='wardow')
+print({'event': 'printed dict'})
+print('{"event": "half')
+events.emit('spider_closed', spider='wardow', reason='closespider_itemcount', items=3)
+sys.exit(2)
+'''
+
+
+def read_events(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_event_log_appends_whole_lines(tmp_path):
+    path = tmp_path / 'crawls' / 'wardow' / 'events.jsonl'
+    events = EventLog(str(path))
+    record = events.emit('batch_start', batch=1, started=datetime(2026, 7, 1, tzinfo=timezone.utc))
+    events.close()
+    events = EventLog(str(path))
+    events.write({'ts': record['ts'], 'event': 'spider_closed', 'items': 5})
+    events.close()
+
+    first, second = read_events(path)
+    assert first == {**record, 'started': '2026-07-01 00:00:00+00:00'}
+    assert datetime.fromisoformat(first['ts']).tzinfo is not None
+    assert second['event'] == 'spider_closed'
+    assert parse_event(path.read_text().splitlines()[0]) == first
+
+
+def test_event_log_to_stdout(capsys):
+    events = EventLog('-')
+    events.emit('run_end', batches=2)
+    events.close()
+    assert not sys.stdout.closed
+    assert parse_event(capsys.readouterr().out)['batches'] == 2
+
+
+@pytest.mark.parametrize('line', [
+    '',
+    '\n',
+    '2026-07-01 12:00:00 [scrapy.core.engine] INFO: Spider opened\n',
+    "{'event': 'spider_closed', 'ts': '2026-07-01'}\n",
+    '{"ts": "2026-07-01", "event": "spider_clo\n',
+    '{"ts": "2026-07-01"}\n',
+    '{"event": "spider_closed"}\n',
+    '{"ts": "2026-07-01", "event": 3}\n',
+    '[{"ts": "2026-07-01", "event": "spider_closed"}]\n',
+    '{"ts": "2026-07-01", "event": "spider_closed"} trailing\n',
+])
+def test_parse_event_skips_lines_that_are_not_events(line):
+    assert parse_event(line) is None
+
+
+def test_parse_event_reads_events():
+    line = ' {"ts": "2026-07-01T12:00:00.000+00:00", "event": "spider_closed", "items": 5}\r\n'
+    assert parse_event(line) == {'ts': '2026-07-01T12:00:00.000+00:00', 'event': 'spider_closed', 'items': 5}
+
+
+def test_extension_reports_the_close(tmp_path):
+    path = tmp_path / 'events.jsonl'
+    crawler = SimpleNamespace(settings=Settings({'EVENT_LOG': str(path)}), signals=SignalManager())
+    crawler.stats = StatsCollector(crawler)
+    crawler.stats.set_value('scheduler/pending', 7)
+    crawler.stats.set_value('item_scraped_count', 5)
+    spider = SimpleNamespace(name='wardow')
+
+    extension = EventLogExtension.from_crawler(crawler)
+    extension.spider_opened(spider)
+    extension.spider_closed(spider, 'closespider_itemcount')
+
+    opened, closed = read_events(path)
+    assert opened['event'] == 'spider_opened'
+    assert closed['event'] == 'spider_closed'
+    assert closed['reason'] == 'closespider_itemcount'
+    assert (closed['pending'], closed['items'], closed['errors']) == (7, 5, 0)
+    assert closed['elapsed_seconds'] is None
+
+
+def test_extension_needs_an_event_log():
+    crawler = SimpleNamespace(settings=Settings(), signals=SignalManager())
+    with pytest.raises(NotConfigured):
+        EventLogExtension.from_crawler(crawler)
+
+
+def test_subprocess_events_are_relayed_and_other_output_passed_on(tmp_path, capsys, monkeypatch):
+    monkeypatch.setenv('PYTHONPATH', str(REPO))
+    path = tmp_path / 'events.jsonl'
+    events = EventLog(str(path))
+    closed, exit_code = crawl_batch_subprocess([sys.executable, '-c', CRAWL], events)
+    events.close()
+
+    assert exit_code == 2
+    assert closed['reason'] == 'closespider_itemcount'
+    assert closed['items'] == 3
+    assert [event['event'] for event in read_events(path)] == ['spider_opened', 'spider_closed']
+    assert capsys.readouterr().out.splitlines() == ['Scraping wardow', "{'event': 'printed dict'}", '{"event": "half']
+
+
+def test_subprocess_that_never_closes(tmp_path):
+    events = EventLog(str(tmp_path / 'events.jsonl'))
+    closed, exit_code = crawl_batch_subprocess([sys.executable, '-c', 'import sys; sys.exit(1)'], events)
+    events.close()
+    assert (closed, exit_code) == (None, 1)
+
+
+def test_subprocess_runner_crawls_the_shop_in_batches(tmp_path, monkeypatch):
+    (tmp_path / 'local_settings.py').write_text(TEST_SETTINGS)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('SCRAPY_SETTINGS_MODULE', 'local_settings')
+    monkeypatch.setenv('PYTHONPATH', os.pathsep.join([str(tmp_path), str(REPO)]))
+    catalog = Catalog(brands=2, products=15, page_size=10)
+    shop = MockShop('wardow', catalog, latency=0.002).start()
+    try:
+        result = run_spider_in_batches('wardow', batch_size=20, wait_time=0, log_level='WARNING',
+                                       spider_args={'base_url': shop.base_url})
+    finally:
+        shop.stop()
+
+    total = catalog.brands * catalog.products
+    assert list(result['items_per_directory'].values()) == [total]
+    events = read_events(tmp_path / 'crawls' / 'wardow' / 'events.jsonl')
+    closes = [event for event in events if event['event'] == 'spider_closed']
+    batch_ends = [event for event in events if event['event'] == 'batch_end']
+    assert len(closes) == len(batch_ends) == result['batches'] >= 2
+    # Each batch's count comes from its relayed spider_closed event
+    assert [event['items'] for event in batch_ends] == [event['items'] for event in closes]
+    assert sum(event['items'] for event in batch_ends) == total
+    assert all(event['exit_code'] == 0 for event in batch_ends)
+    assert events[-1]['event'] == 'run_end'
@@ -0,0 +1,239 @@
+import json
+
+import pytest
+from scrapy.http import HtmlResponse
+
+from unifiedscraper.extraction import (CompiledSelector, FieldSpec, ProductExtractor, compile_fields, compile_schema,
+                                       extract_structured_product)
+
+PAGE = '''
+<html><body>
+  <h1 class="name">  Borsa   Tote  </h1>
+  <span class="brand">Gucci</span>
+  <span class="price">1.250,00 €</span>
+  <span class="sku">SKU: GG-123-NERO</span>
+  <ul class="sizes"><li>S</li><li> </li><li>M</li><li>L</li></ul>
+  <span class="stock">3</span>
+  <a class="image" href="/img/1.jpg">img</a>
+  <script type="application/ld+json">{"@type": "Product", "color": "Nero", "offers": {"price": "980.5"}}</script>
+</body></html>
+'''
+
+
+def extract(fields, body=PAGE, url='https://shop.example.com/p/1', structured=None, price_locale='it'):
+    response = HtmlResponse(url, body=body, encoding='utf-8')
+    extractor = ProductExtractor(fields, compile_fields(fields), price_locale=price_locale)
+    return extractor.extract(response, structured)
+
+
+def test_compiled_selector_matches_response_css():
+    response = HtmlResponse('https://shop.example.com/', body=PAGE, encoding='utf-8')
+    for css in ('h1.name::text', 'a.image::attr(href)', 'ul.sizes li::text', 'span.brand', 'p.missing::text'):
+        selector = CompiledSelector(css)
+        assert selector.get_all(response.selector.root) == response.css(css).getall()
+        assert selector.get(response.selector.root) == response.css(css).get()
+
+
+def test_compile_schema_shares_selectors():
+    schema = {'pagination_schema': 'a.next::attr(href)',
+              'product_page_schema': {'CurrentPrice': 'span.price::text',
+                                      'PriceCurrency': {'css': 'span.price::text', 'processors': ['currency']},
+                                      'Brand': {'css': ['span.missing::text', 'span.brand::text']}}}
+    selectors = compile_schema(schema)
+    assert selectors['CurrentPrice'][0] is selectors['PriceCurrency'][0]
+    assert [selector.css for selector in selectors['Brand']] == ['span.missing::text', 'span.brand::text']
+    assert selectors['pagination_schema'][0].css == 'a.next::attr(href)'
+
+
+def test_plain_selector_and_selector_list():
+    product = extract({'Brand': 'span.brand::text',
+                       'ProductName': {'css': ['h2.missing::text', 'h1.name::text']},
+                       'Missing': 'p.nothing::text'})
+    assert product == {'Brand': 'Gucci', 'ProductName': '  Borsa   Tote  ', 'Missing': None}
+
+
+@pytest.mark.parametrize('spec, value', [
+    ({'css': 'h1.name::text', 'processors': ['strip']}, 'Borsa   Tote'),
+    ({'css': 'h1.name::text', 'processors': ['clean']}, 'Borsa Tote'),
+    ({'css': 'span.sku::text', 'processors': [['remove', 'SKU', ':'], 'strip']}, 'GG-123-NERO'),
+    ({'css': 'span.sku::text', 'processors': [['split', '-', -1]]}, 'NERO'),
+    ({'css': 'span.sku::text', 'processors': [['split', '-', 9]]}, None),
+    ({'css': 'span.sku::text', 'processors': [['regex', r'(\d+)']]}, '123'),
+    ({'css': 'span.sku::text', 'processors': [['regex', r'XYZ']]}, None),
+    ({'css': 'span.sku::text', 'processors': [['replace', 'NERO', 'BLACK'], ['split', ' ', -1]]}, 'GG-123-BLACK'),
+    ({'css': 'span.price::text', 'processors': ['price']}, 1250.0),
+    ({'css': 'span.price::text', 'processors': ['currency']}, 'EUR'),
+    ({'css': 'a.image::attr(href)', 'processors': ['urljoin']}, 'https://shop.example.com/img/1.jpg'),
+    ({'css': 'script[type="application/ld+json"]::text', 'processors': [['json', 'offers.price']]}, '980.5'),
+    ({'css': 'script[type="application/ld+json"]::text', 'processors': [['json', 'offers.missing.deeper']]}, None),
+    ({'source': 'url', 'processors': [['split', '/', -1]]}, '1'),
+])
+def test_processors(spec, value):
+    assert extract({'Field': spec})['Field'] == value
+
+
+def test_many_keeps_every_match_through_value_and_list_processors():
+    product = extract({
+        'AvailableSizes': {'css': 'ul.sizes li::text', 'many': True, 'processors': ['compact', 'strip']},
+        'FirstSize': {'css': 'ul.sizes li::text', 'many': True, 'processors': ['first']},
+        'LastSize': {'css': 'ul.sizes li::text', 'many': True, 'processors': ['last']},
+        'Joined': {'css': 'ul.sizes li::text', 'many': True, 'processors': ['compact', ['join', '/']]},
+        'NoSizes': {'css': 'ul.none li::text', 'many': True},
+        'NoSizesList': {'css': 'ul.none li::text', 'many': True, 'default': []},
+    })
+    assert product['AvailableSizes'] == ['S', 'M', 'L']
+    assert product['FirstSize'] == 'S'
+    assert product['LastSize'] == 'L'
+    assert product['Joined'] == 'S/M/L'
+    # No match is empty like a missing single value, unless a default says otherwise
+    assert product['NoSizes'] is None
+    assert product['NoSizesList'] == []
+
+
+def test_from_fallback_and_default():
+    product = extract({
+        'sku': {'css': 'span.sku::text', 'processors': [['remove', 'SKU:'], 'strip'], 'emit': False},
+        'ProductCode': {'from': 'sku', 'processors': [['split', '-', 1]]},
+        'CurrentPrice': {'css': 'span.price::text', 'processors': ['price']},
+        'OriginalPrice': {'css': 'del.price::text', 'processors': ['price'], 'fallback': 'CurrentPrice'},
+        'StockStatus': {'css': 'span.availability::text', 'default': 'unknown'},
+    })
+    # Helper fields are computed for the others but not emitted
+    assert 'sku' not in product
+    assert product['ProductCode'] == '123'
+    assert product['OriginalPrice'] == product['CurrentPrice'] == 1250.0
+    assert product['StockStatus'] == 'unknown'
+
+
+@pytest.mark.parametrize('type_, css, value', [
+    ('int', 'span.stock::text', 3),
+    ('float', 'span.stock::text', 3.0),
+    ('list', 'span.brand::text', ['Gucci']),
+    ('str', 'span.brand::text', 'Gucci'),
+    # Values that do not convert come out as None
+    ('int', 'span.brand::text', None),
+])
+def test_type_conversion(type_, css, value):
+    assert extract({'Field': {'css': css, 'type': type_}})['Field'] == value
+
+
+def test_str_type_serializes_json_values():
+    spec = {'css': 'script[type="application/ld+json"]::text', 'processors': [['json', 'offers']], 'type': 'str'}
+    assert json.loads(extract({'Offers': spec})['Offers']) == {'price': '980.5'}
+
+
+def test_structured_values_take_precedence():
+    product = extract({'Brand': 'span.brand::text', 'CurrentPrice': {'css': 'span.price::text', 'processors': ['price']}},
+                      structured={'Brand': 'GUCCI', 'StockAvailability': 'InStock'})
+    assert product == {'Brand': 'GUCCI', 'CurrentPrice': 1250.0, 'StockAvailability': 'InStock'}
+
+
+def test_json_values_are_not_shared_between_fields_or_pages():
+    spec = {'css': 'script[type="application/ld+json"]::text', 'processors': [['json', 'offers']]}
+    first = extract({'Offers': spec, 'Again': spec})
+    first['Offers']['price'] = 'changed'
+    assert first['Again'] == {'price': '980.5'}
+    assert extract({'Offers': spec})['Offers'] == {'price': '980.5'}
+
+
+@pytest.mark.parametrize('spec, message', [
+    ({'css': 'a', 'selector': 'b'}, 'unknown keys'),
+    ({'css': 'a', 'processors': ['shout']}, 'unknown processor'),
+    ({'css': 'a', 'type': 'decimal'}, 'unknown type'),
+    ({'source': 'body'}, 'unknown source'),
+])
+def test_invalid_specs_are_rejected(spec, message):
+    with pytest.raises(ValueError, match=message):
+        FieldSpec('Field', spec, [])
+
+
+def test_references_are_checked():
+    with pytest.raises(ValueError, match='unknown field'):
+        ProductExtractor({'OriginalPrice': {'css': 'del::text', 'fallback': 'Price'}}, {})
+    with pytest.raises(ValueError, match='refers back to itself'):
+        extract({'A': {'from': 'B'}, 'B': {'from': 'A'}})
+
+
+JSON_LD = {
+    '@context': 'https://schema.org',
+    '@graph': [
+        {'@type': 'BreadcrumbList', 'itemListElement': []},
+        {'@type': 'Product', 'name': 'Borsa Tote', 'sku': 'GG123', 'brand': {'@type': 'Brand', 'name': 'Gucci'},
+         'image': [{'@type': 'ImageObject', 'contentUrl': 'https://shop.example.com/1.jpg'}],
+         'color': 'Nero', 'size': ['S', 'M'], 'category': 'Borse',
+         'offers': {'@type': 'Offer', 'price': '980.50', 'priceCurrency': 'EUR',
+                    'availability': 'https://schema.org/InStock',
+                    'priceSpecification': {'@type': 'UnitPriceSpecification', 'priceType':
+                                           'https://schema.org/StrikethroughPrice', 'price': 1250}}},
+    ],
+}
+RELATED = {'@type': 'Product', 'name': 'Portafoglio', 'sku': 'GG999', 'description': 'Related product',
+           'offers': {'price': 200}}
+MICRODATA = '''
+<div itemscope itemtype="https://schema.org/Product">
+  <h1 itemprop="name">Borsa Tote</h1>
+  <meta itemprop="sku" content="GG123">
+  <div itemprop="brand" itemscope itemtype="https://schema.org/Brand"><span itemprop="name">Gucci</span></div>
+  <img itemprop="image" src="https://shop.example.com/1.jpg">
+  <p itemprop="description">Pelle morbida</p>
+  <div itemprop="offers" itemscope itemtype="https://schema.org/Offer">
+    <meta itemprop="price" content="980.50"><meta itemprop="priceCurrency" content="EUR">
+    <link itemprop="availability" href="https://schema.org/OutOfStock">
+  </div>
+</div>
+'''
+
+
+def structured(body):
+    return extract_structured_product(HtmlResponse('https://shop.example.com/', body=body, encoding='utf-8').selector.root)
+
+
+def ld_json(data):
+    return f'<script type="application/ld+json">{json.dumps(data)}</script>'
+
+
+def test_json_ld_product():
+    product = structured(f'<html><head>{ld_json(JSON_LD)}</head><body></body></html>')
+    assert product == {
+        'Brand': 'Gucci', 'ProductName': 'Borsa Tote', 'ProductImage': 'https://shop.example.com/1.jpg',
+        'ProductColor': 'Nero', 'sku': 'GG123', 'Category': 'Borse', 'CurrentPrice': 980.5,
+        'OriginalPrice': 1250.0, 'PriceCurrency': 'EUR', 'StockAvailability': 'InStock', 'AvailableSizes': ['S', 'M'],
+    }
+
+
+def test_microdata_product():
+    product = structured(f'<html><body>{MICRODATA}</body></html>')
+    assert product == {
+        'Brand': 'Gucci', 'ProductName': 'Borsa Tote', 'ProductImage': 'https://shop.example.com/1.jpg',
+        'sku': 'GG123', 'Description': 'Pelle morbida', 'CurrentPrice': 980.5, 'PriceCurrency': 'EUR',
+        'StockAvailability': 'OutOfStock',
+    }
+
+
+def test_json_ld_is_completed_by_microdata_but_not_by_related_products():
+    body = f'<html><head>{ld_json(JSON_LD)}{ld_json(RELATED)}</head><body>{MICRODATA}</body></html>'
+    product = structured(body)
+    # First node wins; microdata of the same product only adds what JSON-LD lacks
+    assert product['StockAvailability'] == 'InStock'
+    assert product['Description'] == 'Pelle morbida'
+    assert product['CurrentPrice'] == 980.5
+
+
+def test_aggregate_offer_uses_the_lowest_price():
+    data = {'@type': 'Product', 'name': 'Sneaker',
+            'offers': {'@type': 'AggregateOffer', 'lowPrice': '89.9', 'highPrice': '120', 'priceCurrency': 'EUR'}}
+    product = structured(f'<html><head>{ld_json(data)}</head></html>')
+    assert product['CurrentPrice'] == 89.9
+    assert product['PriceCurrency'] == 'EUR'
+
+
+def test_invalid_or_missing_structured_data():
+    assert structured('<html><head><script type="application/ld+json">{not json</script></head></html>') == {}
+    assert structured('<html><body><p>No markup</p></body></html>') == {}
+    assert structured(f'<html><head>{ld_json({"@type": "Organization", "name": "Shop"})}</head></html>') == {}
+
+
+def test_structured_lists_are_not_shared_between_pages():
+    body = f'<html><head>{ld_json(JSON_LD)}</head></html>'
+    structured(body)['AvailableSizes'].append('XL')
+    assert structured(body)['AvailableSizes'] == ['S', 'M']
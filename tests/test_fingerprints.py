@@ -0,0 +1,130 @@
+import json
+
+from unifiedscraper.bench.mockshop import Catalog, PellecchiaPages
+from unifiedscraper.fingerprints import FingerprintStore
+from unifiedscraper.items import ProductItem
+from unifiedscraper.spiders.pellecchia import PellecchiaSpider
+
+from tests.conftest import html_response
+
+PRODUCT_URL = 'https://www.pellecchia.it/it/brand-0/1.html'
+VALIDATORS = {'ETag': '"abc123"', 'Last-Modified': 'Wed, 01 Jul 2026 10:00:00 GMT'}
+
+
+def seen_records(spider):
+    spider.seen_log.close()
+    return [json.loads(line) for line in spider.seen_log.path.read_text().splitlines()]
+
+
+def test_store_round_trip(tmp_path):
+    store = FingerprintStore(tmp_path / 'site.sqlite')
+    assert store.get(PRODUCT_URL) is None
+    assert store.has_changed(PRODUCT_URL, 'h1')
+
+    store.record(PRODUCT_URL, 'h1', {'ETag': b'"abc123"', 'Last-Modified': b'Wed, 01 Jul 2026 10:00:00 GMT'},
+                 listing_hash='tile1')
+    store.close()
+
+    store = FingerprintStore(tmp_path / 'site.sqlite')
+    record = store.get(PRODUCT_URL)
+    assert record['content_hash'] == 'h1'
+    assert record['etag'] == '"abc123"'
+    assert record['listing_hash'] == 'tile1'
+    assert not store.has_changed(PRODUCT_URL, 'h1')
+    assert store.has_changed(PRODUCT_URL, 'h2')
+
+    changed = record['last_changed']
+    store.touch(PRODUCT_URL)
+    store.record(PRODUCT_URL, 'h1')
+    assert store.get(PRODUCT_URL)['last_changed'] == changed
+    assert store.get(PRODUCT_URL)['listing_hash'] == 'tile1'
+    store.close()
+
+
+def test_skip_hours_freshness(tmp_path):
+    store = FingerprintStore(tmp_path / 'site.sqlite', skip_hours=1)
+    store.record(PRODUCT_URL, 'h1')
+    assert store.is_fresh(store.get(PRODUCT_URL))
+    assert not store.is_fresh(None)
+    assert not FingerprintStore(tmp_path / 'other.sqlite').is_fresh(store.get(PRODUCT_URL))
+
+
+def test_item_hash_ignores_field_order():
+    assert FingerprintStore.item_hash({'a': 1, 'b': 2}) == FingerprintStore.item_hash({'b': 2, 'a': 1})
+    assert FingerprintStore.item_hash({'a': 1}) != FingerprintStore.item_hash({'a': 2})
+
+
+def test_known_product_is_requested_with_its_validators(make_spider):
+    spider = make_spider(PellecchiaSpider, incremental=True)
+    spider.fingerprints.record(PRODUCT_URL, 'h1', VALIDATORS)
+    listing = html_response('https://www.pellecchia.it/it/brand-0')
+
+    request, = spider.follow_product(listing, PRODUCT_URL)
+    assert request.headers[b'If-None-Match'] == b'"abc123"'
+    assert request.headers[b'If-Modified-Since'] == b'Wed, 01 Jul 2026 10:00:00 GMT'
+    assert request.meta['fingerprint_url'] == PRODUCT_URL
+    assert request.meta['handle_httpstatus_list'] == [304]
+
+
+def test_new_product_is_requested_without_validators(make_spider):
+    spider = make_spider(PellecchiaSpider, incremental=True)
+    request, = spider.follow_product(html_response('https://www.pellecchia.it/it/brand-0'), PRODUCT_URL)
+    assert b'If-None-Match' not in request.headers
+    assert b'If-Modified-Since' not in request.headers
+
+
+def test_fresh_product_is_not_requested(make_spider):
+    spider = make_spider(PellecchiaSpider, incremental=True)
+    spider.fingerprints.skip_seconds = 3600
+    spider.fingerprints.record(PRODUCT_URL, 'h1')
+    assert list(spider.follow_product(html_response('https://www.pellecchia.it/it/brand-0'), PRODUCT_URL)) == []
+    assert seen_records(spider)[0]['status'] == 'skipped'
+
+
+def test_not_modified_page_gives_a_seen_record(make_spider):
+    spider = make_spider(PellecchiaSpider, incremental=True)
+    spider.fingerprints.record(PRODUCT_URL, 'h1', VALIDATORS)
+    response = html_response(PRODUCT_URL, status=304, meta={'fingerprint_url': PRODUCT_URL})
+
+    assert list(spider.parse_product_page(response)) == []
+    record, = seen_records(spider)
+    assert record['ProductURL'] == PRODUCT_URL
+    assert record['status'] == 'not_modified'
+    assert spider.crawler.stats.get_value('incremental/seen/not_modified') == 1
+
+
+def test_changed_product_is_yielded_and_stored_once_exported(make_spider):
+    spider = make_spider(PellecchiaSpider, incremental=True)
+    spider.fingerprints.record(PRODUCT_URL, 'stale-hash')
+    page = PellecchiaPages(Catalog(brands=1, products=2)).product(0, 1)
+    response = html_response(PRODUCT_URL, page, headers=VALIDATORS, meta={'fingerprint_url': PRODUCT_URL})
+
+    item, = spider.parse_product_page(response)
+    assert isinstance(item, ProductItem)
+    assert item.ProductName == 'Product 0-1'
+    content_hash = response.meta['content_hash']
+    assert content_hash == FingerprintStore.item_hash(item)
+    # Nothing is stored before the item is exported
+    assert spider.fingerprints.get(PRODUCT_URL)['content_hash'] == 'stale-hash'
+
+    spider.item_scraped(item, response, spider)
+    path = spider.fingerprints.path
+    spider.store_fingerprints()
+    store = FingerprintStore(path)
+    assert store.get(PRODUCT_URL)['content_hash'] == content_hash
+    assert store.get(PRODUCT_URL)['etag'] == '"abc123"'
+    assert spider.crawler.stats.get_value('incremental/stored') == 1
+
+
+def test_unchanged_product_gives_a_seen_record(make_spider):
+    spider = make_spider(PellecchiaSpider, incremental=True)
+    page = PellecchiaPages(Catalog(brands=1, products=2)).product(0, 1)
+    first = html_response(PRODUCT_URL, page, meta={'fingerprint_url': PRODUCT_URL})
+    item, = spider.parse_product_page(first)
+    spider.fingerprints.record(PRODUCT_URL, first.meta['content_hash'])
+
+    again = html_response(PRODUCT_URL, page, meta={'fingerprint_url': PRODUCT_URL})
+    assert list(spider.parse_product_page(again)) == []
+    assert 'content_hash' not in again.meta
+    assert seen_records(spider)[0]['status'] == 'unchanged'
+    assert spider.crawler.stats.get_value('incremental/seen/unchanged') == 1
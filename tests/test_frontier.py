@@ -0,0 +1,112 @@
+from types import SimpleNamespace
+
+import pytest
+from scrapy.settings import Settings
+
+from unifiedscraper.frontier import FrontierScheduler, SQLiteFrontier
+
+
+@pytest.fixture
+def frontiers(tmp_path):
+    """Two workers on the same frontier file"""
+    path = tmp_path / 'site.sqlite'
+    first = SQLiteFrontier(path, 'worker-a')
+    second = SQLiteFrontier(path, 'worker-b')
+    yield first, second
+    first.close()
+    second.close()
+
+
+def test_push_queues_a_request_once(frontiers):
+    first, second = frontiers
+    assert first.push('k1', b'one', 0)
+    assert not second.push('k1', b'one again', 0)
+    assert len(first) == 1
+
+
+def test_pop_follows_priority(frontiers):
+    first, _ = frontiers
+    first.push('low', b'low', 0)
+    first.push('high', b'high', 10)
+    assert first.pop() == ('high', b'high')
+    assert first.pop() == ('low', b'low')
+    assert first.pop() is None
+
+
+def test_leased_request_goes_to_one_worker(frontiers):
+    first, second = frontiers
+    first.push('k1', b'one', 0)
+    assert first.pop() == ('k1', b'one')
+    assert second.pop() is None
+    assert second.pending()
+
+
+def test_release_hands_leases_back_without_counting_an_attempt(tmp_path):
+    path = tmp_path / 'site.sqlite'
+    first = SQLiteFrontier(path, 'worker-a', max_attempts=1)
+    second = SQLiteFrontier(path, 'worker-b', max_attempts=1)
+    first.push('k1', b'one', 0)
+    first.pop()
+    first.release()
+    assert second.pop() == ('k1', b'one')
+
+
+def test_expired_lease_is_taken_over_until_attempts_run_out(tmp_path):
+    path = tmp_path / 'site.sqlite'
+    first = SQLiteFrontier(path, 'worker-a', lease_seconds=-1, max_attempts=2)
+    second = SQLiteFrontier(path, 'worker-b', lease_seconds=-1, max_attempts=2)
+    first.push('k1', b'one', 0)
+    assert first.pop() == ('k1', b'one')
+    assert second.pop() == ('k1', b'one')
+    assert first.pop() is None
+    assert not first.pending()
+
+
+def test_ack_marks_the_request_done(frontiers):
+    first, second = frontiers
+    first.push('k1', b'one', 0)
+    first.pop()
+    second.ack(['k1'])  # not leased by this worker: ignored
+    assert first.pending()
+    first.ack(['k1'])
+    assert not first.pending()
+    assert not second.push('k1', b'one', 0)
+
+
+def test_reset_if_drained_starts_a_new_crawl(frontiers):
+    first, _ = frontiers
+    first.push('k1', b'one', 0)
+    first.reset_if_drained()
+    assert len(first) == 1
+    first.pop()
+    first.ack(['k1'])
+    first.reset_if_drained()
+    assert first.push('k1', b'one', 0)
+
+
+def test_requeue_queues_an_own_lease_again(frontiers):
+    first, second = frontiers
+    first.push('k1', b'one', 0)
+    first.pop()
+    assert not second.push('k1', b'retry', 0, requeue=True)
+    assert first.push('k1', b'retry', 5, requeue=True)
+    assert second.pop() == ('k1', b'retry')
+
+
+def test_scheduler_acks_only_when_closing_without_engine_internals(tmp_path):
+    frontier = SQLiteFrontier(tmp_path / 'site.sqlite', 'worker-a')
+    frontier.push('k1', b'one', 0)
+    frontier.pop()
+    engine = SimpleNamespace(downloader=SimpleNamespace(), scraper=SimpleNamespace())
+    scheduler = FrontierScheduler(SimpleNamespace(engine=engine, stats=None, settings=Settings()), SQLiteFrontier)
+    scheduler.frontier = frontier
+    scheduler.leased = {'k1': object()}
+
+    assert scheduler.in_flight() is None
+    scheduler.wake_engine(0.5)
+    scheduler.ack_finished()
+    assert scheduler.leased
+    scheduler.ack_finished(closing=True)
+    assert not scheduler.leased
+    assert not frontier.pending()
+    frontier.close()
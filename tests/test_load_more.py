@@ -0,0 +1,65 @@
+import pytest
+
+from unifiedscraper.bench.mockshop import Catalog, MockShop, run_isolated
+from unifiedscraper.extraction import compile_schema
+from unifiedscraper.spiders.lelefantino import LelefantinoSpider
+
+PAGE_SIZE = 12
+PREFETCH = 2
+
+
+class LoadMoreShopSpider(LelefantinoSpider):
+    """lelefantino with the site config it lacks in websites.json, crawling the mock shop"""
+
+    def _load_config(self):
+        return {'base_url': 'https://lelefantino-store.com/',
+                'brands_url': '/pages/brands',
+                'load_more_query': '?offset=',
+                'load_more_offset': PAGE_SIZE,
+                'load_more_prefetch': PREFETCH,
+                'price_locale': 'it',
+                'schema_path': 'configs/schemas/lelefantino_schema.json'}
+
+
+class CountedLoadMoreShopSpider(LoadMoreShopSpider):
+    """The same, with the listing's product count to request every page at once"""
+
+    def _load_schema(self):
+        schema = super()._load_schema()
+        schema['total_count_schema'] = 'span.usf-results-count::text'
+        self.selectors = compile_schema(schema)
+        return schema
+
+
+def test_page_urls_start_at_each_page_first_product(make_spider):
+    spider = make_spider(LoadMoreShopSpider)
+    listing = 'https://lelefantino-store.com/collections/gucci?sort_by=price'
+    assert spider.load_more_url(listing, 2) == f'https://lelefantino-store.com/collections/gucci?sort_by=price&offset={PAGE_SIZE}'
+    assert spider.load_more_url(listing, 5) == f'https://lelefantino-store.com/collections/gucci?sort_by=price&offset={4 * PAGE_SIZE}'
+
+
+@pytest.mark.parametrize('spidercls, wasted', [
+    # Prefetching stops at the first page without a "Load More" button
+    (LoadMoreShopSpider, PREFETCH - 1),
+    # With the product count no page past the end is requested
+    (CountedLoadMoreShopSpider, 0),
+])
+@pytest.mark.parametrize('products', [50, 48, 5])
+def test_every_listing_page_is_fetched_once(spidercls, wasted, products):
+    catalog = Catalog(brands=2, products=products, page_size=PAGE_SIZE)
+    shop = MockShop('lelefantino', catalog, latency=0.002).start()
+    try:
+        result = run_isolated(spidercls, shop.base_url, 8)
+    finally:
+        shop.stop()
+
+    assert result['items'] == catalog.brands * catalog.products
+    for brand in range(catalog.brands):
+        listing = f'/collections/{catalog.slug(brand)}'
+        pages = [listing] + [f'{listing}?offset={(page - 1) * PAGE_SIZE}' for page in range(2, catalog.pages + 1)]
+        assert [shop.hits[page] for page in pages] == [1] * catalog.pages
+        past_end = [path for path in shop.hits if path.startswith(f'{listing}?') and path not in pages]
+        # A single-page listing has no "Load More" button to prefetch from
+        assert len(past_end) == (wasted if catalog.pages > 1 else 0)
+        for number in range(catalog.products):
+            assert shop.hits[f'/products/{catalog.slug(brand)}/{number}'] == 1
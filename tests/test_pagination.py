@@ -0,0 +1,106 @@
+import pytest
+
+from unifiedscraper.bench.mockshop import Catalog, MockShop, PellecchiaPages, run_isolated
+from unifiedscraper.extraction import compile_schema
+from unifiedscraper.spiders.pellecchia import PellecchiaSpider
+
+from tests.conftest import html_response
+
+BRAND_URL = 'https://www.pellecchia.it/it/tutti/designers'
+LISTING_URL = 'https://www.pellecchia.it/it/brand-0'
+
+
+class CountedPellecchiaSpider(PellecchiaSpider):
+    """pellecchia with a product count instead of numbered page links"""
+
+    def _load_config(self):
+        return {**super()._load_config(), 'page_size': 24}
+
+    def _load_schema(self):
+        schema = super()._load_schema()
+        del schema['last_page_schema']
+        schema['total_count_schema'] = 'div.risultati::text'
+        self.selectors = compile_schema(schema)
+        return schema
+
+
+def listing_requests(spider, body, meta=None):
+    """Listing-page requests of a parsed listing (its product requests left out)"""
+    response = html_response(LISTING_URL, body, meta={'brand_url': BRAND_URL, **(meta or {})})
+    return [request for request in spider.parse_site_products_page(response)
+            if request.callback == spider.parse_site_products_page]
+
+
+def pages_of(page, pages):
+    """Page ``page`` of a pellecchia listing of ``pages`` pages"""
+    return PellecchiaPages(Catalog(brands=1, products=pages * 24, page_size=24)).listing(0, page)
+
+
+def test_first_page_requests_every_other_page(make_spider):
+    spider = make_spider(PellecchiaSpider)
+    requests = listing_requests(spider, pages_of(1, 5))
+    assert [request.url for request in requests] == [f'{LISTING_URL}?pag={page}' for page in range(2, 6)]
+    assert [request.meta['page_number'] for request in requests] == [2, 3, 4, 5]
+
+
+def test_first_page_that_is_the_last_requests_nothing(make_spider):
+    spider = make_spider(PellecchiaSpider)
+    assert listing_requests(spider, pages_of(1, 1)) == []
+
+
+def test_requested_pages_do_not_request_more(make_spider):
+    spider = make_spider(PellecchiaSpider)
+    assert listing_requests(spider, pages_of(3, 5), meta={'page_number': 3}) == []
+
+
+def test_largest_page_number_wins_over_page_windows(make_spider):
+    spider = make_spider(PellecchiaSpider)
+    body = ('<div class="paginazione"><ul><li><a href="?pag=1">1</a></li><li><a href="?pag=2">2</a></li>'
+            '<li><a href="#">...</a></li><li><a href="?pag=1.250">1.250</a></li>'
+            '<li><a href="?pag=2">&gt;</a></li></ul></div>')
+    assert spider.last_page(html_response(LISTING_URL, body)) == 1250
+
+
+def test_listing_without_page_numbers_follows_its_next_link(make_spider):
+    spider = make_spider(PellecchiaSpider)
+    body = '<div class="paginazione"><ul><li><a href="/it/brand-0?pag=2">&gt;</a></li></ul></div>'
+    next_page, = listing_requests(spider, body)
+    assert next_page.url == f'{LISTING_URL}?pag=2'
+    assert 'page_number' not in next_page.meta
+
+
+@pytest.mark.parametrize('count, last_page', [
+    ('48 prodotti', 2),
+    ('49 prodotti', 3),
+    ('24 prodotti', 1),
+    ('1 prodotto', 1),
+    ('1.201 prodotti', 51),
+])
+def test_last_page_from_the_product_count(make_spider, count, last_page):
+    spider = make_spider(CountedPellecchiaSpider)
+    assert spider.last_page(html_response(LISTING_URL, f'<div class="risultati">{count}</div>')) == last_page
+
+
+def test_product_count_fan_out(make_spider):
+    spider = make_spider(CountedPellecchiaSpider)
+    requests = listing_requests(spider, '<div class="risultati">49 prodotti</div>')
+    assert [request.url for request in requests] == [f'{LISTING_URL}?pag=2', f'{LISTING_URL}?pag=3']
+    assert listing_requests(spider, '<div class="risultati">20 prodotti</div>') == []
+
+
+def test_numbered_listings_are_fetched_once_per_page():
+    catalog = Catalog(brands=2, products=50, page_size=12)
+    shop = MockShop('pellecchia', catalog, latency=0.002).start()
+    try:
+        result = run_isolated('pellecchia', shop.base_url, 8)
+    finally:
+        shop.stop()
+
+    assert result['items'] == catalog.brands * catalog.products
+    for brand in range(catalog.brands):
+        listing = f'/it/{catalog.slug(brand)}'
+        assert shop.hits[listing] == 1
+        # The first page is not fetched again as ?pag=1
+        assert shop.hits[f'{listing}?pag=1'] == 0
+        assert [shop.hits[f'{listing}?pag={page}'] for page in range(2, catalog.pages + 1)] == [1] * (catalog.pages - 1)
+        assert shop.hits[f'{listing}?pag={catalog.pages + 1}'] == 0
@@ -0,0 +1,77 @@
+import pyarrow as pa
+import pytest
+
+from unifiedscraper.items import ProductItem
+from unifiedscraper.prices import currency_code, parse_price, parse_price_array, parse_price_batch
+
+PRICES = [
+    '1.234,50 €', '€1,234.50', '1234.50', '75,5', '€ 99,90', '1.234', '1,234', '1.234.567', '1,234,567',
+    '12.345,6', '0,99', '1 234,50 €', "CHF 1'234.50", '€75', '60$', '1.234.', 'Prezzo: 49,00 EUR',
+    'da 19.99 a 29.99', '', 'n/d', None,
+]
+
+
+@pytest.mark.parametrize('locale', [None, 'it', 'en', 'de_DE', 'en-GB'])
+def test_parse_price_array_agrees_with_parse_price(locale):
+    expected = [parse_price(text, locale=locale) if text is not None else None for text in PRICES]
+    assert parse_price_array(PRICES, locale).to_pylist() == expected
+
+
+def test_parse_price_array_keeps_chunks_and_repeats():
+    prices = pa.chunked_array([['75,5', None, '75,5'], [], ['1.234', 'n/d', '75,5']], type=pa.large_string())
+    parsed = parse_price_array(prices, 'it')
+    assert isinstance(parsed, pa.ChunkedArray)
+    assert parsed.type == pa.float64()
+    assert parsed.to_pylist() == [75.5, None, 75.5, 1234.0, None, 75.5]
+    assert parse_price_array([], 'it').to_pylist() == []
+    with pytest.raises(ValueError):
+        parse_price_array(['75,5'], 'xx')
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('1.234,50 €', 1234.5),
+    ('€1,234.50', 1234.5),
+    ('75,5', 75.5),
+    ('1.234.567', 1234567.0),
+    ('1 234,50 €', 1234.5),
+    ('€75', 75.0),
+    ('n/d', None),
+])
+def test_parse_price_is_the_same_in_every_locale(text, expected):
+    for locale in (None, 'it', 'en'):
+        assert parse_price(text, locale=locale) == expected
+
+
+def test_parse_price_settles_three_decimals_by_locale():
+    assert parse_price('1.234') == 1234.0
+    assert parse_price('1.234', locale='it') == 1234.0
+    assert parse_price('1.234', locale='en') == 1.234
+    assert parse_price('1,234', locale='it') == 1.234
+    assert parse_price('1.234', decimal='.') == 1.234
+
+
+def test_unknown_locale_is_an_error():
+    with pytest.raises(ValueError):
+        parse_price('1.234', locale='xx')
+
+
+def test_parse_price_batch_parses_string_price_columns_only():
+    batch = pa.RecordBatch.from_pydict({'CurrentPrice': ['1.234', None], 'OriginalPrice': [10.0, 20.0],
+                                        'Brand': ['1.234', 'B']})
+    parsed = parse_price_batch(batch, 'en')
+    assert parsed.schema.field('CurrentPrice').type == pa.float64()
+    assert parsed.to_pylist() == [{'CurrentPrice': 1.234, 'OriginalPrice': 10.0, 'Brand': '1.234'},
+                                  {'CurrentPrice': None, 'OriginalPrice': 20.0, 'Brand': 'B'}]
+
+
+def test_currency_code():
+    assert currency_code('€75.5') == 'EUR'
+    assert currency_code('99,90 EUR') == 'EUR'
+    assert currency_code('60$') == 'USD'
+    assert currency_code('75') is None
+
+
+def test_product_item_parses_price_text_in_the_site_locale():
+    assert ProductItem.from_dict({'CurrentPrice': '1.234'}, price_locale='en').CurrentPrice == 1.234
+    assert ProductItem.from_dict({'CurrentPrice': '1.234'}, price_locale='it').CurrentPrice == 1234.0
+    assert ProductItem(CurrentPrice='€ 99,90', OriginalPrice=120).CurrentPrice == 99.9
@@ -0,0 +1,137 @@
+from types import SimpleNamespace
+
+import pytest
+from scrapy import Request
+from scrapy.http import HtmlResponse
+from scrapy.settings import Settings
+from scrapy.statscollectors import StatsCollector
+from scrapy.utils.request import RequestFingerprinter
+
+from unifiedscraper.bench.mockshop import Catalog, PellecchiaPages
+from unifiedscraper.frontier import FrontierScheduler, SQLiteFrontier
+from unifiedscraper.rendering import render_request, should_abort_request
+from unifiedscraper.spiders.pellecchia import PellecchiaSpider
+
+from tests.conftest import html_response
+
+PRODUCT_URL = 'https://www.pellecchia.it/it/brand-0/1.html'
+LISTING_URL = 'https://www.pellecchia.it/it/brand-0'
+COMPLETE_PAGE = PellecchiaPages(Catalog(brands=1, products=2)).product(0, 1)
+# The product page before its scripts filled in the name and price
+INCOMPLETE_PAGE = '<div class="txt"><h1> Brand 0 </h1></div><div id="descrizione"><p>Pelle</p></div>'
+
+
+class LazyPellecchiaSpider(PellecchiaSpider):
+    """pellecchia with "playwright": "lazy" rendering"""
+
+    def _load_config(self):
+        return {**super()._load_config(), 'playwright': 'lazy'}
+
+
+def product_response(body, **meta):
+    return html_response(PRODUCT_URL, body, meta={'brand_url': LISTING_URL, **meta})
+
+
+def test_incomplete_page_is_rendered_once(make_spider):
+    spider = make_spider(LazyPellecchiaSpider)
+    rendering, = spider.parse_product_page(product_response(INCOMPLETE_PAGE))
+    assert isinstance(rendering, Request)
+    assert rendering.url == PRODUCT_URL
+    assert rendering.meta['playwright'] is True
+    assert rendering.meta['frontier_requeue'] is True
+    assert rendering.dont_filter
+
+    # The rendered page is parsed whatever it contains
+    item, = spider.parse_product_page(product_response(INCOMPLETE_PAGE, playwright=True))
+    assert item.ProductName is None
+    stats = spider.crawler.stats
+    assert stats.get_value('playwright/lazy/checked') == 1
+    assert stats.get_value('playwright/lazy/rendered') == 1
+
+
+def test_complete_page_is_not_rendered(make_spider):
+    spider = make_spider(LazyPellecchiaSpider)
+    item, = spider.parse_product_page(product_response(COMPLETE_PAGE))
+    assert item.ProductName == 'Product 0-1'
+    assert spider.crawler.stats.get_value('playwright/lazy/checked') == 1
+    assert spider.crawler.stats.get_value('playwright/lazy/rendered') is None
+
+
+def test_listing_without_products_is_rendered(make_spider):
+    spider = make_spider(LazyPellecchiaSpider)
+    listing = html_response(LISTING_URL, '<div id="app"></div>', meta={'brand_url': LISTING_URL})
+    rendering, = spider.parse_site_products_page(listing)
+    assert rendering.url == LISTING_URL
+    assert rendering.meta['playwright'] is True
+
+
+def test_sites_without_lazy_rendering_are_not_checked(make_spider):
+    spider = make_spider(PellecchiaSpider)
+    item, = spider.parse_product_page(product_response(INCOMPLETE_PAGE))
+    assert item.ProductName is None
+    assert spider.crawler.stats.get_value('playwright/lazy/checked') is None
+
+
+@pytest.mark.parametrize('pages, ratio', [
+    ([COMPLETE_PAGE, COMPLETE_PAGE, COMPLETE_PAGE, INCOMPLETE_PAGE], 0.25),
+    ([COMPLETE_PAGE], 0.0),
+    ([], 0.0),
+])
+def test_render_ratio_is_set_on_close(make_spider, pages, ratio):
+    spider = make_spider(LazyPellecchiaSpider)
+    for page in pages:
+        list(spider.parse_product_page(product_response(page)))
+    spider.closed('finished')
+    assert spider.crawler.stats.get_value('playwright/lazy/render_ratio') == ratio
+
+
+def test_render_request_drops_conditional_headers():
+    request = Request(PRODUCT_URL, headers={'If-None-Match': '"abc"', 'If-Modified-Since': 'Wed, 01 Jul 2026',
+                                            'Accept-Language': 'it'},
+                      meta={'fingerprint_url': PRODUCT_URL, 'handle_httpstatus_list': [304]})
+    rendering = render_request(request)
+    assert b'If-None-Match' not in rendering.headers
+    assert b'If-Modified-Since' not in rendering.headers
+    assert rendering.headers[b'Accept-Language'] == b'it'
+    assert rendering.meta['fingerprint_url'] == PRODUCT_URL
+    assert b'If-None-Match' in request.headers
+
+
+@pytest.mark.parametrize('resource_type, aborted', [
+    ('image', True), ('font', True), ('stylesheet', True), ('media', True),
+    ('document', False), ('script', False), ('xhr', False), ('fetch', False),
+])
+def test_only_cosmetic_resources_are_aborted(resource_type, aborted):
+    assert should_abort_request(SimpleNamespace(resource_type=resource_type)) is aborted
+
+
+def test_rendered_page_goes_back_to_the_shared_frontier(make_spider, tmp_path):
+    spider = make_spider(LazyPellecchiaSpider)
+    parsing = set()
+    engine = SimpleNamespace(downloader=SimpleNamespace(active=set()),
+                             scraper=SimpleNamespace(slot=SimpleNamespace(active=parsing)))
+    settings = Settings({'FRONTIER_DIR': str(tmp_path / 'frontier')})
+    crawler = SimpleNamespace(engine=engine, settings=settings, request_fingerprinter=RequestFingerprinter())
+    crawler.stats = StatsCollector(crawler)
+    scheduler = FrontierScheduler(crawler, SQLiteFrontier)
+    scheduler.open(spider)
+
+    request = Request(PRODUCT_URL, callback=spider.parse_product_page, meta={'brand_url': LISTING_URL})
+    assert scheduler.enqueue_request(request)
+    leased = scheduler.next_request()
+    parsing.add(leased)
+
+    # The same page found again, even with dont_filter, is crawled once
+    assert not scheduler.enqueue_request(request.replace(dont_filter=True))
+    assert scheduler.next_request() is None
+
+    response = HtmlResponse(PRODUCT_URL, body=INCOMPLETE_PAGE, encoding='utf-8', request=leased)
+    rendering, = spider.parse_product_page(response)
+    assert scheduler.enqueue_request(rendering)
+    parsing.clear()
+    rendered = scheduler.next_request()
+    assert rendered.url == PRODUCT_URL
+    assert rendered.meta['playwright'] is True
+    assert rendered.callback == spider.parse_product_page
+    assert scheduler.next_request() is None
+    scheduler.close('finished')
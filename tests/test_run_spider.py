@@ -0,0 +1,106 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from unifiedscraper import run_spider
+from unifiedscraper.bench.mockshop import Catalog, MockShop
+from unifiedscraper.compaction import COMBINED_FILE_NAME
+
+REPO = Path(__file__).resolve().parent.parent
+
+# Project settings without the delays and state a local crawl does not need
+TEST_SETTINGS = '''
+from unifiedscraper.settings import *
+
+DOWNLOAD_DELAY = 0
+RANDOMIZE_DOWNLOAD_DELAY = False
+ADAPTIVE_CONCURRENCY_ENABLED = False
+INCREMENTAL_ENABLED = False
+TELNETCONSOLE_ENABLED = False
+'''
+
+RUN = '''
+import json, sys
+from unifiedscraper.run_spider import run_spider_in_process
+result = run_spider_in_process('wardow', batch_size=int(sys.argv[1]), log_level='WARNING',
+                               spider_args={'base_url': sys.argv[2]})
+print('RESULT ' + json.dumps(result))
+'''
+
+
+def write_parquet(path, rows):
+    pq.write_table(pa.table({'ProductURL': [f'https://shop.example.com/{n}' for n in range(rows)]}), path)
+
+
+def test_item_count_forgets_consolidated_files(tmp_path):
+    write_parquet(tmp_path / 'a.parquet', 3)
+    write_parquet(tmp_path / 'b.parquet', 4)
+    assert run_spider.get_scraped_item_count(tmp_path) == 7
+    assert str(tmp_path / 'a.parquet') in run_spider._row_count_cache
+
+    (tmp_path / 'a.parquet').unlink()
+    (tmp_path / 'b.parquet').unlink()
+    write_parquet(tmp_path / COMBINED_FILE_NAME, 7)
+    assert run_spider.get_scraped_item_count(tmp_path) == 7
+    assert [path for path in run_spider._row_count_cache if Path(path).parent == tmp_path] == \
+        [str(tmp_path / COMBINED_FILE_NAME)]
+
+
+def test_row_count_follows_rewritten_files(tmp_path):
+    path = tmp_path / COMBINED_FILE_NAME
+    write_parquet(path, 2)
+    assert run_spider.get_parquet_row_count(path) == 2
+    write_parquet(path, 5)
+    os.utime(path, ns=(0, 10 ** 18))
+    assert run_spider.get_parquet_row_count(path) == 5
+
+
+def test_missing_file_leaves_the_row_count_cache(tmp_path):
+    path = tmp_path / 'batch.parquet'
+    write_parquet(path, 2)
+    assert run_spider.get_parquet_row_count(path) == 2
+    path.unlink()
+    with pytest.raises(FileNotFoundError):
+        run_spider.get_parquet_row_count(path)
+    assert str(path) not in run_spider._row_count_cache
+
+
+def test_in_process_runner_crawls_the_shop_in_batches(tmp_path):
+    (tmp_path / 'local_settings.py').write_text(TEST_SETTINGS)
+    env = {**os.environ, 'SCRAPY_SETTINGS_MODULE': 'local_settings',
+           'PYTHONPATH': os.pathsep.join([str(tmp_path), str(REPO)])}
+    catalog = Catalog(brands=2, products=30, page_size=10)
+    shop = MockShop('wardow', catalog, latency=0.002).start()
+    try:
+        run = subprocess.run([sys.executable, '-c', RUN, '25', shop.base_url], cwd=tmp_path, env=env,
+                             capture_output=True, text=True, timeout=300)
+    finally:
+        shop.stop()
+    assert run.returncode == 0, run.stderr[-3000:]
+    result = json.loads(run.stdout.rsplit('RESULT ', 1)[1])
+
+    # Every product is exported once across the batches, then consolidated
+    total = catalog.brands * catalog.products
+    assert result['batches'] >= 2
+    (directory, items), = result['items_per_directory'].items()
+    assert items == total
+    assert [path.name for path in Path(directory).glob('*.parquet')] == [COMBINED_FILE_NAME]
+    urls = pq.read_table(Path(directory) / COMBINED_FILE_NAME, columns=['ProductURL']).column('ProductURL')
+    assert len(set(urls.to_pylist())) == total
+
+    # Batch results are read back from the crawler stats
+    events = [json.loads(line) for line in (tmp_path / 'crawls' / 'wardow' / 'events.jsonl').read_text().splitlines()]
+    batch_ends = [event for event in events if event['event'] == 'batch_end']
+    assert [event['batch'] for event in batch_ends] == list(range(1, result['batches'] + 1))
+    assert sum(event['items'] for event in batch_ends) == total
+    assert all(event['reason'] == 'closespider_itemcount' for event in batch_ends[:-1])
+    assert batch_ends[-1]['pending'] == 0
+    assert len([event for event in events if event['event'] == 'spider_closed']) == result['batches']
+    assert events[-1]['event'] == 'run_end'
+    assert "Stopping: the spider has crawled everything queued" in run.stdout
@@ -0,0 +1,118 @@
+import pytest
+
+from unifiedscraper.spiders.base_scraper import BaseScraper
+from unifiedscraper.spiders.goccia_men import GocciaMen
+from unifiedscraper.spiders.pellecchia import PellecchiaSpider
+from unifiedscraper.urls import UrlCanonicalizer, add_query_params
+
+from tests.conftest import html_response
+
+
+@pytest.mark.parametrize('url, canonical', [
+    ('https://Shop.Example.com:443/a/b?b=2&a=1#reviews', 'https://shop.example.com/a/b?a=1&b=2'),
+    ('http://shop.example.com:80', 'http://shop.example.com/'),
+    ('http://shop.example.com:8080/x', 'http://shop.example.com:8080/x'),
+    ('https://shop.example.com/p?utm_source=news&utm_medium=mail&gclid=x&id=3', 'https://shop.example.com/p?id=3'),
+    ('https://shop.example.com/p?q=&page=2', 'https://shop.example.com/p?page=2&q='),
+    ('https://shop.example.com/borse e zaini', 'https://shop.example.com/borse%20e%20zaini'),
+])
+def test_default_canonicalization(url, canonical):
+    assert UrlCanonicalizer().canonicalize(url) == canonical
+
+
+def test_strip_params_with_wildcards():
+    canonicalizer = UrlCanonicalizer(strip_params=['orderby', 'filter_*'])
+    url = 'https://goccia.shop/brand/x/?orderby=price&filter_colore=nero&filter_taglia=m&paged=2'
+    assert canonicalizer.canonicalize(url) == 'https://goccia.shop/brand/x/?paged=2'
+
+
+def test_keep_params_drops_everything_else():
+    canonicalizer = UrlCanonicalizer(keep_params=['id_product', 'page'])
+    url = 'https://shop.example.com/index.php?controller=product&id_product=7&page=2&utm_source=x'
+    assert canonicalizer.canonicalize(url) == 'https://shop.example.com/index.php?id_product=7&page=2'
+
+
+@pytest.mark.parametrize('trailing_slash, url, canonical', [
+    ('strip', 'https://shop.example.com/brand/', 'https://shop.example.com/brand'),
+    ('strip', 'https://shop.example.com/', 'https://shop.example.com/'),
+    ('add', 'https://shop.example.com/brand', 'https://shop.example.com/brand/'),
+    # File-like paths are left alone
+    ('add', 'https://shop.example.com/brand/1.html', 'https://shop.example.com/brand/1.html'),
+])
+def test_trailing_slash(trailing_slash, url, canonical):
+    assert UrlCanonicalizer(trailing_slash=trailing_slash).canonicalize(url) == canonical
+
+
+def test_lowercase_path():
+    canonicalizer = UrlCanonicalizer(lowercase_path=True)
+    assert canonicalizer.canonicalize('https://shop.example.com/Marche/GUCCI') == 'https://shop.example.com/marche/gucci'
+
+
+def test_unknown_trailing_slash_rule_is_rejected():
+    with pytest.raises(ValueError):
+        UrlCanonicalizer(trailing_slash='keep')
+
+
+@pytest.mark.parametrize('url, allowed', [
+    ('https://pellecchia.it/it/x', True),
+    ('https://www.pellecchia.it/it/x', True),
+    ('https://img.cdn.pellecchia.it/a.jpg', True),
+    ('https://WWW.Pellecchia.IT:8443/it/x', True),
+    # Substrings of the domain are other sites
+    ('https://notpellecchia.it/it/x', False),
+    ('https://pellecchia.it.evil.com/it/x', False),
+    ('https://pellecchia.com/it/x', False),
+    ('https://facebook.com/pellecchia.it', False),
+])
+def test_is_allowed_matches_domains_and_subdomains(url, allowed):
+    assert UrlCanonicalizer(['Pellecchia.it']).is_allowed(url) is allowed
+
+
+def test_everything_is_allowed_without_allowed_domains():
+    assert UrlCanonicalizer().is_allowed('https://anything.example.org/')
+
+
+def test_site_rules_are_read_from_websites_json():
+    websites = BaseScraper._load_websites()
+    canonicalizer = UrlCanonicalizer.from_config(websites['goccia-men'], ['goccia.shop'])
+    url = 'https://goccia.shop/prodotto/borsa/?attribute_pa_colore=nero&utm_campaign=x'
+    assert canonicalizer.canonicalize(url) == 'https://goccia.shop/prodotto/borsa/'
+
+
+def test_spider_follows_one_canonical_url_per_page(make_spider):
+    spider = make_spider(GocciaMen)
+    listing = html_response('https://goccia.shop/brand-uomo/')
+    links = ['/prodotto/borsa/?attribute_pa_colore=nero', '/prodotto/borsa/?attribute_pa_colore=blu#top',
+             'https://GOCCIA.shop/prodotto/borsa/', 'https://www.instagram.com/goccia']
+    requests = list(spider.parse_urls(listing, links, spider.parse_product_page))
+    assert [request.url for request in requests] == ['https://goccia.shop/prodotto/borsa/']
+
+
+def test_next_page_link_is_canonicalized(make_spider):
+    spider = make_spider(PellecchiaSpider)
+    body = '<div class="paginazione"><ul><li><a href="?pag=2&amp;utm_source=mail#top">&gt;</a></li></ul></div>'
+    listing = html_response('https://www.pellecchia.it/it/brand-0', body,
+                            meta={'brand_url': 'https://www.pellecchia.it/it/tutti/designers'})
+    next_page, = [request for request in spider.parse_site_products_page(listing)
+                  if request.callback == spider.parse_site_products_page]
+    # Relative links resolve against the listing, not the site's base_url
+    assert next_page.url == 'https://www.pellecchia.it/it/brand-0?pag=2'
+
+
+def test_next_page_link_to_another_site_is_not_followed(make_spider):
+    spider = make_spider(PellecchiaSpider)
+    body = '<div class="paginazione"><ul><li><a href="https://ads.example.com/?pag=2">&gt;</a></li></ul></div>'
+    listing = html_response('https://www.pellecchia.it/it/brand-0', body,
+                            meta={'brand_url': 'https://www.pellecchia.it/it/tutti/designers'})
+    assert list(spider.parse_site_products_page(listing)) == []
+
+
+@pytest.mark.parametrize('url, params, result', [
+    ('https://shop.example.com/brand', '?resultsPerPage=10000', 'https://shop.example.com/brand?resultsPerPage=10000'),
+    ('https://shop.example.com/brand?resultsPerPage=24&page=2', '?resultsPerPage=10000',
+     'https://shop.example.com/brand?page=2&resultsPerPage=10000'),
+    ('https://shop.example.com/brand', '/?show=all', 'https://shop.example.com/brand/?show=all'),
+    ('https://shop.example.com/brand/', '/?show=all', 'https://shop.example.com/brand/?show=all'),
+])
+def test_add_query_params(url, params, result):
+    assert add_query_params(url, params) == result
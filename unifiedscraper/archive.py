@@ -0,0 +1,186 @@
+import gzip
+import hashlib
+import json
+import sqlite3
+from pathlib import Path
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from scrapy.http import Headers
+from scrapy.responsetypes import responsetypes
+from twisted.internet import defer
+
+
+class ResponseArchive:
+    """
+    Raw responses of a site's crawl, for replaying it without the network
+
+    Bodies are content-addressed: each distinct body is stored once, as one
+    gzip member appended to ``<name>.warc.gz``, a record with a short
+    WARC-like header (digest and length) before the body. The URL index
+    ``<name>.index.sqlite`` maps every request fingerprint to the URL, status
+    and headers of its response and to its body's place in the archive.
+    """
+
+    RECORD_VERSION = b'UARC/1.0'
+
+    def __init__(self, directory, name):
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        self.data_path = directory / f'{name}.warc.gz'
+        self.data = open(self.data_path, 'a+b')
+        self.index = sqlite3.connect(directory / f'{name}.index.sqlite')
+        self.index.execute('PRAGMA journal_mode=WAL')
+        self.index.execute('CREATE TABLE IF NOT EXISTS bodies '
+                           '(digest TEXT PRIMARY KEY, offset INTEGER NOT NULL, length INTEGER NOT NULL)')
+        self.index.execute('CREATE TABLE IF NOT EXISTS responses '
+                           '(fingerprint TEXT PRIMARY KEY, url TEXT NOT NULL, status INTEGER NOT NULL, '
+                           'headers TEXT NOT NULL, digest TEXT NOT NULL)')
+
+    def store(self, fingerprint, url, status, headers, body):
+        """
+        Archive a response, replacing the one stored for the same request
+
+        A 304 never replaces a stored 2xx response: a revalidated page (e.g.
+        recorded with INCREMENTAL_ENABLED) keeps the body it was archived with.
+
+        Args:
+            fingerprint (str): Request fingerprint (hex)
+            url (str): Response URL
+            status (int): HTTP status
+            headers: Response headers (scrapy Headers)
+            body (bytes): Raw response body
+
+        Returns:
+            bool: True if the body was new to the archive, None if the response was not stored
+        """
+        if status == 304:
+            stored = self.index.execute('SELECT status FROM responses WHERE fingerprint = ?', (fingerprint,)).fetchone()
+            if stored is not None and 200 <= stored[0] < 300:
+                return None
+        digest = hashlib.sha1(body).hexdigest()
+        new = self.index.execute('SELECT 1 FROM bodies WHERE digest = ?', (digest,)).fetchone() is None
+        if new:
+            record = b'%s\r\nDigest: sha1:%s\r\nContent-Length: %d\r\n\r\n%s' % (
+                self.RECORD_VERSION, digest.encode(), len(body), body)
+            member = gzip.compress(record)
+            self.data.seek(0, 2)
+            offset = self.data.tell()
+            self.data.write(member)
+            self.index.execute('INSERT INTO bodies (digest, offset, length) VALUES (?, ?, ?)',
+                               (digest, offset, len(member)))
+        header_lists = {name.decode('latin-1'): [value.decode('latin-1') for value in values]
+                        for name, values in headers.items()}
+        self.index.execute('INSERT OR REPLACE INTO responses (fingerprint, url, status, headers, digest) '
+                           'VALUES (?, ?, ?, ?, ?)', (fingerprint, url, status, json.dumps(header_lists), digest))
+        return new
+
+    def lookup(self, fingerprint):
+        """
+        Archived response of a request
+
+        Args:
+            fingerprint (str): Request fingerprint (hex)
+
+        Returns:
+            tuple: (url, status, headers dict, body), or None if the request was not recorded
+        """
+        row = self.index.execute(
+            'SELECT responses.url, responses.status, responses.headers, bodies.offset, bodies.length '
+            'FROM responses JOIN bodies ON bodies.digest = responses.digest '
+            'WHERE responses.fingerprint = ?', (fingerprint,)).fetchone()
+        if row is None:
+            return None
+        url, status, headers, offset, length = row
+        self.data.seek(offset)
+        record = gzip.decompress(self.data.read(length))
+        body = record.split(b'\r\n\r\n', 1)[1]
+        return url, status, json.loads(headers), body
+
+    def __len__(self):
+        return self.index.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+    def close(self):
+        self.index.commit()
+        self.index.close()
+        self.data.close()
+
+
+class ArchiveRecorderMiddleware:
+    """
+    Store every downloaded response in the spider's ResponseArchive
+
+    Enabled with ARCHIVE_MODE = 'record'; sits next to the downloader, so
+    the archive holds responses as they came off the wire (redirects,
+    compressed bodies, errors) and replay goes through the same middlewares.
+    """
+
+    def __init__(self, crawler):
+        if crawler.settings.get('ARCHIVE_MODE') != 'record':
+            raise NotConfigured
+        self.crawler = crawler
+        self.directory = crawler.settings.get('ARCHIVE_DIR', 'archive')
+        self.archive = None
+        crawler.signals.connect(self.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(self.spider_closed, signal=signals.spider_closed)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler)
+
+    def spider_opened(self, spider):
+        self.archive = ResponseArchive(self.directory, spider.name)
+
+    def spider_closed(self, spider):
+        spider.logger.info(f"Archived {len(self.archive)} responses in {self.archive.data_path}")
+        self.archive.close()
+
+    def process_response(self, request, response, spider):
+        if 'archive' not in response.flags:
+            fingerprint = self.crawler.request_fingerprinter.fingerprint(request).hex()
+            new = self.archive.store(fingerprint, response.url, response.status, response.headers, response.body)
+            if new is None:
+                self.crawler.stats.inc_value('archive/kept', spider=spider)
+            else:
+                self.crawler.stats.inc_value('archive/stored' if new else 'archive/deduplicated', spider=spider)
+        return response
+
+
+class ArchiveDownloadHandler:
+    """
+    Download handler serving a crawl from the spider's ResponseArchive
+
+    Installed for http and https by the spiders when ARCHIVE_MODE = 'replay'.
+    Requests that were not recorded get an empty 404, counted as archive/miss.
+    """
+
+    lazy = False
+
+    def __init__(self, crawler):
+        self.crawler = crawler
+        self.directory = crawler.settings.get('ARCHIVE_DIR', 'archive')
+        self.archives = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler)
+
+    def download_request(self, request, spider):
+        if spider.name not in self.archives:
+            self.archives[spider.name] = ResponseArchive(self.directory, spider.name)
+        fingerprint = self.crawler.request_fingerprinter.fingerprint(request).hex()
+        archived = self.archives[spider.name].lookup(fingerprint)
+        if archived is None:
+            self.crawler.stats.inc_value('archive/miss', spider=spider)
+            return defer.succeed(responsetypes.from_args(url=request.url)(
+                url=request.url, status=404, body=b'', flags=['archive'], request=request))
+        self.crawler.stats.inc_value('archive/hit', spider=spider)
+        url, status, headers, body = archived
+        headers = Headers(headers)
+        respcls = responsetypes.from_args(headers=headers, url=url, body=body)
+        return defer.succeed(respcls(url=url, status=status, headers=headers, body=body,
+                                     flags=['archive'], request=request))
+
+    def close(self):
+        for archive in self.archives.values():
+            archive.close()
@@ -0,0 +1,115 @@
+"""Memory and lookup throughput of the duplicate request filters.
+
+Compares the Python set of hex fingerprints of Scrapy's RFPDupeFilter with
+CompactDupeFilter's stores: the scalable Bloom filter and the exact SQLite set.
+Each store is filled with N request fingerprints, then probed with fingerprints
+it holds and fingerprints it never saw (which also measures the false positive
+rate). Every measurement runs in a fresh process, so the memory column is the
+resident memory the store added, page cache of the mmap'd Bloom files included.
+
+    python -m unifiedscraper.bench.dupefilter --sizes 1000000 10000000
+"""
+import argparse
+import hashlib
+import multiprocessing
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+from unifiedscraper.dupefilter import FingerprintSet, ScalableBloomFilter
+
+CHUNK = 100_000
+
+
+def fingerprints(start, count):
+    """Request-like fingerprints: SHA1 digests, as Scrapy's fingerprinter returns them"""
+    return [hashlib.sha1(i.to_bytes(8, 'little')).digest() for i in range(start, start + count)]
+
+
+def rss_bytes():
+    """Resident memory of this process (Linux)"""
+    with open('/proc/self/statm') as file:
+        return int(file.read().split()[1]) * 4096
+
+
+class HexSet(set):
+    """The store of RFPDupeFilter: hex strings in a set"""
+
+    def add(self, item):
+        item = item.hex()
+        present = item in self
+        super().add(item)
+        return present
+
+    def __contains__(self, item):
+        return super().__contains__(item.hex() if isinstance(item, bytes) else item)
+
+    def close(self):
+        pass
+
+
+def bench_store(mode, size, probes, error_rate, directory):
+    """
+    Fill one store with ``size`` fingerprints and probe it
+
+    Returns:
+        dict: Memory added, add/lookup throughput and false positive rate
+    """
+    before = rss_bytes()
+    if mode == 'set':
+        store = HexSet()
+    elif mode == 'bloom':
+        store = ScalableBloomFilter(Path(directory, 'requests.bloom'), error_rate=error_rate)
+    else:
+        store = FingerprintSet(Path(directory, 'requests.seen.sqlite'))
+
+    add_time = 0
+    for start in range(0, size, CHUNK):
+        chunk = fingerprints(start, min(CHUNK, size - start))
+        started = perf_counter()
+        for fingerprint in chunk:
+            store.add(fingerprint)
+        add_time += perf_counter() - started
+    memory = rss_bytes() - before
+
+    seen = fingerprints(max(0, size - probes), probes)
+    unseen = fingerprints(size, probes)
+    started = perf_counter()
+    hits = sum(fingerprint in store for fingerprint in seen)
+    seen_time = perf_counter() - started
+    started = perf_counter()
+    false_positives = sum(fingerprint in store for fingerprint in unseen)
+    unseen_time = perf_counter() - started
+    store.close()
+
+    assert hits == probes, f'{mode} lost fingerprints'
+    return {
+        'memory_mb': memory / 2 ** 20,
+        'adds_per_s': size / add_time,
+        'lookups_per_s': 2 * probes / (seen_time + unseen_time),
+        'false_positive_rate': false_positives / probes,
+    }
+
+
+def run_isolated(mode, size, probes, error_rate):
+    """Run bench_store in a fresh process"""
+    context = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as directory, context.Pool(1) as pool:
+        return pool.apply(bench_store, (mode, size, probes, error_rate, directory))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark duplicate request filter stores')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000_000, 10_000_000],
+                        help='Fingerprints added to each store')
+    parser.add_argument('--modes', nargs='+', default=['set', 'bloom', 'exact'], choices=['set', 'bloom', 'exact'])
+    parser.add_argument('--probes', type=int, default=200_000, help='Lookups of seen and of unseen fingerprints')
+    parser.add_argument('--error_rate', type=float, default=0.0001, help='DUPEFILTER_ERROR_RATE of the Bloom filter')
+    args = parser.parse_args()
+
+    print(f"{'store':<6} {'fingerprints':>12} {'memory MB':>10} {'adds/s':>10} {'lookups/s':>10} {'false pos.':>10}")
+    for size in args.sizes:
+        for mode in args.modes:
+            result = run_isolated(mode, size, args.probes, args.error_rate)
+            print(f"{mode:<6} {size:>12,} {result['memory_mb']:>10.1f} {result['adds_per_s']:>10.0f} "
+                  f"{result['lookups_per_s']:>10.0f} {result['false_positive_rate']:>10.6f}")
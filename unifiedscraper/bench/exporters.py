@@ -0,0 +1,128 @@
+"""Compare the Arrow parquet exporter with the zuinnote (pandas/fastparquet) one.
+
+Each exporter runs in a fresh process so peak RSS is not shared between runs.
+
+    python -m unifiedscraper.bench.exporters --items 20000
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import resource
+import tempfile
+from time import perf_counter
+
+from unifiedscraper.settings import FEEDS
+
+# Options the project used with the zuinnote exporter
+ZUINNOTE_OPTIONS = {
+    'compression': 'GZIP',
+    'times': 'int64',
+    'hasnulls': True,
+    'convertallstrings': False,
+    'writeindex': False,
+    'objectencoding': 'infer',
+    'rowgroupoffset': 8 * 1024 * 1024,
+    'items_rowgroup': 1000,
+}
+
+
+def make_items(count, seed=0):
+    """Build product dicts shaped like the spiders' output"""
+    rng = random.Random(seed)
+    brands = ['Gucci', 'Prada', 'Samsonite', 'Nike', 'Moncler', 'Valentino', 'Stone Island']
+    items = []
+    for i in range(count):
+        price = round(rng.uniform(20, 2000), 2)
+        items.append({
+            'Brand': rng.choice(brands),
+            'ProductName': f"Product {i} {rng.choice(brands)} leather bag",
+            'ProductImage': f"https://cdn.example.com/images/{i}.jpg",
+            'ProductColor': rng.choice(['black', 'red', 'blue', None]),
+            'CurrentPrice': price,
+            'OriginalPrice': round(price * rng.choice([1, 1, 1.3]), 2),
+            'PriceCurrency': 'EUR',
+            'Category': rng.choice(['Bags', 'Shoes', 'Jackets']),
+            'sku': f"SKU-{i:08d}",
+            'AvailableSizes': rng.sample(['XS', 'S', 'M', 'L', 'XL', '40', '41', '42'], rng.randint(1, 6)),
+            'StockAvailability': 'in stock',
+            'ProductURL': f"https://shop.example.com/p/{i}",
+        })
+    return items
+
+
+def _run(name, item_count, queue):
+    from unifiedscraper.items import ProductItem
+
+    if name == 'arrow':
+        from unifiedscraper.exporters import ArrowParquetItemExporter
+        exporter_cls = ArrowParquetItemExporter
+        options = dict(FEEDS[next(iter(FEEDS))]['item_export_kwargs'])
+    else:
+        from zuinnote.scrapy.contrib.bigexporters import ParquetItemExporter
+        exporter_cls = ParquetItemExporter
+        options = dict(ZUINNOTE_OPTIONS)
+
+    items = make_items(item_count)
+    if name == 'arrow':
+        # What the exporter receives after ProductItemPipeline
+        items = [ProductItem.from_dict(item) for item in items]
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'out.parquet')
+        started = perf_counter()
+        with open(path, 'ab') as file:
+            exporter = exporter_cls(file, **options)
+            exporter.start_exporting()
+            for item in items:
+                exporter.export_item(item)
+            exporter.finish_exporting()
+        elapsed = perf_counter() - started
+        size = os.path.getsize(path)
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    queue.put({
+        'exporter': name,
+        'items_per_sec': item_count / elapsed,
+        'seconds': elapsed,
+        'peak_rss_mb': rss_after / 1024,
+        'rss_growth_mb': (rss_after - rss_before) / 1024,
+        'file_mb': size / 1024 / 1024,
+    })
+
+
+def run_benchmark(item_count, exporters=('arrow', 'zuinnote')):
+    """
+    Run every exporter on the same items in its own process
+
+    Args:
+        item_count (int): Number of items to export
+        exporters (tuple): Exporters to run ('arrow', 'zuinnote')
+
+    Returns:
+        list: One result dict per exporter
+    """
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for name in exporters:
+        queue = context.Queue()
+        process = context.Process(target=_run, args=(name, item_count, queue))
+        process.start()
+        results.append(queue.get())
+        process.join()
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark parquet item exporters')
+    parser.add_argument('--items', type=int, default=20000, help='Items to export')
+    parser.add_argument('--exporters', nargs='+', default=['arrow', 'zuinnote'],
+                        choices=['arrow', 'zuinnote'])
+    args = parser.parse_args()
+
+    print(f"{'exporter':<10} {'items/s':>10} {'seconds':>8} {'peak RSS MB':>12} "
+          f"{'RSS growth MB':>14} {'file MB':>8}")
+    for result in run_benchmark(args.items, tuple(args.exporters)):
+        print(f"{result['exporter']:<10} {result['items_per_sec']:>10.0f} {result['seconds']:>8.2f} "
+              f"{result['peak_rss_mb']:>12.1f} {result['rss_growth_mb']:>14.1f} {result['file_mb']:>8.2f}")
@@ -0,0 +1,121 @@
+"""Crawl throughput of N workers sharing one frontier, against a local mock shop.
+
+The shop is bench/mockshop.py's aiohttp shop in pellecchia's markup: brands,
+paginated brand listings and product pages, answered after ``--latency``
+seconds (+/- 50%) like a remote site would. Every worker is a separate process
+running FrontierScheduler on the same frontier file; the shop counts how often
+each page was served, so the run also checks that no page is crawled twice.
+With ``--kill_after`` one worker is killed mid-crawl and the run checks its
+leased pages were crawled anyway (the ones it had in flight are then crawled
+twice).
+
+Every worker gets few concurrent requests against a slow shop, like a polite
+crawl of a real site, so throughput is bounded by the site and not by CPU.
+
+    python -m unifiedscraper.bench.frontier --workers 1 2 4 --brands 8 --products 75
+"""
+import argparse
+import multiprocessing
+import tempfile
+from time import perf_counter, sleep
+
+import scrapy
+
+from unifiedscraper.bench.mockshop import Catalog, MockShop
+
+PRODUCTS_PER_PAGE = 20
+
+
+class MockShopSpider(scrapy.Spider):
+    """Walks the shop's brands, listings (next link only) and product pages"""
+    name = 'mockshop'
+
+    def __init__(self, base_url, **kwargs):
+        super().__init__(**kwargs)
+        self.start_urls = [f'{base_url}it/tutti/designers']
+
+    def parse(self, response):
+        for href in response.css('div.elenco a::attr(href)').getall():
+            yield response.follow(href, callback=self.parse_listing)
+
+    def parse_listing(self, response):
+        for href in response.css('a.prod::attr(href)').getall():
+            yield response.follow(href, callback=self.parse_product)
+        next_page = response.css('div.paginazione li:not(.disabled):last-child a::attr(href)').get()
+        if next_page:
+            yield response.follow(next_page, callback=self.parse_listing)
+
+    def parse_product(self, response):
+        yield {'ProductName': response.css('h2::text').get(), 'ProductURL': response.url}
+
+
+def crawl_worker(base_url, frontier_dir, concurrency, lease_seconds):
+    """Run one worker process: a whole Scrapy crawl on the shared frontier"""
+    from scrapy.crawler import CrawlerProcess
+
+    process = CrawlerProcess({
+        'SCHEDULER': 'unifiedscraper.frontier.FrontierScheduler',
+        'FRONTIER_DIR': frontier_dir,
+        'FRONTIER_LEASE_SECONDS': lease_seconds,
+        'CONCURRENT_REQUESTS': concurrency,
+        'CONCURRENT_REQUESTS_PER_DOMAIN': concurrency,
+        'LOG_LEVEL': 'ERROR',
+        'TELNETCONSOLE_ENABLED': False,
+        'ROBOTSTXT_OBEY': False,
+    })
+    process.crawl(MockShopSpider, base_url=base_url)
+    process.start()
+
+
+def run_workers(shop, workers, concurrency, lease_seconds, kill_after=None):
+    """
+    Crawl the whole shop with ``workers`` processes on a fresh frontier
+
+    Returns:
+        float: Seconds until every worker finished
+    """
+    context = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as frontier_dir:
+        processes = [context.Process(target=crawl_worker,
+                                     args=(shop.base_url, frontier_dir, concurrency, lease_seconds))
+                     for _ in range(workers)]
+        started = perf_counter()
+        for process in processes:
+            process.start()
+        if kill_after:
+            sleep(kill_after)
+            processes[0].kill()
+        for process in processes:
+            process.join()
+        return perf_counter() - started
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark crawling one site with several workers')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4], help='Worker counts to compare')
+    parser.add_argument('--brands', type=int, default=8, help='Brands of the mock shop')
+    parser.add_argument('--products', type=int, default=75, help='Products per brand')
+    parser.add_argument('--latency', type=float, default=0.2, help='Seconds the shop takes per response')
+    parser.add_argument('--concurrency', type=int, default=2, help='CONCURRENT_REQUESTS of every worker')
+    parser.add_argument('--lease_seconds', type=float, default=300, help='FRONTIER_LEASE_SECONDS')
+    parser.add_argument('--kill_after', type=float, default=None,
+                        help='Kill the first worker after this many seconds (use a short --lease_seconds)')
+    args = parser.parse_args()
+
+    catalog = Catalog(args.brands, args.products, page_size=PRODUCTS_PER_PAGE)
+    shop = MockShop('pellecchia', catalog, latency=args.latency).start()
+    product_pages = [f'/it/{catalog.slug(brand)}/{number}.html'
+                     for brand in range(catalog.brands) for number in range(catalog.products)]
+
+    print(f"{'workers':>7} {'seconds':>8} {'pages/s':>8} {'speedup':>8} {'missed':>7} {'twice':>6}")
+    baseline = None
+    for workers in args.workers:
+        shop.hits.clear()
+        seconds = run_workers(shop, workers, args.concurrency, args.lease_seconds, args.kill_after)
+        pages = sum(shop.hits.values())
+        missed = sum(1 for path in product_pages if not shop.hits[path])
+        twice = sum(1 for count in shop.hits.values() if count > 1)
+        baseline = baseline or pages / seconds
+        print(f"{workers:>7} {seconds:>8.2f} {pages / seconds:>8.1f} {pages / seconds / baseline:>7.2f}x "
+              f"{missed:>7} {twice:>6}")
+    shop.stop()
@@ -0,0 +1,433 @@
+"""End-to-end load test of the real spiders against a local mock shop.
+
+The shop is an aiohttp server generating a deterministic catalog in the markup
+of one of our sites, so the site's own spider and schema crawl it unchanged:
+a brand list, paginated brand listings and product pages. Every response
+waits ``--latency`` seconds (+/- 50%), ``--error_rate`` of them fail with a
+500, and requests beyond ``--max_inflight`` at once get a 429 with
+Retry-After, like a shop rate limiting us.
+
+For each CONCURRENT_REQUESTS value the spider crawls the whole catalog in a
+fresh process (retries on, no download delay, no incremental state) and the
+run reports end-to-end items/s and the speedup over the first value:
+
+    python -m unifiedscraper.bench.mockshop --site pellecchia --concurrency 1 4 16 32
+
+The same shop can be crawled by hand:
+
+    python -m unifiedscraper.bench.mockshop --site wardow --serve 8080
+    scrapy crawl wardow -a base_url=http://127.0.0.1:8080/it/
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import random
+import tempfile
+import threading
+from collections import Counter
+from time import sleep
+
+from aiohttp import web
+
+# Path of each site's websites.json base_url, which its brands_url is relative to.
+# lelefantino's pages (PAGES) are only crawled by the tests, with their own site
+# config, as it has no websites.json entry.
+SITES = {
+    'pellecchia': {'base_path': '/'},
+    'wardow': {'base_path': '/it/'},
+}
+
+
+class Catalog:
+    """Deterministic catalog: ``brands`` brands of ``products`` products each"""
+
+    def __init__(self, brands=20, products=100, page_size=24, seed=0):
+        self.brands = brands
+        self.products = products
+        self.page_size = page_size
+        self.seed = seed
+
+    @property
+    def pages(self):
+        """Listing pages of a brand"""
+        return -(-self.products // self.page_size)
+
+    def slug(self, brand):
+        return f'brand-{brand}'
+
+    def brand_of(self, slug):
+        """Brand number of a slug, or None if there is no such brand"""
+        number = slug[len('brand-'):] if slug.startswith('brand-') else ''
+        return int(number) if number.isdigit() and int(number) < self.brands else None
+
+    def listing(self, brand, page):
+        """Product numbers of a listing page (1-based)"""
+        start = (page - 1) * self.page_size
+        return range(start, min(start + self.page_size, self.products))
+
+    def product(self, brand, number):
+        """Fields of one product"""
+        rng = random.Random(f'{self.seed}-{brand}-{number}')
+        price = rng.randint(30, 900)
+        discounted = rng.random() < 0.3
+        return {
+            'brand': f'Brand {brand}',
+            'name': f'Product {brand}-{number}',
+            'sku': f'SKU{brand:03d}{number:05d}',
+            'price': round(price * 0.7, 2) if discounted else price,
+            'original_price': price,
+            'color': rng.choice(['Nero', 'Blu', 'Rosso', 'Beige', 'Verde']),
+            'category': rng.choice(['Borse', 'Scarpe', 'Zaini', 'Portafogli']),
+            'sizes': rng.sample(['38', '39', '40', '41', '42', '43', '44'], rng.randint(1, 5)),
+            'description': ' '.join(rng.choice(['Pelle', 'morbida', 'cuciture', 'fodera', 'tasca', 'zip'])
+                                    for _ in range(40)),
+        }
+
+
+def euros(value, locale='it'):
+    """Price text as the site's price_locale writes it"""
+    if locale == 'en':
+        return f'€ {value:,.2f}'
+    return f'{value:,.2f} €'.replace(',', 'X').replace('.', ',').replace('X', '.')
+
+
+class PellecchiaPages:
+    """Pages in pellecchia's markup (configs/schemas/pellecchia_schema.json)"""
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+
+    def brands(self):
+        links = ''.join(f'<li><a href="/it/{self.catalog.slug(brand)}">Brand {brand}</a></li>'
+                        for brand in range(self.catalog.brands))
+        return f'<div class="elenco"><div class="col-sm-12"><div class="cols"><ul>{links}</ul></div></div></div>'
+
+    def listing(self, brand, page):
+        slug = self.catalog.slug(brand)
+        tiles = ''.join(
+            f'<div class="item"><div class="frame"><div class="cnt">'
+            f'<a class="prod" href="/it/{slug}/{number}.html">Product {brand}-{number}</a></div></div></div>'
+            for number in self.catalog.listing(brand, page))
+        pages = ''.join(f'<li><a href="/it/{slug}?pag={number}">{number}</a></li>'
+                        for number in range(1, self.catalog.pages + 1))
+        last = self.catalog.pages
+        next_link = (f'<li><a href="/it/{slug}?pag={page + 1}">&gt;</a></li>' if page < last
+                     else '<li class="disabled"><a href="#">&gt;</a></li>')
+        return (f'<div class="container-fluid">{tiles}</div>'
+                f'<div class="paginazione"><ul>{pages}{next_link}</ul></div>')
+
+    def product(self, brand, number):
+        product = self.catalog.product(brand, number)
+        sizes = ''.join(f'<a href="#">{size}</a>' for size in product['sizes'])
+        old_price = (f'<del>{euros(product["original_price"], "en")}</del>'
+                     if product['price'] != product['original_price'] else '')
+        return (f'<div id="bred"><a href="/it/uomo">Uomo</a> &gt; <a href="/it/accessori">Accessori</a> &gt; '
+                f'<a href="/it/c">{product["category"]}</a></div>'
+                f'<div class="imgb"><a data-fancybox="gallery" href="/img/{product["sku"]}.jpg">img</a></div>'
+                f'<div class="txt"><h1> {product["brand"]} </h1><h2>{product["name"]}</h2>'
+                f'<h6>SKU: {product["sku"]}-01</h6></div>'
+                f'<h3 class="price">{old_price}<em>{euros(product["price"], "en")}</em></h3>'
+                f'<div id="cart_section"><div id="taglia_wrap">{sizes}</div></div>'
+                f'<div id="descrizione"><p>{product["description"]}</p><p>{product["color"]}</p></div>')
+
+    def routes(self):
+        return [('/it/tutti/designers', 'brands'), ('/it/{slug}', 'listing'), ('/it/{slug}/{number}.html', 'product')]
+
+
+class WardowPages:
+    """Pages in wardow's markup (configs/schemas/wardow_schema.json), with JSON-LD"""
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+
+    def brands(self):
+        links = ''.join(f'<li><a href="/it/{self.catalog.slug(brand)}/">Brand {brand}</a></li>'
+                        for brand in range(self.catalog.brands))
+        return f'<div class="brand-group"><ul>{links}</ul></div>'
+
+    def listing(self, brand, page):
+        slug = self.catalog.slug(brand)
+        tiles = ''.join(
+            f'<li data-id="{number}"><a class="product-tile__img" href="/it/{slug}/{number}.html">'
+            f'<img src="/img/{number}.jpg"></a></li>'
+            for number in self.catalog.listing(brand, page))
+        next_button = (f'<button class="button btn-subtle next" value="/it/{slug}/?p={page + 1}">Avanti</button>'
+                       if page < self.catalog.pages else '')
+        return f'<div class="category-products"><ul class="products-grid">{tiles}</ul></div>{next_button}'
+
+    def product(self, brand, number):
+        product = self.catalog.product(brand, number)
+        structured = json.dumps({
+            '@context': 'https://schema.org', '@type': 'Product', 'name': product['name'], 'sku': product['sku'],
+            'brand': {'@type': 'Brand', 'name': product['brand']}, 'color': product['color'],
+            'offers': {'@type': 'Offer', 'price': product['price'], 'priceCurrency': 'EUR',
+                       'availability': 'https://schema.org/InStock'},
+        })
+        if product['price'] != product['original_price']:
+            price = (f'<p class="old-price"><span class="price">{euros(product["original_price"])}</span></p>'
+                     f'<p class="special-price"><span class="price"><meta itemprop="price" content="{product["price"]}">'
+                     f'{euros(product["price"])}</span></p>')
+        else:
+            price = (f'<span class="regular-price"><meta itemprop="price" content="{product["price"]}">'
+                     f'{euros(product["price"])}</span>')
+        return (f'<script type="application/ld+json">{structured}</script>'
+                f'<div class="breadcrumbs"><ul><li><a href="/it/">Home</a></li>'
+                f'<li><a href="/it/c"> {product["category"]} </a></li></ul></div>'
+                f'<div class="product-essential"><img class="gallery-image" src="/img/{product["sku"]}.jpg">'
+                f'<div class="product-shop"><a class="product-manufacturer"><span itemprop="brand"> {product["brand"]} </span></a>'
+                f'<span class="product-name">{product["name"]}</span>'
+                f'<div class="colors"><p class="headline"><span>{product["color"]}</span></p></div>'
+                f'<div class="price-info"><meta itemprop="priceCurrency" content="EUR">{price}</div>'
+                f'<p class="availability"><span>Disponibile</span></p></div></div>'
+                f'<div class="description-general"><ul><li class="sku">Codice <span itemprop="sku">{product["sku"]}</span>'
+                f' {product["sku"]}-W</li></ul><p>{product["description"]}</p></div>')
+
+    def routes(self):
+        return [('/it/marche/', 'brands'), ('/it/{slug}/', 'listing'), ('/it/{slug}/{number}.html', 'product')]
+
+
+class LelefantinoPages:
+    """Pages in lelefantino's markup (configs/schemas/lelefantino_schema.json), with "Load More" listings
+
+    Page n of a listing is ``?offset=`` (n - 1) * page_size; pages past the
+    end are empty, and only the first page shows the product count.
+    """
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+
+    def brands(self):
+        links = ''.join(f'<li><a href="/collections/{self.catalog.slug(brand)}">Brand {brand}</a></li>'
+                        for brand in range(self.catalog.brands))
+        return f'<ul class="li-brands">{links}</ul>'
+
+    def listing(self, brand, page):
+        slug = self.catalog.slug(brand)
+        tiles = ''.join(
+            f'<div class="image-cont"><a class="product-link" href="/products/{slug}/{number}">'
+            f'<img src="/img/{number}.jpg"></a></div>'
+            for number in self.catalog.listing(brand, page))
+        count = f'<span class="usf-results-count">{self.catalog.products} prodotti</span>' if page == 1 else ''
+        load_more = '<button class="usf-load-more">Carica altri</button>' if page < self.catalog.pages else ''
+        return f'{count}<div class="product-list">{tiles}</div>{load_more}'
+
+    def product(self, brand, number):
+        product = self.catalog.product(brand, number)
+        was_price = (f'<span class="was-price">{euros(product["original_price"])}</span>'
+                     if product['price'] != product['original_price'] else '')
+        sizes = ''.join(f'<li><span>{size}</span></li>' for size in product['sizes'])
+        return (f'<div class="vendor"><a href="/collections/{self.catalog.slug(brand)}">{product["brand"]}</a></div>'
+                f'<h1 class="title">{product["name"]}</h1>'
+                f'<div class="price-area"><span class="current-price">{euros(product["price"])}</span>{was_price}</div>'
+                f'<ul class="clickyboxes">{sizes}</ul>'
+                f'<div class="description">{product["description"]}</div>')
+
+    def routes(self):
+        return [('/pages/brands', 'brands'), ('/collections/{slug}', 'listing'),
+                ('/products/{slug}/{number}', 'product')]
+
+
+PAGES = {'pellecchia': PellecchiaPages, 'wardow': WardowPages, 'lelefantino': LelefantinoPages}
+
+
+class MockShop:
+    """
+    aiohttp shop serving a Catalog in a site's markup, from a background thread
+
+    Args:
+        site (str): Markup to serve, a key of SITES
+        catalog (Catalog): Products to serve
+        latency (float): Mean seconds before each response (+/- 50%)
+        error_rate (float): Share of requests failing with a 500
+        max_inflight (int): Requests served at once before answering 429 (0: no limit)
+        seed (int): Seed of the latency and error draws
+
+    ``counts`` totals the requests, errors, 429s and 404s served; ``hits``
+    counts the requests of every path (with its query string), to check
+    which pages a crawl fetched and how often.
+    """
+
+    def __init__(self, site, catalog, latency=0.05, error_rate=0.0, max_inflight=0, seed=0):
+        self.site = site
+        self.catalog = catalog
+        self.pages = PAGES[site](catalog)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.max_inflight = max_inflight
+        self.random = random.Random(seed)
+        self.inflight = 0
+        self.counts = {'requests': 0, 'errors': 0, 'throttled': 0, 'not_found': 0}
+        self.hits = Counter()
+        self.port = None
+        self._loop = None
+        self._runner = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        """base_url spider argument pointing the site's spider at the shop"""
+        return f'http://127.0.0.1:{self.port}{SITES.get(self.site, {}).get("base_path", "/")}'
+
+    def _page(self, handler, request):
+        if handler == 'brands':
+            return self.pages.brands()
+        brand = self.catalog.brand_of(request.match_info['slug'])
+        if brand is None:
+            return None
+        if handler == 'listing':
+            if 'offset' in request.query:
+                # "Load More" pages past the end of a listing are empty, not missing
+                return self.pages.listing(brand, int(request.query['offset']) // self.catalog.page_size + 1)
+            page = int(request.query.get('pag') or request.query.get('p') or 1)
+            return self.pages.listing(brand, page) if 1 <= page <= self.catalog.pages else None
+        number = int(request.match_info['number'])
+        return self.pages.product(brand, number) if number < self.catalog.products else None
+
+    def _view(self, handler):
+        async def view(request):
+            self.counts['requests'] += 1
+            self.hits[request.path_qs] += 1
+            self.inflight += 1
+            try:
+                if self.max_inflight and self.inflight > self.max_inflight:
+                    self.counts['throttled'] += 1
+                    return web.Response(status=429, headers={'Retry-After': '1'})
+                await asyncio.sleep(self.latency * self.random.uniform(0.5, 1.5))
+                if self.random.random() < self.error_rate:
+                    self.counts['errors'] += 1
+                    return web.Response(status=500, text='Internal Server Error')
+                html = self._page(handler, request)
+                if html is None:
+                    self.counts['not_found'] += 1
+                    raise web.HTTPNotFound()
+                return web.Response(text=f'<html><body>{html}</body></html>', content_type='text/html')
+            finally:
+                self.inflight -= 1
+        return view
+
+    async def _start(self, port):
+        app = web.Application()
+        for path, handler in self.pages.routes():
+            app.router.add_get(path, self._view(handler))
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, '127.0.0.1', port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+
+    def start(self, port=0):
+        """Serve in a background thread; return once the shop is listening"""
+        self._loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def serve():
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self._start(port))
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=serve, daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+
+def crawl_shop(website, base_url, concurrency, adaptive=False):
+    """
+    Crawl the mock shop with a site's spider in this process
+
+    Returns:
+        dict: Items, pages, elapsed seconds and retries of the crawl
+    """
+    from scrapy.crawler import CrawlerProcess
+    from scrapy.utils.project import get_project_settings
+
+    settings = get_project_settings()
+    with tempfile.TemporaryDirectory() as job_dir:
+        for name, value in {
+            'CONCURRENT_REQUESTS': concurrency,
+            'CONCURRENT_REQUESTS_PER_DOMAIN': concurrency,
+            'DOWNLOAD_DELAY': 0,
+            'ADAPTIVE_CONCURRENCY_ENABLED': adaptive,
+            'ADAPTIVE_STATE_DIR': job_dir,
+            'JOBDIR': job_dir,
+            'INCREMENTAL_ENABLED': False,
+            'CLOSESPIDER_ITEMCOUNT': 0,
+            'CLOSESPIDER_TIMEOUT': 0,
+            'FEEDS': {},
+            'LOG_LEVEL': 'WARNING',
+            'TELNETCONSOLE_ENABLED': False,
+        }.items():
+            settings.set(name, value, priority='cmdline')
+
+        process = CrawlerProcess(settings)
+        crawler = process.create_crawler(website)
+        process.crawl(crawler, base_url=base_url)
+        # Scrapy's SIGTERM handler would keep the pool from terminating this worker
+        process.start(install_signal_handlers=False)
+
+    stats = crawler.stats.get_stats()
+    return {
+        'items': stats.get('item_scraped_count', 0),
+        'pages': stats.get('response_received_count', 0),
+        'seconds': stats.get('elapsed_time_seconds', 0.0),
+        'retries': stats.get('retry/count', 0),
+    }
+
+
+def run_isolated(website, base_url, concurrency, adaptive=False):
+    """Run crawl_shop in a fresh process"""
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(1) as pool:
+        return pool.apply(crawl_shop, (website, base_url, concurrency, adaptive))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load test a spider against a local mock shop')
+    parser.add_argument('--site', default='pellecchia', choices=sorted(SITES), help='Markup and spider to test')
+    parser.add_argument('--brands', type=int, default=10)
+    parser.add_argument('--products', type=int, default=100, help='Products per brand')
+    parser.add_argument('--page_size', type=int, default=24, help='Products per listing page')
+    parser.add_argument('--latency', type=float, default=0.05, help='Mean seconds per response')
+    parser.add_argument('--error_rate', type=float, default=0.0, help='Share of 500 responses')
+    parser.add_argument('--max_inflight', type=int, default=0, help='Concurrent requests before 429 (0: no limit)')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16, 32],
+                        help='CONCURRENT_REQUESTS values to test')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='Keep the adaptive concurrency controller on (CONCURRENT_REQUESTS is then a cap)')
+    parser.add_argument('--serve', type=int, metavar='PORT', help='Only serve the shop on PORT until interrupted')
+    args = parser.parse_args()
+
+    catalog = Catalog(args.brands, args.products, args.page_size)
+    shop = MockShop(args.site, catalog, args.latency, args.error_rate, args.max_inflight)
+    shop.start(args.serve or 0)
+    if args.serve:
+        print(f"Serving {args.site} at {shop.base_url} (Ctrl+C to stop)")
+        try:
+            while True:
+                sleep(3600)
+        except KeyboardInterrupt:
+            shop.stop()
+        raise SystemExit
+
+    total = catalog.brands * catalog.products
+    print(f"{args.site}: {total} products, {catalog.brands * catalog.pages} listing pages, "
+          f"latency {args.latency}s, error rate {args.error_rate}, max in flight {args.max_inflight or '-'}")
+    print(f"{'concurrency':>11} {'seconds':>8} {'items':>6} {'items/s':>8} {'speedup':>8} {'retries':>8} "
+          f"{'429s':>6} {'500s':>6}")
+    baseline = None
+    for concurrency in args.concurrency:
+        before = dict(shop.counts)
+        result = run_isolated(args.site, shop.base_url, concurrency, args.adaptive)
+        rate = result['items'] / result['seconds'] if result['seconds'] else 0.0
+        baseline = baseline or rate
+        print(f"{concurrency:>11} {result['seconds']:>8.2f} {result['items']:>6} {rate:>8.1f} "
+              f"{rate / baseline if baseline else 0:>7.2f}x {result['retries']:>8} "
+              f"{shop.counts['throttled'] - before['throttled']:>6} {shop.counts['errors'] - before['errors']:>6}")
+    shop.stop()
@@ -0,0 +1,55 @@
+"""Parse a column of price strings one by one (parse_price) vs once per distinct string (parse_price_array).
+
+Prices are formatted the ways our sites show them: Italian '1.234,50 €',
+English '€1,234.50', bare '1234.50' and '75,5', drawn from a catalogue of
+``--distinct`` amounts as a feed repeats its prices. Both paths must agree.
+
+    python -m unifiedscraper.bench.prices --rows 500000 --distinct 5000
+"""
+import argparse
+import random
+from time import perf_counter
+
+import pyarrow as pa
+
+from unifiedscraper.prices import parse_price, parse_price_array
+
+
+def make_prices(count, distinct=5000, seed=0):
+    """Build price strings in the formats found on the sites, with some missing"""
+    rng = random.Random(seed)
+    amounts = [rng.randint(100, 500_000) / 100 for _ in range(distinct)]
+    prices = []
+    for _ in range(count):
+        amount = rng.choice(amounts)
+        english = f"{amount:,.2f}"
+        italian = english.replace(',', ' ').replace('.', ',').replace(' ', '.')
+        prices.append(rng.choice([
+            f"{italian} €", f"€{english}", f"{amount:.2f}", f"{amount:.2f}".replace('.', ','),
+            f"{italian} EUR", None,
+        ]))
+    return prices
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark price string parsing')
+    parser.add_argument('--rows', type=int, default=500_000, help='Price strings to parse')
+    parser.add_argument('--distinct', type=int, default=5000, help='Distinct amounts in the column')
+    parser.add_argument('--locale', default='it', help='Site locale passed to both parsers')
+    args = parser.parse_args()
+
+    prices = make_prices(args.rows, args.distinct)
+    column = pa.array(prices, type=pa.string())
+
+    started = perf_counter()
+    scalar = [None if price is None else parse_price(price, locale=args.locale) for price in prices]
+    scalar_time = perf_counter() - started
+
+    started = perf_counter()
+    batch = parse_price_array(column, args.locale)
+    batch_time = perf_counter() - started
+
+    assert scalar == batch.to_pylist(), 'parse_price_array disagrees with parse_price'
+    print(f"{'parser':<18} {'seconds':>8} {'rows/s':>12}")
+    print(f"{'parse_price':<18} {scalar_time:>8.3f} {args.rows / scalar_time:>12.0f}")
+    print(f"{'parse_price_array':<18} {batch_time:>8.3f} {args.rows / batch_time:>12.0f}")
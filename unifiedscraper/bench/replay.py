@@ -0,0 +1,93 @@
+"""Crawl throughput of the spiders, replayed from their recorded archives.
+
+Record a crawl of each site once, with the network:
+
+    scrapy crawl wardow -s ARCHIVE_MODE=record -s INCREMENTAL_ENABLED=False -s CLOSESPIDER_ITEMCOUNT=0
+
+(with incremental crawling on, product pages are requested conditionally and
+unchanged ones come back as bodiless 304s, which replay cannot parse)
+
+then replay it as often as needed, without the network or download delays:
+
+    python -m unifiedscraper.bench.replay wardow pellecchia answear-uomo
+
+Every spider runs in a fresh process with incremental crawling off and a
+new job directory, so each run parses the same pages through the same
+pipelines. Reported per spider: pages and items per second of wall time, CPU
+time per page and peak resident memory of the crawling process.
+"""
+import argparse
+import multiprocessing
+import resource
+import tempfile
+from pathlib import Path
+
+
+def replay_spider(website, archive_dir):
+    """
+    Crawl one spider from its archive in this process
+
+    Returns:
+        dict: Pages, items, elapsed seconds, CPU seconds, peak RSS and archive misses
+    """
+    from scrapy.crawler import CrawlerProcess
+    from scrapy.utils.project import get_project_settings
+
+    settings = get_project_settings()
+    with tempfile.TemporaryDirectory() as job_dir:
+        for name, value in {
+            'ARCHIVE_MODE': 'replay',
+            'ARCHIVE_DIR': str(Path(archive_dir).resolve()),
+            'JOBDIR': job_dir,
+            'INCREMENTAL_ENABLED': False,
+            'CLOSESPIDER_ITEMCOUNT': 0,
+            'CLOSESPIDER_TIMEOUT': 0,
+            'FEEDS': {},
+            'LOG_LEVEL': 'WARNING',
+        }.items():
+            settings.set(name, value, priority='cmdline')
+
+        process = CrawlerProcess(settings)
+        crawler = process.create_crawler(website)
+        started = resource.getrusage(resource.RUSAGE_SELF)
+        process.crawl(crawler)
+        # Scrapy's SIGTERM handler would keep the pool from terminating this worker
+        process.start(install_signal_handlers=False)
+        finished = resource.getrusage(resource.RUSAGE_SELF)
+
+    stats = crawler.stats.get_stats()
+    return {
+        'pages': stats.get('response_received_count', 0),
+        'items': stats.get('item_scraped_count', 0),
+        'seconds': stats.get('elapsed_time_seconds', 0.0),
+        'cpu_seconds': (finished.ru_utime - started.ru_utime) + (finished.ru_stime - started.ru_stime),
+        'peak_rss_mb': finished.ru_maxrss / 1024,
+        'misses': stats.get('archive/miss', 0),
+    }
+
+
+def run_isolated(website, archive_dir):
+    """Run replay_spider in a fresh process"""
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(1) as pool:
+        return pool.apply(replay_spider, (website, archive_dir))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark spiders against their recorded archives')
+    parser.add_argument('websites', nargs='+', help='Spiders to replay')
+    parser.add_argument('--archive_dir', default='archive', help='ARCHIVE_DIR the crawls were recorded to')
+    args = parser.parse_args()
+
+    print(f"{'spider':<16} {'pages':>7} {'items':>7} {'pages/s':>8} {'items/s':>8} "
+          f"{'CPU ms/page':>11} {'peak RSS MB':>11} {'misses':>6}")
+    for website in args.websites:
+        if not Path(args.archive_dir, f'{website}.index.sqlite').exists():
+            print(f"{website:<16} no archive in {args.archive_dir}, record it with ARCHIVE_MODE=record")
+            continue
+        result = run_isolated(website, args.archive_dir)
+        seconds = result['seconds'] or float('nan')
+        pages = result['pages'] or float('nan')
+        print(f"{website:<16} {result['pages']:>7} {result['items']:>7} {result['pages'] / seconds:>8.1f} "
+              f"{result['items'] / seconds:>8.1f} {1000 * result['cpu_seconds'] / pages:>11.2f} "
+              f"{result['peak_rss_mb']:>11.1f} {result['misses']:>6}")
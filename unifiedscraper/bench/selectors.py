@@ -0,0 +1,100 @@
+"""Per-page cost of the product field selectors: response.css() vs compiled XPath.
+
+Every site schema is run against the same synthetic product page (pellecchia
+markup plus filler), so the numbers compare selector evaluation only; the page
+is parsed once up front. The last column is the whole schema-driven extraction
+(ProductExtractor: selectors, processors and fallbacks) for comparison.
+
+    python -m unifiedscraper.bench.selectors --pages 2000
+"""
+import argparse
+import json
+from pathlib import Path
+from time import perf_counter
+
+from scrapy.http import HtmlResponse
+
+from unifiedscraper.extraction import ProductExtractor, compile_schema
+
+SCHEMAS_DIR = Path(__file__).parent.parent / 'configs' / 'schemas'
+
+
+def make_product_page(filler_blocks=300):
+    """Build a product page with pellecchia's markup and a realistic amount of other HTML"""
+    filler = ''.join(
+        f'<div class="block b{i}"><ul><li><a href="/c/{i}">Category {i}</a></li>'
+        f'<li><span class="price">{i},00 €</span></li></ul><p>Text {i}</p></div>'
+        for i in range(filler_blocks)
+    )
+    body = f'''
+    <div id="bred"><a href="/it/uomo">Uomo</a> &gt; <a href="/it/borse">Borse</a> &gt; <a href="/it/zaini">Zaini</a></div>
+    <div class="row"><div class="col-md-7"><div class="imgb">
+        <a data-fancybox="gallery" href="/img/1.jpg"><img src="/img/1_small.jpg"></a></div></div>
+    <div class="col-md-5"><div class="txt">
+        <h1> Prada </h1><h2>Re-Nylon backpack</h2><h6>SKU: 2VZ135-F0002</h6>
+        <h3 class="price"><em>€1,250.00</em><del>€1,550.00</del></h3>
+    </div></div></div>
+    <div id="cart_section"><div id="taglia_wrap"><a>S</a><a>M</a><a>L</a></div></div>
+    <div id="descrizione"><p>Nylon backpack with leather trim</p><p>Nero</p></div>
+    {filler}
+    '''
+    html = f'<html><head><title>Product</title></head><body>{body}</body></html>'
+    return HtmlResponse(url='https://www.pellecchia.it/it/p/1', body=html, encoding='utf-8')
+
+
+def bench_schema(schema, response, pages):
+    """
+    Time one page worth of product field extraction, both ways
+
+    Args:
+        schema (dict): Parsed schema JSON
+        response (HtmlResponse): Page to extract from, already parsed
+        pages (int): Number of repetitions
+
+    Returns:
+        tuple: Microseconds per page with response.css, with compiled selectors
+            and with the full ProductExtractor
+    """
+    selectors = compile_schema(schema)
+    fields = [selector for field in schema['product_page_schema'] for selector in selectors[field]]
+    extractor = ProductExtractor(schema['product_page_schema'], selectors)
+    root = response.selector.root
+
+    css_results = [response.css(selector.css).get() for selector in fields]
+    compiled_results = [selector.get(root) for selector in fields]
+    assert css_results == compiled_results, 'compiled selectors disagree with response.css()'
+
+    started = perf_counter()
+    for _ in range(pages):
+        for selector in fields:
+            response.css(selector.css).get()
+    css_time = perf_counter() - started
+
+    started = perf_counter()
+    for _ in range(pages):
+        for selector in fields:
+            selector.get(root)
+    compiled_time = perf_counter() - started
+
+    started = perf_counter()
+    for _ in range(pages):
+        extractor.extract(response)
+    extractor_time = perf_counter() - started
+
+    return css_time / pages * 1e6, compiled_time / pages * 1e6, extractor_time / pages * 1e6
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark product field selector evaluation')
+    parser.add_argument('--pages', type=int, default=2000, help='Pages per schema')
+    args = parser.parse_args()
+
+    response = make_product_page()
+    print(f"{'schema':<28} {'fields':>6} {'css us/page':>12} {'compiled us/page':>17} {'speedup':>8} "
+          f"{'extractor us/page':>18}")
+    for schema_path in sorted(SCHEMAS_DIR.glob('*.json')):
+        with open(schema_path, 'r') as file:
+            schema = json.load(file)
+        css_us, compiled_us, extractor_us = bench_schema(schema, response, args.pages)
+        print(f"{schema_path.name:<28} {len(schema['product_page_schema']):>6} "
+              f"{css_us:>12.1f} {compiled_us:>17.1f} {css_us / compiled_us:>7.2f}x {extractor_us:>18.1f}")
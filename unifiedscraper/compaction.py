@@ -0,0 +1,297 @@
+import json
+import os
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from unifiedscraper.prices import parse_price_batch, price_columns_schema
+
+
+COMBINED_FILE_NAME = 'combined.parquet'
+
+# Row groups of the combined file aim for this much uncompressed data
+TARGET_ROW_GROUP_BYTES = 64 * 1024 * 1024
+MIN_ROW_GROUP_ROWS = 1_000
+MAX_ROW_GROUP_ROWS = 1_000_000
+
+# Rows read from an input file at a time
+READ_BATCH_ROWS = 10_000
+
+
+def _is_string_like(data_type):
+    return (pa.types.is_string(data_type) or pa.types.is_large_string(data_type)
+            or pa.types.is_binary(data_type) or pa.types.is_large_binary(data_type))
+
+
+def _is_list_like(data_type):
+    return pa.types.is_list(data_type) or pa.types.is_large_list(data_type)
+
+
+def unify_types(left, right):
+    """
+    Find a type both inputs can be converted to without losing values
+
+    Rules, in order: equal types are kept; null gives way to the other type;
+    dictionaries unify by their value type; strings and binaries become string;
+    integers widen to int64 and mix with floats as float64; lists unify their
+    value types; a list and a scalar become a list (the scalar is wrapped);
+    structs merge their fields by name. Anything else is stored as a string,
+    with nested values JSON encoded.
+
+    Args:
+        left (pa.DataType): First type
+        right (pa.DataType): Second type
+
+    Returns:
+        pa.DataType: The unified type
+    """
+    if left == right:
+        return left
+    if pa.types.is_null(left):
+        return right
+    if pa.types.is_null(right):
+        return left
+    if pa.types.is_dictionary(left):
+        return unify_types(left.value_type, right)
+    if pa.types.is_dictionary(right):
+        return unify_types(left, right.value_type)
+    if _is_string_like(left) and _is_string_like(right):
+        return pa.string()
+    if pa.types.is_integer(left) and pa.types.is_integer(right):
+        return pa.int64()
+    if ((pa.types.is_integer(left) or pa.types.is_floating(left))
+            and (pa.types.is_integer(right) or pa.types.is_floating(right))):
+        return pa.float64()
+    if _is_list_like(left) and _is_list_like(right):
+        return pa.list_(unify_types(left.value_type, right.value_type))
+    if _is_list_like(left) and not pa.types.is_struct(right):
+        return pa.list_(unify_types(left.value_type, right))
+    if _is_list_like(right) and not pa.types.is_struct(left):
+        return pa.list_(unify_types(left, right.value_type))
+    if pa.types.is_struct(left) and pa.types.is_struct(right):
+        fields = {field.name: field.type for field in left}
+        for field in right:
+            fields[field.name] = unify_types(fields[field.name], field.type) \
+                if field.name in fields else field.type
+        return pa.struct([pa.field(name, data_type) for name, data_type in fields.items()])
+    return pa.string()
+
+
+def unify_schemas(schemas):
+    """
+    Merge several schemas into one, keeping columns in order of first appearance
+
+    Args:
+        schemas (list): pa.Schema of every input
+
+    Returns:
+        pa.Schema: Schema every input can be converted to
+    """
+    fields = {}
+    for schema in schemas:
+        for field in schema:
+            fields[field.name] = unify_types(fields[field.name], field.type) \
+                if field.name in fields else field.type
+    return pa.schema([pa.field(name, data_type) for name, data_type in fields.items()])
+
+
+def _to_json_string(value):
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, bytes):
+        return value.decode('utf-8', errors='replace')
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+def _to_python(value, data_type):
+    """Convert a Python value taken from any input column to ``data_type``."""
+    if value is None:
+        return None
+    if _is_list_like(data_type):
+        values = value if isinstance(value, (list, tuple)) else [value]
+        return [_to_python(item, data_type.value_type) for item in values]
+    if pa.types.is_string(data_type):
+        return _to_json_string(value)
+    if pa.types.is_floating(data_type):
+        return float(value)
+    if pa.types.is_integer(data_type):
+        return int(value)
+    return value
+
+
+def conform_array(array, data_type):
+    """
+    Convert one column to the unified type
+
+    Casts are done by Arrow where it can; only the few shapes Arrow cannot cast
+    (scalar to list, nested to JSON string) go through Python objects.
+
+    Args:
+        array (pa.Array): Column of an input batch
+        data_type (pa.DataType): Type from the unified schema
+
+    Returns:
+        pa.Array: Column of type ``data_type``
+    """
+    if array.type == data_type:
+        return array
+    if pa.types.is_null(array.type):
+        return pa.nulls(len(array), data_type)
+    if pa.types.is_dictionary(array.type):
+        return conform_array(array.dictionary_decode(), data_type)
+    if pa.types.is_struct(array.type) and pa.types.is_struct(data_type):
+        children = []
+        for field in data_type:
+            if array.type.get_field_index(field.name) >= 0:
+                children.append(conform_array(array.field(field.name), field.type))
+            else:
+                children.append(pa.nulls(len(array), field.type))
+        return pa.StructArray.from_arrays(children, fields=list(data_type),
+                                          mask=array.is_null())
+    nested = pa.types.is_struct(array.type) or _is_list_like(array.type) or pa.types.is_map(array.type)
+    if not nested and not _is_list_like(data_type):
+        try:
+            return array.cast(data_type)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            pass
+    return pa.array([_to_python(value, data_type) for value in array.to_pylist()], type=data_type)
+
+
+def conform_batch(batch, schema):
+    """Convert a record batch to ``schema``, adding missing columns as nulls."""
+    columns = []
+    for field in schema:
+        if field.name in batch.schema.names:
+            columns.append(conform_array(batch.column(field.name), field.type))
+        else:
+            columns.append(pa.nulls(batch.num_rows, field.type))
+    return pa.RecordBatch.from_arrays(columns, schema=schema)
+
+
+def choose_row_group_size(metadatas, target_bytes=TARGET_ROW_GROUP_BYTES):
+    """
+    Pick the number of rows per row group from the inputs' average row size
+
+    Args:
+        metadatas (list): pq.FileMetaData of every input
+        target_bytes (int): Wanted uncompressed size of a row group
+
+    Returns:
+        int: Rows per row group
+    """
+    total_rows = sum(metadata.num_rows for metadata in metadatas)
+    total_bytes = sum(metadata.row_group(i).total_byte_size
+                      for metadata in metadatas for i in range(metadata.num_row_groups))
+    if not total_rows or not total_bytes:
+        return MIN_ROW_GROUP_ROWS
+    rows = target_bytes // max(1, total_bytes // total_rows)
+    return int(min(MAX_ROW_GROUP_ROWS, max(MIN_ROW_GROUP_ROWS, rows)))
+
+
+def _aside_path(file_path):
+    """First free ``<name>.corrupt``, ``<name>.corrupt.1``, ... next to a file"""
+    candidate = file_path.with_name(file_path.name + '.corrupt')
+    number = 0
+    while candidate.exists():
+        number += 1
+        candidate = file_path.with_name(f'{file_path.name}.corrupt.{number}')
+    return candidate
+
+
+def compact_parquet_files(input_folder, output_file, delete_original=True,
+                          compression='snappy', target_row_group_bytes=TARGET_ROW_GROUP_BYTES, price_locale=None):
+    """
+    Merge all parquet files of a folder into one file, appending to it if it exists
+
+    Schemas of all inputs (including an existing output file) are unified up
+    front, then rows are streamed through ``iter_batches`` so memory stays
+    bounded by one row group. The result is written to a temporary file and
+    moved over ``output_file`` only once complete; originals are deleted after
+    that, so a failed run never loses data. An existing output file that
+    cannot be read is moved aside to ``<name>.corrupt`` rather than replaced. Price columns stored as raw
+    strings are parsed to float64 on the way, a whole batch at a time.
+
+    Args:
+        input_folder (str): Path to folder containing parquet files
+        output_file (str): Path for the combined parquet file
+        delete_original (bool): Whether to delete the merged input files (default: True)
+        compression (str): Parquet compression codec of the output
+        target_row_group_bytes (int): Wanted uncompressed size of a row group
+        price_locale (str): The site's price_locale, for price columns stored as raw strings
+
+    Returns:
+        int: Number of rows in the combined file, or None if there was nothing to merge
+    """
+    output_file = Path(output_file)
+    parquet_files = sorted(f for f in Path(input_folder).glob('*.parquet')
+                           if f.is_file() and f.resolve() != output_file.resolve()
+                           and f.name != COMBINED_FILE_NAME)
+
+    if not parquet_files:
+        print(f"No parquet files to concatenate in {input_folder}")
+        return None
+
+    print(f"Found {len(parquet_files)} parquet files to concatenate in {input_folder}")
+
+    # Previous consolidations of the same day are kept by merging them first
+    inputs = ([output_file] if output_file.exists() else []) + parquet_files
+
+    readable, schemas, metadatas = [], [], []
+    for file_path in inputs:
+        try:
+            with pq.ParquetFile(file_path) as parquet_file:
+                schemas.append(price_columns_schema(parquet_file.schema_arrow))
+                metadatas.append(parquet_file.metadata)
+            readable.append(file_path)
+        except Exception as e:
+            if file_path == output_file:
+                print(f"Error reading {file_path}, it will be moved aside and not merged: {e}")
+            else:
+                print(f"Error reading {file_path}, leaving it in place and not merging it: {e}")
+
+    if not any(file_path in readable for file_path in parquet_files):
+        print(f"No readable parquet files to concatenate in {input_folder}")
+        return None
+
+    schema = unify_schemas(schemas)
+    rows_per_group = choose_row_group_size(metadatas, target_row_group_bytes)
+    tmp_file = output_file.with_name(output_file.name + '.tmp')
+    total_rows = 0
+
+    with pq.ParquetWriter(tmp_file, schema, compression=compression) as writer:
+        pending, pending_rows = [], 0
+        for file_path in readable:
+            with pq.ParquetFile(file_path, memory_map=True) as parquet_file:
+                for batch in parquet_file.iter_batches(batch_size=READ_BATCH_ROWS):
+                    pending.append(conform_batch(parse_price_batch(batch, price_locale), schema))
+                    pending_rows += batch.num_rows
+                    while pending_rows >= rows_per_group:
+                        table = pa.Table.from_batches(pending, schema=schema)
+                        writer.write_table(table.slice(0, rows_per_group), row_group_size=rows_per_group)
+                        rest = table.slice(rows_per_group)
+                        pending, pending_rows = rest.to_batches(), rest.num_rows
+                        total_rows += rows_per_group
+            print(f"Processed {file_path}")
+
+        if pending_rows:
+            writer.write_table(pa.Table.from_batches(pending, schema=schema),
+                               row_group_size=rows_per_group)
+            total_rows += pending_rows
+
+    if output_file.exists() and output_file not in readable:
+        # Keep an unreadable combined file for recovery instead of overwriting its rows
+        corrupt_file = _aside_path(output_file)
+        os.replace(output_file, corrupt_file)
+        print(f"Moved unreadable {output_file} to {corrupt_file}")
+    os.replace(tmp_file, output_file)
+
+    if delete_original:
+        for file_path in readable:
+            if file_path != output_file:
+                os.remove(file_path)
+                print(f"Deleted {file_path}")
+
+    print(f"Successfully concatenated {len(readable)} files ({total_rows} rows, "
+          f"{rows_per_group} rows per row group) into {output_file}")
+    return total_rows
@@ -0,0 +1,142 @@
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+from scrapy import signals
+from scrapy.core.scheduler import Scheduler
+from scrapy.exceptions import NotConfigured
+
+# Name of the crawl state file in JOBDIR (read by run_spider.check_scrapy_stats)
+STATE_FILE_NAME = 'spider.stats'
+
+
+class StatefulScheduler(Scheduler):
+    """
+    Scrapy's scheduler, counting the requests left in its queues when it closes
+
+    The count is kept in the stats as ``scheduler/pending``: requests still
+    queued in JOBDIR for the next batch. 0 means the crawl is exhausted.
+    """
+
+    def close(self, reason):
+        self.stats.set_value('scheduler/pending', len(self), spider=self.spider)
+        return super().close(reason)
+
+
+class CrawlStateExtension:
+    """
+    Write how a crawl closed to JOBDIR/spider.stats
+
+    One JSON document, replaced when each batch closes:
+
+        {"spider": "wardow", "reason": "closespider_itemcount", "pending": 812,
+         "closed_at": "...", "stats": {...}}
+
+    ``pending`` is the ``scheduler/pending`` stat of the scheduler (None with
+    a scheduler that does not count), so whoever runs the next batch knows
+    whether there is anything left to crawl.
+    """
+
+    def __init__(self, crawler, jobdir):
+        self.crawler = crawler
+        self.path = Path(jobdir) / STATE_FILE_NAME
+        crawler.signals.connect(self.spider_closed, signal=signals.spider_closed)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        jobdir = crawler.settings.get('JOBDIR')
+        if not jobdir:
+            raise NotConfigured
+        return cls(crawler, jobdir)
+
+    def spider_closed(self, spider, reason):
+        stats = self.crawler.stats.get_stats()
+        state = {
+            'spider': spider.name,
+            'reason': reason,
+            'pending': stats.get('scheduler/pending'),
+            'closed_at': datetime.now(timezone.utc).isoformat(),
+            'stats': stats,
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Written aside and renamed, so a reader never sees half a file
+        partial = self.path.with_suffix('.partial')
+        with open(partial, 'w') as file:
+            json.dump(state, file, indent=2, default=str)
+        os.replace(partial, self.path)
+
+
+def crawl_remaining(reason, pending):
+    """
+    Whether a crawl that closed this way has requests left for another batch
+
+    Args:
+        reason (str): Close reason of the batch (None if it did not close cleanly)
+        pending (int): Requests left in the scheduler (None if unknown)
+
+    Returns:
+        bool: True if another batch would crawl something
+    """
+    if reason is None:
+        return False
+    if pending is not None:
+        # A batch limit (items, time, pages, memory) may stop a crawl with an
+        # empty queue: then nothing is left, whatever the reason says
+        return pending > 0 and reason.startswith(('closespider_', 'memusage_'))
+    # Schedulers that do not count: only the item limit stops a crawl early
+    return reason == 'closespider_itemcount'
+
+
+def batch_progress(stats):
+    """
+    How much a batch moved the crawl on
+
+    Items are not the only progress: a batch of unchanged products (incremental
+    crawling) or of listing pages scrapes no item but still works through the
+    queue. A site answering only errors, 403s or 429s makes none.
+
+    Args:
+        stats (dict): Stats of the batch
+
+    Returns:
+        int: Items scraped, plus unchanged products seen, plus 2xx and 304 responses
+    """
+    progress = stats.get('item_scraped_count', 0)
+    for key, value in stats.items():
+        if key.startswith('incremental/seen/'):
+            progress += value
+        elif key.startswith('downloader/response_status_count/'):
+            status = key.rsplit('/', 1)[1]
+            if status.startswith('2') or status == '304':
+                progress += value
+    return progress
+
+
+def batch_stop_reason(reason, pending, progress, empty_batches, min_progress=1, max_empty_batches=3):
+    """
+    Decide whether a batch run goes on after a batch
+
+    Args:
+        reason (str): Close reason of the batch (None if it did not close cleanly)
+        pending (int): Requests left in the scheduler (None if unknown)
+        progress (int): ``batch_progress`` of the batch
+        empty_batches (int): Consecutive batches without progress before this one
+        min_progress (int): Progress below which a batch counts as empty
+        max_empty_batches (int): Consecutive empty batches that stop the run
+
+    Returns:
+        tuple: (why the run stops, or None to start another batch;
+            consecutive empty batches including this one)
+    """
+    if not crawl_remaining(reason, pending):
+        if reason is None:
+            return 'the crawl did not close cleanly', empty_batches
+        return 'the spider has crawled everything queued', empty_batches
+    if progress >= min_progress:
+        return None, 0
+    # Requests are left but the batch got nowhere: the site may be blocking us
+    empty_batches += 1
+    if empty_batches >= max_empty_batches:
+        return f'{empty_batches} batches in a row made no progress', empty_batches
+    return None, empty_batches
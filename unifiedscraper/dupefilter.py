@@ -0,0 +1,255 @@
+import math
+import mmap
+import sqlite3
+import struct
+from pathlib import Path
+
+from scrapy.dupefilters import RFPDupeFilter
+from scrapy.utils.job import job_dir
+
+
+class BloomFilter:
+    """
+    Fixed-capacity Bloom filter over a memory-mapped bit array
+
+    The file starts with a header (capacity, error rate, number of bits and
+    hashes, items added) followed by the bits, so a filter is reopened as it
+    was left. Without a path the bits live in anonymous memory.
+
+    Items must be uniformly distributed bytes of at least 16 bytes, like
+    request fingerprints: the bit positions are taken from them directly
+    (double hashing over their first two 64-bit words) instead of hashing again.
+    """
+
+    MAGIC = b'UBF1'
+    HEADER = struct.Struct('<4sQdQIQ')
+    HEADER_SIZE = 64
+
+    def __init__(self, path=None, capacity=1_000_000, error_rate=0.001):
+        self.path = Path(path) if path else None
+        if self.path is not None and self.path.exists():
+            with open(self.path, 'rb') as file:
+                magic, capacity, error_rate, num_bits, num_hashes, count = self.HEADER.unpack(
+                    file.read(self.HEADER.size))
+            if magic != self.MAGIC:
+                raise ValueError(f"{self.path} is not a Bloom filter file")
+        else:
+            num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+            num_bits = (num_bits + 7) // 8 * 8
+            num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+            count = 0
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.count = count
+
+        size = self.HEADER_SIZE + num_bits // 8
+        if self.path is None:
+            self.file = None
+            self.bits = mmap.mmap(-1, size)
+        else:
+            if not self.path.exists():
+                with open(self.path, 'wb') as file:
+                    file.truncate(size)
+            self.file = open(self.path, 'r+b')
+            self.bits = mmap.mmap(self.file.fileno(), size)
+        self._write_header()
+
+    def _write_header(self):
+        self.HEADER.pack_into(self.bits, 0, self.MAGIC, self.capacity, self.error_rate,
+                              self.num_bits, self.num_hashes, self.count)
+
+    def _positions(self, item):
+        num_bits = self.num_bits
+        position = int.from_bytes(item[:8], 'little') % num_bits
+        step = (int.from_bytes(item[8:16], 'little') | 1) % num_bits
+        for _ in range(self.num_hashes):
+            yield position
+            position += step
+            if position >= num_bits:
+                position -= num_bits
+
+    def __contains__(self, item):
+        bits = self.bits
+        offset = self.HEADER_SIZE
+        for position in self._positions(item):
+            if not bits[offset + (position >> 3)] >> (position & 7) & 1:
+                return False
+        return True
+
+    def add(self, item):
+        """Add an item; return True if it was (probably) there already"""
+        bits = self.bits
+        offset = self.HEADER_SIZE
+        present = True
+        for position in self._positions(item):
+            index = offset + (position >> 3)
+            mask = 1 << (position & 7)
+            if not bits[index] & mask:
+                bits[index] |= mask
+                present = False
+        if not present:
+            self.count += 1
+            struct.pack_into('<Q', bits, self.HEADER.size - 8, self.count)
+        return present
+
+    @property
+    def full(self):
+        return self.count >= self.capacity
+
+    @property
+    def nbytes(self):
+        return len(self.bits)
+
+    def close(self):
+        self.bits.flush()
+        self.bits.close()
+        if self.file is not None:
+            self.file.close()
+
+
+class ScalableBloomFilter:
+    """
+    Bloom filter that grows with the number of items, at a bounded error rate
+
+    Items go to the newest slice; when it is full a slice ``growth`` times
+    larger is added, with an error rate ``tightening`` times lower, so the
+    false positive rate over all slices stays below ``error_rate`` however
+    many items are added (Almeida et al., "Scalable Bloom Filters"). Slices
+    are kept as ``slice-NNN.bloom`` files in ``directory``.
+    """
+
+    def __init__(self, directory=None, initial_capacity=1_000_000, error_rate=0.001, growth=2, tightening=0.5):
+        self.directory = Path(directory) if directory else None
+        self.initial_capacity = initial_capacity
+        self.error_rate = error_rate
+        self.growth = growth
+        self.tightening = tightening
+        self.slices = []
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            for path in sorted(self.directory.glob('slice-*.bloom')):
+                self.slices.append(BloomFilter(path))
+        if not self.slices:
+            self._add_slice()
+
+    def _add_slice(self):
+        index = len(self.slices)
+        capacity = self.initial_capacity * self.growth ** index
+        error_rate = self.error_rate * (1 - self.tightening) * self.tightening ** index
+        path = self.directory / f'slice-{index:03d}.bloom' if self.directory is not None else None
+        self.slices.append(BloomFilter(path, capacity, error_rate))
+
+    def __contains__(self, item):
+        return any(item in bloom for bloom in self.slices)
+
+    def add(self, item):
+        """Add an item; return True if it was (probably) there already"""
+        if any(item in bloom for bloom in self.slices[:-1]):
+            return True
+        if self.slices[-1].full:
+            if item in self.slices[-1]:
+                return True
+            self._add_slice()
+        return self.slices[-1].add(item)
+
+    def __len__(self):
+        return sum(bloom.count for bloom in self.slices)
+
+    @property
+    def nbytes(self):
+        return sum(bloom.nbytes for bloom in self.slices)
+
+    def close(self):
+        for bloom in self.slices:
+            bloom.close()
+
+
+class FingerprintSet:
+    """
+    Exact set of fingerprints in SQLite, for when false positives are not acceptable
+
+    Only SQLite's page cache is held in memory; without a path the set is an
+    in-memory database.
+    """
+
+    def __init__(self, path=None, commit_every=1000):
+        self.connection = sqlite3.connect(str(path) if path else ':memory:')
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.execute('CREATE TABLE IF NOT EXISTS fingerprints (fp BLOB PRIMARY KEY) WITHOUT ROWID')
+        self.commit_every = commit_every
+        self._pending = 0
+
+    def __contains__(self, item):
+        return self.connection.execute('SELECT 1 FROM fingerprints WHERE fp = ?', (item,)).fetchone() is not None
+
+    def add(self, item):
+        """Add an item; return True if it was there already"""
+        cursor = self.connection.execute('INSERT OR IGNORE INTO fingerprints (fp) VALUES (?)', (item,))
+        if cursor.rowcount:
+            self._pending += 1
+            if self._pending >= self.commit_every:
+                self.connection.commit()
+                self._pending = 0
+        return not cursor.rowcount
+
+    def __len__(self):
+        return self.connection.execute('SELECT COUNT(*) FROM fingerprints').fetchone()[0]
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+
+
+class CompactDupeFilter(RFPDupeFilter):
+    """
+    Duplicate request filter whose memory does not grow with the crawl
+
+    In 'bloom' mode (DUPEFILTER_MODE) the fingerprints go to a scalable Bloom
+    filter memory-mapped from JOBDIR/requests.bloom: a few bytes per request
+    instead of a Python string in a set, at the cost of wrongly filtering
+    about DUPEFILTER_ERROR_RATE of the new requests. 'exact' mode keeps them
+    in JOBDIR/requests.seen.sqlite instead, without false positives.
+
+    The requests.seen file of a JOBDIR crawled with Scrapy's RFPDupeFilter
+    is imported the first time, so resumed crawls keep their history.
+    """
+
+    def __init__(self, path=None, debug=False, *, fingerprinter=None, mode='bloom',
+                 capacity=1_000_000, error_rate=0.0001):
+        super().__init__(None, debug, fingerprinter=fingerprinter)
+        if mode not in ('bloom', 'exact'):
+            raise ValueError(f"Unknown DUPEFILTER_MODE {mode!r}, expected 'bloom' or 'exact'")
+        if mode == 'bloom':
+            store_path = Path(path, 'requests.bloom') if path else None
+            new = store_path is None or not store_path.exists()
+            self.fingerprints = ScalableBloomFilter(store_path, initial_capacity=capacity, error_rate=error_rate)
+        else:
+            store_path = Path(path, 'requests.seen.sqlite') if path else None
+            new = store_path is None or not store_path.exists()
+            self.fingerprints = FingerprintSet(store_path)
+
+        legacy = Path(path, 'requests.seen') if path else None
+        if new and legacy is not None and legacy.exists():
+            with open(legacy, 'r', encoding='utf-8') as file:
+                for line in file:
+                    if line.strip():
+                        self.fingerprints.add(bytes.fromhex(line.strip()))
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        return cls(job_dir(settings),
+                   settings.getbool('DUPEFILTER_DEBUG'),
+                   fingerprinter=crawler.request_fingerprinter,
+                   mode=settings.get('DUPEFILTER_MODE', 'bloom'),
+                   capacity=settings.getint('DUPEFILTER_CAPACITY', 1_000_000),
+                   error_rate=settings.getfloat('DUPEFILTER_ERROR_RATE', 0.0001))
+
+    def request_seen(self, request):
+        return self.fingerprints.add(self.fingerprinter.fingerprint(request))
+
+    def close(self, reason):
+        self.fingerprints.close()
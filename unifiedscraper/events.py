@@ -0,0 +1,129 @@
+import json
+import os
+import sys
+from datetime import datetime, timezone
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+
+
+class EventLog:
+    """
+    JSON-lines stream of crawl events
+
+    Every event is one line, ``{"ts": ..., "event": ..., **fields}``, written
+    and flushed at once, so a reader of the file or pipe sees whole events as
+    they happen. Several processes can append to the same file.
+    """
+
+    def __init__(self, target):
+        """
+        Args:
+            target (str): File path (appended to, folders created) or '-' for stdout
+        """
+        self.target = target
+        if target == '-':
+            self.file = sys.stdout
+        else:
+            directory = os.path.dirname(target)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.file = open(target, 'a', encoding='utf-8')
+
+    def emit(self, event, **fields):
+        """
+        Write one event
+
+        Args:
+            event (str): Event name, e.g. 'batch_start'
+            **fields: JSON-serializable details of the event
+
+        Returns:
+            dict: The event as written
+        """
+        record = {'ts': datetime.now(timezone.utc).isoformat(timespec='milliseconds'), 'event': event, **fields}
+        self.write(record)
+        return record
+
+    def write(self, record):
+        """Write an event read from another stream"""
+        self.file.write(json.dumps(record, default=str) + '\n')
+        self.file.flush()
+
+    def close(self):
+        if self.file is not sys.stdout:
+            self.file.close()
+
+
+def parse_event(line):
+    """
+    Read one line of an event stream
+
+    A crawl shares stdout with whatever its code prints, so only a line that
+    is a JSON object with "ts" and "event" keys is an event. Anything else -
+    plain text, a printed dict, broken or partial JSON, a JSON list - is skipped.
+
+    Args:
+        line (str): Line of a JSON-lines event stream (or of anything else)
+
+    Returns:
+        dict: The event, or None if the line is not an event
+    """
+    line = line.strip()
+    if not (line.startswith('{') and line.endswith('}')):
+        return None
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(record, dict) or 'ts' not in record or not isinstance(record.get('event'), str):
+        return None
+    return record
+
+
+class EventLogExtension:
+    """
+    Emit spider_opened and spider_closed events to EVENT_LOG
+
+    The spider_closed event carries the close reason and the counts a batch
+    runner needs to decide whether to go on, without parsing any log:
+
+        {"ts": "...", "event": "spider_closed", "spider": "wardow",
+         "reason": "closespider_itemcount", "pending": 812, "items": 50, ...}
+    """
+
+    def __init__(self, crawler, target):
+        self.crawler = crawler
+        self.target = target
+        self.events = None
+        crawler.signals.connect(self.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(self.spider_closed, signal=signals.spider_closed)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        target = crawler.settings.get('EVENT_LOG')
+        if not target:
+            raise NotConfigured
+        return cls(crawler, target)
+
+    def spider_opened(self, spider):
+        self.events = EventLog(self.target)
+        self.events.emit('spider_opened', spider=spider.name, pid=os.getpid())
+
+    def spider_closed(self, spider, reason):
+        stats = self.crawler.stats
+        started = stats.get_value('start_time')
+        elapsed = (datetime.now(timezone.utc) - started).total_seconds() if started else None
+        self.events.emit(
+            'spider_closed',
+            spider=spider.name,
+            reason=reason,
+            pending=stats.get_value('scheduler/pending'),
+            items=stats.get_value('item_scraped_count', 0),
+            items_dropped=stats.get_value('item_dropped_count', 0),
+            requests=stats.get_value('downloader/request_count', 0),
+            responses=stats.get_value('response_received_count', 0),
+            errors=stats.get_value('log_count/ERROR', 0),
+            elapsed_seconds=round(elapsed, 3) if elapsed is not None else None,
+        )
+        self.events.close()
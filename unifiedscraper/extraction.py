@@ -0,0 +1,544 @@
+import json
+import re
+from urllib.parse import urljoin
+
+from lxml import etree
+from parsel.csstranslator import HTMLTranslator
+
+from unifiedscraper.prices import currency_code, parse_price
+
+
+_css_translator = HTMLTranslator()
+
+
+class CompiledSelector:
+    """
+    A CSS selector from a schema JSON, translated and compiled to an lxml XPath once
+
+    ``response.css(query)`` translates the query through cssselect, compiles
+    the XPath and wraps every result in a Selector on each call. This does the
+    first two steps at spider start and returns plain strings.
+
+    The gain is modest: parsel already caches the CSS to XPath translation, so
+    only the XPath compilation and the Selector objects are saved, while
+    evaluating the XPath over the document costs the same. Measured against
+    ``response.css(query).get()`` for every field of a schema, extraction is
+    about 1.0-1.36x faster on real product pages (1.2-1.3x on the mock shop's
+    pages, HTML parsing included), and less than that end to end.
+    """
+
+    __slots__ = ('css', 'xpath', '_evaluate')
+
+    def __init__(self, css):
+        self.css = css
+        self.xpath = _css_translator.css_to_xpath(css)
+        self._evaluate = etree.XPath(self.xpath, smart_strings=False)
+
+    def __repr__(self):
+        return f"CompiledSelector({self.css!r})"
+
+    @staticmethod
+    def _to_string(result):
+        # Text and attribute results are strings already; elements are
+        # serialized like parsel's Selector.get() does
+        if isinstance(result, str):
+            return result
+        if isinstance(result, etree._Element):
+            return etree.tostring(result, method='html', encoding='unicode', with_tail=False)
+        return str(result)
+
+    def get_all(self, root):
+        """Return every match under ``root`` (an lxml element) as strings"""
+        return [self._to_string(result) for result in self._evaluate(root)]
+
+    def nodes(self, root):
+        """Return the raw lxml results under ``root``, e.g. the elements of a container selector"""
+        return self._evaluate(root)
+
+    def get(self, root, default=None):
+        """Return the first match under ``root`` as a string, or ``default``"""
+        results = self._evaluate(root)
+        if not results:
+            return default
+        return self._to_string(results[0])
+
+
+def _field_css(spec):
+    """CSS selectors of a product field spec, in the order they are tried"""
+    if isinstance(spec, str):
+        return [spec]
+    css = spec.get('css', [])
+    return [css] if isinstance(css, str) else list(css)
+
+
+def compile_schema(schema):
+    """
+    Compile every CSS selector of a site schema
+
+    Top-level selectors (``brands_urls_schema``, ``products_urls_schema``,
+    ``pagination_schema``) and the fields of ``product_page_schema`` end up in
+    one flat mapping, since their names never overlap. A field declaring
+    several selectors keeps them in order; a selector used by more than one
+    field is compiled once and shared.
+
+    Args:
+        schema (dict): Parsed schema JSON
+
+    Returns:
+        dict: Name of the selector or product field -> list of CompiledSelector
+    """
+    compiled = {}
+    selectors = {name: _compile_all([value], compiled)
+                 for name, value in schema.items() if isinstance(value, str)}
+    selectors.update(compile_fields(schema.get('product_page_schema', {}), compiled))
+    return selectors
+
+
+def _compile_all(css_list, compiled):
+    for css in css_list:
+        if css not in compiled:
+            compiled[css] = CompiledSelector(css)
+    return [compiled[css] for css in css_list]
+
+
+def compile_fields(fields, compiled=None):
+    """
+    Compile the selectors of a block of field specs (``product_page_schema``,
+    the ``fields`` of ``listing_item_schema``)
+
+    Args:
+        fields (dict): Field name -> spec
+        compiled (dict): CSS -> CompiledSelector already built, shared with other blocks
+
+    Returns:
+        dict: Field name -> list of CompiledSelector
+    """
+    compiled = {} if compiled is None else compiled
+    return {field: _compile_all(_field_css(spec), compiled) for field, spec in fields.items()}
+
+
+# Post-processors a field spec can list under "processors", by name. Each one
+# is called as processor(value, response, *args). Value processors get one
+# string at a time (every element of a "many" field); list processors get the
+# whole list.
+
+def _load_json(text):
+    # Not cached: callers get their own objects, which end up in items and may
+    # be changed there. Parsing a JSON-LD block takes microseconds.
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
+
+
+def _json_path(value, response, path=''):
+    data = _load_json(value)
+    for key in filter(None, path.split('.')):
+        if isinstance(data, list) and key.lstrip('-').isdigit():
+            index = int(key)
+            data = data[index] if -len(data) <= index < len(data) else None
+        elif isinstance(data, dict):
+            data = data.get(key)
+        else:
+            return None
+    return data
+
+
+def _split(value, response, separator, index):
+    parts = value.split(separator)
+    return parts[index] if -len(parts) <= index < len(parts) else None
+
+
+def _remove(value, response, *substrings):
+    for substring in substrings:
+        value = value.replace(substring, '')
+    return value
+
+
+def _regex(value, response, pattern):
+    match = re.search(pattern, value)
+    if not match:
+        return None
+    return match.group(1) if match.groups() else match.group()
+
+
+VALUE_PROCESSORS = {
+    'strip': lambda value, response, chars=None: value.strip(chars),
+    'clean': lambda value, response: ' '.join(value.split()),
+    'remove': _remove,
+    'replace': lambda value, response, old, new: value.replace(old, new),
+    'split': _split,
+    'regex': _regex,
+    'price': lambda value, response, decimal=None, locale=None: parse_price(value, decimal, locale),
+    'currency': lambda value, response: currency_code(value),
+    'json': _json_path,
+    'urljoin': lambda value, response, base=None: urljoin(base or response.url, value),
+}
+
+LIST_PROCESSORS = {
+    'first': lambda values, response: values[0] if values else None,
+    'last': lambda values, response: values[-1] if values else None,
+    'join': lambda values, response, separator='': separator.join(values),
+    'compact': lambda values, response: [value for value in values if value and value.strip()],
+}
+
+_TYPES = {
+    'str': lambda value: value if isinstance(value, str) else json.dumps(value, ensure_ascii=False),
+    'float': float,
+    'int': int,
+    'list': lambda value: value if isinstance(value, list) else [value],
+}
+
+_SPEC_KEYS = {'css', 'source', 'from', 'many', 'processors', 'fallback', 'default', 'type', 'emit'}
+
+
+def _is_empty(value):
+    return value is None or value == '' or value == []
+
+
+class FieldSpec:
+    """
+    One field of ``product_page_schema``, parsed and validated
+
+    A field is either a CSS selector string (first match, as it is on the
+    page) or a dict:
+
+        css (str | list): Selector, or selectors tried in order until one matches
+        source (str): "url" to start from the response URL instead of a selector
+        from (str): Start from the final value of another field
+        many (bool): Keep every match as a list instead of the first one
+        processors (list): Names, or [name, *args], of post-processors to apply in order
+        fallback (str): Field whose value is used when this one comes out empty
+        default: Value used when the field is still empty
+        type (str): 'str', 'float', 'int' or 'list' to convert the final value
+        emit (bool): False for helper fields other fields read but the item does not get
+    """
+
+    __slots__ = ('name', 'selectors', 'source', 'origin', 'many', 'processors',
+                 'fallback', 'default', 'type', 'emit')
+
+    def __init__(self, name, spec, selectors, price_locale=None):
+        if isinstance(spec, str):
+            spec = {'css': spec}
+        unknown = set(spec) - _SPEC_KEYS
+        if unknown:
+            raise ValueError(f"Field {name!r} has unknown keys {sorted(unknown)}")
+
+        self.name = name
+        self.selectors = selectors
+        self.source = spec.get('source')
+        self.origin = spec.get('from')
+        self.many = spec.get('many', False)
+        self.fallback = spec.get('fallback')
+        self.default = spec.get('default')
+        self.emit = spec.get('emit', True)
+        self.type = spec.get('type')
+        if self.source not in (None, 'url'):
+            raise ValueError(f"Field {name!r} has unknown source {self.source!r}")
+        if self.type is not None and self.type not in _TYPES:
+            raise ValueError(f"Field {name!r} has unknown type {self.type!r}")
+
+        self.processors = []
+        for entry in spec.get('processors', []):
+            processor_name, *args = [entry] if isinstance(entry, str) else entry
+            if processor_name == 'price' and not args:
+                args = [None, price_locale]
+            if processor_name in VALUE_PROCESSORS:
+                self.processors.append((VALUE_PROCESSORS[processor_name], tuple(args), False))
+            elif processor_name in LIST_PROCESSORS:
+                self.processors.append((LIST_PROCESSORS[processor_name], tuple(args), True))
+            else:
+                raise ValueError(f"Field {name!r} uses unknown processor {processor_name!r}")
+
+    def process(self, value, response):
+        """Run the post-processors over a raw value"""
+        for processor, args, on_list in self.processors:
+            if value is None:
+                return None
+            if on_list:
+                value = processor(value if isinstance(value, list) else [value], response, *args)
+            elif isinstance(value, list):
+                value = [processor(v, response, *args) if isinstance(v, str) else v for v in value]
+            elif isinstance(value, str):
+                value = processor(value, response, *args)
+        return value
+
+
+class _Page:
+    """Per-response state: selector results and field values computed so far"""
+
+    __slots__ = ('response', 'root', 'structured', 'matches', 'values', 'resolving')
+
+    def __init__(self, response, structured, root=None):
+        self.response = response
+        self.root = response.selector.root if root is None else root
+        self.structured = structured or {}
+        self.matches = {}
+        self.values = {}
+        self.resolving = set()
+
+    def match(self, selector):
+        # Fields sharing a selector evaluate it once per page
+        results = self.matches.get(selector)
+        if results is None:
+            results = self.matches[selector] = selector.get_all(self.root)
+        return results
+
+
+class ProductExtractor:
+    """
+    Build a product dict from a page using only the schema's field declarations
+
+    Every field is computed once per page, in declaration order, with
+    ``from`` and ``fallback`` references resolved on demand. Selector results
+    are memoised per page, so a selector shared by several fields (a JSON-LD
+    block, a price read for both the amount and the currency) runs once.
+    Empty strings come out as None. ``price_locale`` (e.g. 'it') settles the
+    prices that are ambiguous without it, such as '1.234'.
+
+    Values read from the page's structured data (see
+    ``extract_structured_product``) take precedence: a field found there is
+    used as is and its selectors are not evaluated.
+    """
+
+    def __init__(self, product_schema, selectors, price_locale=None):
+        self.fields = {
+            name: FieldSpec(name, spec, selectors.get(name, []), price_locale)
+            for name, spec in product_schema.items()
+        }
+        for spec in self.fields.values():
+            for reference in (spec.origin, spec.fallback):
+                if reference is not None and reference not in self.fields:
+                    raise ValueError(f"Field {spec.name!r} refers to unknown field {reference!r}")
+
+    def extract(self, response, structured=None, root=None):
+        """
+        Extract every emitted field of the schema
+
+        Args:
+            response: Product page response
+            structured (dict): Field values already known from structured data
+            root: lxml element to run the selectors under instead of the whole
+                page, e.g. one product tile of a listing
+
+        Returns:
+            dict: Field name -> value, plus structured values for fields the
+                schema does not declare
+        """
+        page = _Page(response, structured, root)
+        product = {name: self._resolve(name, page) for name, spec in self.fields.items() if spec.emit}
+        for name, value in page.structured.items():
+            if name not in self.fields:
+                product[name] = value
+        return product
+
+    def _resolve(self, name, page):
+        if name in page.values:
+            return page.values[name]
+        if name in page.resolving:
+            raise ValueError(f"Field {name!r} refers back to itself")
+        page.resolving.add(name)
+
+        spec = self.fields[name]
+        value = page.structured.get(name)
+        if _is_empty(value):
+            value = spec.process(self._raw(spec, page), page.response)
+        if _is_empty(value) and spec.fallback:
+            value = self._resolve(spec.fallback, page)
+        if _is_empty(value):
+            value = spec.default
+        if value is not None and spec.type:
+            try:
+                value = _TYPES[spec.type](value)
+            except (TypeError, ValueError):
+                value = None
+
+        page.resolving.discard(name)
+        page.values[name] = value
+        return value
+
+    def _raw(self, spec, page):
+        if spec.source == 'url':
+            return page.response.url
+        if spec.origin:
+            return self._resolve(spec.origin, page)
+        for selector in spec.selectors:
+            results = page.match(selector)
+            if results:
+                if spec.many:
+                    return list(results)
+                return results[0] or None
+        return [] if spec.many else None
+
+
+# Structured data: JSON-LD and microdata, read in one pass over the page
+
+_STRUCTURED_NODES = etree.XPath(
+    '//script[@type="application/ld+json"] | //*[@itemscope and not(@itemprop)]')
+_PRODUCT_TYPES = {'Product', 'ProductGroup', 'IndividualProduct', 'ProductModel'}
+_ORIGINAL_PRICE_TYPES = ('ListPrice', 'StrikethroughPrice', 'MSRP')
+_IDENTITY_FIELDS = ('sku', 'ProductName')
+
+
+def _schema_types(node):
+    types = node.get('@type', [])
+    types = types if isinstance(types, list) else [types]
+    # Microdata types are URLs, JSON-LD types may be prefixed
+    return {str(t).rstrip('/').rsplit('/', 1)[-1].rsplit(':', 1)[-1] for t in types}
+
+
+def _find_products(data):
+    """Yield every Product node of a JSON-LD document, including @graph entries"""
+    if isinstance(data, list):
+        for entry in data:
+            yield from _find_products(entry)
+    elif isinstance(data, dict):
+        if _schema_types(data) & _PRODUCT_TYPES:
+            yield data
+        else:
+            for key in ('@graph', 'mainEntity', 'itemListElement', 'item'):
+                if key in data:
+                    yield from _find_products(data[key])
+
+
+def _microdata_value(element):
+    if element.tag == 'meta':
+        return element.get('content')
+    if element.tag in ('a', 'link', 'area'):
+        return element.get('href')
+    if element.tag in ('img', 'source', 'video', 'audio', 'iframe', 'embed'):
+        return element.get('src')
+    if element.tag == 'time':
+        return element.get('datetime') or element.text_content().strip()
+    if element.tag in ('data', 'meter'):
+        return element.get('value')
+    return element.get('content') or element.text_content().strip()
+
+
+def _microdata_item(element):
+    """Turn an itemscope element into a JSON-LD shaped dict"""
+    item = {'@type': (element.get('itemtype') or '').split()}
+
+    def collect(node):
+        for child in node.iterchildren():
+            if not isinstance(child.tag, str):
+                continue
+            properties = child.get('itemprop')
+            nested = child.get('itemscope') is not None
+            if properties:
+                value = _microdata_item(child) if nested else _microdata_value(child)
+                for prop in properties.split():
+                    item.setdefault(prop, value)
+            if not nested:
+                collect(child)
+
+    collect(element)
+    return item
+
+
+def _first(value):
+    while isinstance(value, list):
+        if not value:
+            return None
+        value = value[0]
+    return value
+
+
+def _name(value):
+    value = _first(value)
+    if isinstance(value, dict):
+        return value.get('name') or value.get('@id')
+    return value
+
+
+def _price(value):
+    value = _first(value)
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        # schema.org prices are machine-readable: '.' is always the decimal separator
+        return parse_price(value, decimal='.')
+    return None
+
+
+def _offer(product):
+    """The offer to read prices from: the first one, or the aggregate's own fields"""
+    offers = product.get('offers')
+    if offers is None:
+        offers = _first(product.get('hasVariant'))
+        offers = offers.get('offers') if isinstance(offers, dict) else None
+    offer = _first(offers)
+    if not isinstance(offer, dict):
+        return {}
+    if 'AggregateOffer' in _schema_types(offer) and 'price' not in offer:
+        nested = _first(offer.get('offers'))
+        nested = nested if isinstance(nested, dict) else {}
+        offer = {**nested, **offer, 'price': offer.get('lowPrice', nested.get('price'))}
+    return offer
+
+
+def _map_product(product):
+    offer = _offer(product)
+    image = _first(product.get('image'))
+    if isinstance(image, dict):
+        image = image.get('contentUrl') or image.get('url')
+
+    original_price = None
+    specifications = offer.get('priceSpecification', [])
+    for specification in specifications if isinstance(specifications, list) else [specifications]:
+        if isinstance(specification, dict) and str(specification.get('priceType', '')).endswith(_ORIGINAL_PRICE_TYPES):
+            original_price = _price(specification.get('price'))
+            break
+
+    availability = _first(offer.get('availability'))
+    if isinstance(availability, str):
+        availability = availability.rstrip('/').rsplit('/', 1)[-1]
+
+    size = product.get('size')
+    fields = {
+        'Brand': _name(product.get('brand')),
+        'ProductName': _name(product.get('name')),
+        'ProductImage': image,
+        'ProductColor': _first(product.get('color')),
+        'sku': _first(product.get('sku')),
+        'Category': _name(product.get('category')),
+        'Description': _first(product.get('description')),
+        'CurrentPrice': _price(offer.get('price')),
+        'OriginalPrice': original_price,
+        'PriceCurrency': _first(offer.get('priceCurrency')),
+        'StockAvailability': availability,
+        'AvailableSizes': size if isinstance(size, list) else None,
+    }
+    return {name: value for name, value in fields.items() if not _is_empty(value)}
+
+
+def extract_structured_product(root):
+    """
+    Read the product from a page's JSON-LD and microdata
+
+    Both kinds of markup are found with one XPath over the document. Every
+    Product node found is mapped to item fields and merged, the first node
+    providing a field winning, so a JSON-LD block is completed by microdata
+    and the other way round. Nodes whose name or sku differ from the first
+    product are other products (related items, variants) and are skipped.
+
+    Args:
+        root: lxml root element of the page (``response.selector.root``)
+
+    Returns:
+        dict: Item field -> value, only for fields the markup provides
+    """
+    product = {}
+    for node in _STRUCTURED_NODES(root):
+        if node.tag == 'script':
+            candidates = _find_products(_load_json((node.text or '').strip()))
+        else:
+            candidates = _find_products(_microdata_item(node))
+        for candidate in candidates:
+            fields = _map_product(candidate)
+            # Related products on the same page are not merged into this one
+            if any(key in product and key in fields and product[key] != fields[key] for key in _IDENTITY_FIELDS):
+                continue
+            for name, value in fields.items():
+                product.setdefault(name, value)
+    return product
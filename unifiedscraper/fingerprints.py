@@ -0,0 +1,209 @@
+import hashlib
+import json
+import sqlite3
+import time
+from dataclasses import asdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+from unifiedscraper.items import SeenItem
+from unifiedscraper.utils import feed_uri_params
+
+
+class FingerprintStore:
+    """
+    Per-site SQLite record of the product pages seen by previous runs
+
+    For every product URL the store keeps when it was last seen, when its
+    content last changed, a hash of the extracted item and the ETag and
+    Last-Modified validators the server sent. The listing pass uses it to
+    send conditional requests (If-None-Match / If-Modified-Since), or to
+    skip pages confirmed within ``skip_hours`` altogether, and the product
+    pass to tell a changed item from one that only needs a "still seen"
+    record. The hash of a changed item is only recorded once the item was
+    exported (see BaseScraper.store_fingerprints), so a product dropped or
+    lost with a failed batch is exported again next time. Price sweeps also keep a hash of each product's listing tile, to
+    only open the product pages whose tile changed.
+
+    Writes are committed every ``commit_every`` updates and on close, so a
+    killed batch loses at most that many fingerprints (the pages are then
+    simply fetched again next time).
+    """
+
+    def __init__(self, path, skip_hours=0, commit_every=100):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.skip_seconds = skip_hours * 3600
+        self.commit_every = commit_every
+        self._pending = 0
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.execute('''
+            CREATE TABLE IF NOT EXISTS products (
+                url TEXT PRIMARY KEY,
+                content_hash TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                last_seen REAL NOT NULL,
+                last_changed REAL NOT NULL,
+                listing_hash TEXT
+            )''')
+        # Stores created before the price sweep have no listing_hash column
+        columns = {row[1] for row in self.connection.execute('PRAGMA table_info(products)')}
+        if 'listing_hash' not in columns:
+            self.connection.execute('ALTER TABLE products ADD COLUMN listing_hash TEXT')
+        self.connection.commit()
+
+    @classmethod
+    def from_settings(cls, settings, spider_name):
+        """
+        Open the store of a spider, or return None when incremental crawling is off
+
+        Args:
+            settings: Crawler settings (INCREMENTAL_ENABLED, INCREMENTAL_STATE_DIR,
+                INCREMENTAL_SKIP_HOURS)
+            spider_name (str): Name of the spider, used for the file name
+
+        Returns:
+            FingerprintStore: The open store, or None
+        """
+        if not settings.getbool('INCREMENTAL_ENABLED'):
+            return None
+        path = Path(settings.get('INCREMENTAL_STATE_DIR', 'state')) / f'{spider_name}.sqlite'
+        return cls(path, skip_hours=settings.getfloat('INCREMENTAL_SKIP_HOURS', 0))
+
+    def get(self, url):
+        """Return the stored record of a URL as a dict, or None if it was never seen"""
+        row = self.connection.execute(
+            'SELECT content_hash, etag, last_modified, last_seen, last_changed, listing_hash '
+            'FROM products WHERE url = ?', (url,)).fetchone()
+        if row is None:
+            return None
+        return dict(zip(('content_hash', 'etag', 'last_modified', 'last_seen', 'last_changed', 'listing_hash'), row))
+
+    def is_fresh(self, record):
+        """Whether a page was confirmed recently enough not to be requested at all"""
+        return bool(record and self.skip_seconds and time.time() - record['last_seen'] < self.skip_seconds)
+
+    @staticmethod
+    def conditional_headers(record):
+        """If-None-Match / If-Modified-Since headers from a stored record"""
+        headers = {}
+        if record and record['etag']:
+            headers['If-None-Match'] = record['etag']
+        if record and record['last_modified']:
+            headers['If-Modified-Since'] = record['last_modified']
+        return headers
+
+    @staticmethod
+    def item_hash(item):
+        """Stable hash of an item's fields (a ProductItem or a dict), independent of the page markup"""
+        data = json.dumps(item if isinstance(item, dict) else asdict(item),
+                          sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.blake2b(data.encode('utf-8'), digest_size=16).hexdigest()
+
+    def touch(self, url, listing_hash=None):
+        """Record that a page is still listed and unchanged"""
+        self.connection.execute(
+            'UPDATE products SET last_seen = ?, listing_hash = COALESCE(?, listing_hash) WHERE url = ?',
+            (time.time(), listing_hash, url))
+        self._written()
+
+    def has_changed(self, url, content_hash):
+        """Whether a product is new or its item hash differs from the stored one"""
+        previous = self.get(url)
+        return previous is None or previous['content_hash'] != content_hash
+
+    def record(self, url, content_hash, headers=None, listing_hash=None):
+        """
+        Store the fingerprint of a fetched product page
+
+        Args:
+            url (str): Product URL as followed from the listing
+            content_hash (str): item_hash of the extracted product
+            headers: Response headers, for the ETag and Last-Modified validators
+            listing_hash (str): Hash of the product's listing tile, in price sweeps
+        """
+        etag = last_modified = None
+        if headers is not None:
+            etag = headers.get('ETag')
+            last_modified = headers.get('Last-Modified')
+            etag = etag.decode('latin-1') if isinstance(etag, bytes) else etag
+            last_modified = last_modified.decode('latin-1') if isinstance(last_modified, bytes) else last_modified
+
+        now = time.time()
+        self.connection.execute('''
+            INSERT INTO products (url, content_hash, etag, last_modified, last_seen, last_changed, listing_hash)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(url) DO UPDATE SET
+                content_hash = excluded.content_hash,
+                etag = excluded.etag,
+                last_modified = excluded.last_modified,
+                last_seen = excluded.last_seen,
+                last_changed = CASE WHEN products.content_hash = excluded.content_hash
+                                    THEN products.last_changed ELSE excluded.last_changed END,
+                listing_hash = COALESCE(excluded.listing_hash, products.listing_hash)''',
+            (url, content_hash, etag, last_modified, now, now, listing_hash))
+        self._written()
+
+    def _written(self):
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self.connection.commit()
+            self._pending = 0
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+
+
+class SeenLog:
+    """
+    JSON-lines file of the "still seen" records of unchanged products
+
+    The records are written here directly rather than yielded as items, so
+    they neither count as scraped items nor use up CLOSESPIDER_ITEMCOUNT.
+    The file is created on the first record, at INCREMENTAL_SEEN_URI filled
+    in like a feed URI (%(name)s, %(time)s and the date and batch of feed_uri_params).
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.file = None
+
+    @classmethod
+    def from_settings(cls, settings, spider):
+        """
+        Args:
+            settings: Crawler settings (INCREMENTAL_SEEN_URI)
+            spider (scrapy.Spider): The spider whose records are written
+
+        Returns:
+            SeenLog: The log, or None when INCREMENTAL_SEEN_URI is empty
+        """
+        uri = settings.get('INCREMENTAL_SEEN_URI')
+        if not uri:
+            return None
+        params = {'name': spider.name,
+                  'time': datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace(':', '-')}
+        return cls(uri % feed_uri_params(params, spider))
+
+    def write(self, url, status):
+        """
+        Record an unchanged product
+
+        Args:
+            url (str): Product URL as followed from the listing
+            status (str): 'unchanged', 'not_modified' or 'skipped' (see SeenItem)
+        """
+        if self.file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.file = open(self.path, 'a', encoding='utf-8')
+        record = SeenItem(ProductURL=url, status=status,
+                          seen_at=datetime.now(timezone.utc).isoformat(timespec='seconds'))
+        self.file.write(json.dumps(asdict(record), ensure_ascii=False) + '\n')
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
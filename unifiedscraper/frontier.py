@@ -0,0 +1,294 @@
+import os
+import pickle
+import socket
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+from scrapy.utils.misc import load_object
+from scrapy.utils.request import request_from_dict
+
+
+class SQLiteFrontier:
+    """
+    Per-site request queue shared by every worker crawling the site
+
+    One SQLite file holds every request the site's crawl has discovered, keyed
+    by request fingerprint, so a URL found by two workers is queued once.
+    ``pop`` leases a request to one worker until it is acknowledged; a lease
+    that is neither acknowledged nor released within ``lease_seconds`` (the
+    worker died or hung) is handed to the next worker asking, at most
+    ``max_attempts`` times.
+
+    Other backends (e.g. Redis) only need the same methods and a
+    ``from_settings(settings, spider_name, worker)`` constructor; they are
+    selected with FRONTIER_BACKEND.
+
+    WAL journaling only works between processes of one machine: on a volume
+    shared between machines set FRONTIER_SQLITE_JOURNAL to 'DELETE'.
+    """
+
+    def __init__(self, path, worker, lease_seconds=300, max_attempts=3, journal_mode='WAL'):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.worker = worker
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        # Autocommit: every method runs its own short transaction
+        self.connection = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        self.connection.execute(f'PRAGMA journal_mode={journal_mode}')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.execute('''
+            CREATE TABLE IF NOT EXISTS requests (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                key TEXT NOT NULL UNIQUE,
+                data BLOB NOT NULL,
+                priority INTEGER NOT NULL,
+                state TEXT NOT NULL,
+                worker TEXT,
+                lease_until REAL,
+                attempts INTEGER NOT NULL DEFAULT 0
+            )''')
+        self.connection.execute(
+            'CREATE INDEX IF NOT EXISTS requests_queue ON requests (state, priority DESC, id DESC)')
+
+    @classmethod
+    def from_settings(cls, settings, spider_name, worker):
+        """
+        Open the frontier of a spider
+
+        Args:
+            settings: Crawler settings (FRONTIER_DIR, FRONTIER_LEASE_SECONDS,
+                FRONTIER_MAX_ATTEMPTS, FRONTIER_SQLITE_JOURNAL)
+            spider_name (str): Name of the spider, used for the file name
+            worker (str): Unique name of this worker
+
+        Returns:
+            SQLiteFrontier: The open frontier
+        """
+        path = Path(settings.get('FRONTIER_DIR', 'crawls/frontier')) / f'{spider_name}.sqlite'
+        return cls(path, worker,
+                   lease_seconds=settings.getfloat('FRONTIER_LEASE_SECONDS', 300),
+                   max_attempts=settings.getint('FRONTIER_MAX_ATTEMPTS', 3),
+                   journal_mode=settings.get('FRONTIER_SQLITE_JOURNAL', 'WAL'))
+
+    @contextmanager
+    def _transaction(self):
+        # IMMEDIATE takes the write lock up front, so two workers never lease the same row
+        self.connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield
+        except BaseException:
+            self.connection.execute('ROLLBACK')
+            raise
+        self.connection.execute('COMMIT')
+
+    def _live(self):
+        """SQL condition of the requests still to be crawled, by anyone"""
+        return ("(state = 'pending' OR (state = 'leased' AND (lease_until >= ? OR attempts < ?)))",
+                (time.time(), self.max_attempts))
+
+    def reset_if_drained(self):
+        """Start a new crawl when the previous one has nothing left to do"""
+        condition, params = self._live()
+        with self._transaction():
+            if self.connection.execute(f'SELECT 1 FROM requests WHERE {condition} LIMIT 1', params).fetchone() is None:
+                self.connection.execute('DELETE FROM requests')
+
+    def push(self, key, data, priority, requeue=False):
+        """
+        Queue a request unless a worker already queued the same one
+
+        Args:
+            key (str): Request fingerprint
+            data (bytes): Serialized request
+            priority (int): Request priority, higher first
+            requeue (bool): Queue the request again if this worker already
+                leased it (a retry, or a page rendered again)
+
+        Returns:
+            bool: True if the request was queued
+        """
+        with self._transaction():
+            if requeue:
+                cursor = self.connection.execute(
+                    "UPDATE requests SET state = 'pending', data = ?, priority = ?, worker = NULL, lease_until = NULL "
+                    "WHERE key = ? AND worker = ?", (data, priority, key, self.worker))
+                if cursor.rowcount:
+                    return True
+            cursor = self.connection.execute(
+                "INSERT OR IGNORE INTO requests (key, data, priority, state) VALUES (?, ?, ?, 'pending')",
+                (key, data, priority))
+            return cursor.rowcount == 1
+
+    def pop(self):
+        """
+        Lease the next request to this worker
+
+        Returns:
+            tuple: (key, data) of the request, or None when nothing is available
+        """
+        now = time.time()
+        with self._transaction():
+            row = self.connection.execute(
+                "SELECT id, key, data FROM requests "
+                "WHERE state = 'pending' OR (state = 'leased' AND lease_until < ? AND attempts < ?) "
+                "ORDER BY priority DESC, id DESC LIMIT 1", (now, self.max_attempts)).fetchone()
+            if row is None:
+                return None
+            self.connection.execute(
+                "UPDATE requests SET state = 'leased', worker = ?, lease_until = ?, attempts = attempts + 1 "
+                "WHERE id = ?", (self.worker, now + self.lease_seconds, row[0]))
+            return row[1], row[2]
+
+    def ack(self, keys):
+        """Mark requests leased by this worker as crawled"""
+        with self._transaction():
+            self.connection.executemany(
+                "UPDATE requests SET state = 'done', lease_until = NULL "
+                "WHERE key = ? AND worker = ? AND state = 'leased'",
+                [(key, self.worker) for key in keys])
+
+    def release(self):
+        """Hand the requests leased by this worker back to the queue, without counting an attempt"""
+        self.connection.execute(
+            "UPDATE requests SET state = 'pending', worker = NULL, lease_until = NULL, attempts = attempts - 1 "
+            "WHERE worker = ? AND state = 'leased'", (self.worker,))
+
+    def pending(self):
+        """Whether any worker may still crawl something"""
+        condition, params = self._live()
+        return self.connection.execute(f'SELECT 1 FROM requests WHERE {condition} LIMIT 1', params).fetchone() is not None
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM requests WHERE state = 'pending'").fetchone()[0]
+
+    def close(self):
+        self.connection.close()
+
+
+class FrontierScheduler:
+    """
+    Scheduler pulling a site's requests from a frontier shared between workers
+
+    Any number of processes, on one or several machines, can crawl the same
+    site: each request is crawled by one worker, whichever discovered it.
+    A request is acknowledged once it has left both the downloader and the
+    scraper, i.e. once the requests found on its page are in the frontier, so
+    the frontier never looks finished while a worker may still add to it.
+    On close, requests still in flight are handed back for the other workers.
+
+    Scrapy has no public API for what the engine is working on or for waking
+    it up; ``in_flight`` and ``wake_engine`` read engine internals of Scrapy
+    2.13 when they exist and fall back to slower but correct behaviour.
+    """
+
+    def __init__(self, crawler, backend_cls):
+        self.crawler = crawler
+        self.backend_cls = backend_cls
+        self.stats = crawler.stats
+        self.worker = f'{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}'
+        self.frontier = None
+        self.spider = None
+        # Requests this worker leased and has not acknowledged yet, by key
+        self.leased = {}
+        self.poll_seconds = crawler.settings.getfloat('FRONTIER_POLL_SECONDS', 0.5)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler, load_object(crawler.settings.get('FRONTIER_BACKEND',
+                                                             'unifiedscraper.frontier.SQLiteFrontier')))
+
+    def open(self, spider):
+        self.spider = spider
+        self.frontier = self.backend_cls.from_settings(self.crawler.settings, spider.name, self.worker)
+        self.frontier.reset_if_drained()
+
+    def close(self, reason):
+        self.ack_finished(closing=True)
+        self.frontier.release()
+        # Requests left for any worker, as StatefulScheduler counts its queues
+        self.stats.set_value('scheduler/pending', len(self.frontier), spider=self.spider)
+        self.frontier.close()
+
+    def in_flight(self):
+        """
+        Requests the engine is downloading or parsing
+
+        Returns:
+            set: The requests, or None if this Scrapy does not expose them
+                (``Downloader.active`` and ``Scraper.slot.active``, Scrapy 2.13)
+        """
+        engine = self.crawler.engine
+        downloading = getattr(engine.downloader, 'active', None)
+        parsing = getattr(getattr(engine.scraper, 'slot', None), 'active', None)
+        if downloading is None or parsing is None:
+            return None
+        return downloading | parsing
+
+    def wake_engine(self, delay):
+        """
+        Have the engine ask for the next request in ``delay`` seconds
+
+        Uses the engine's ``_slot.nextcall`` (Scrapy 2.13); without it the
+        engine still asks at its own heartbeat, every 5 seconds.
+        """
+        nextcall = getattr(getattr(self.crawler.engine, '_slot', None), 'nextcall', None)
+        if nextcall is not None:
+            nextcall.schedule(delay)
+
+    def ack_finished(self, closing=False):
+        """
+        Acknowledge the leased requests that are neither downloading nor being parsed
+
+        Args:
+            closing (bool): The engine is closing; without ``in_flight``, every
+                leased request is then taken as finished
+        """
+        in_flight = self.in_flight()
+        if in_flight is None:
+            if not closing:
+                return
+            in_flight = set()
+        finished = [key for key, request in self.leased.items() if request not in in_flight]
+        if finished:
+            self.frontier.ack(finished)
+            for key in finished:
+                del self.leased[key]
+
+    def has_pending_requests(self):
+        self.ack_finished()
+        return self.frontier.pending()
+
+    def enqueue_request(self, request):
+        key = self.crawler.request_fingerprinter.fingerprint(request).hex()
+        data = pickle.dumps(request.to_dict(spider=self.spider), protocol=4)
+        # Start requests and other dont_filter requests are still queued once
+        # per crawl across workers; only retries and requests flagged
+        # frontier_requeue (a page rendered again) go back to the queue
+        retry = request.dont_filter and ('retry_times' in request.meta or request.meta.get('frontier_requeue'))
+        if not self.frontier.push(key, data, request.priority, requeue=retry):
+            self.stats.inc_value('dupefilter/filtered', spider=self.spider)
+            return False
+        self.stats.inc_value('scheduler/enqueued', spider=self.spider)
+        return True
+
+    def next_request(self):
+        self.ack_finished()
+        leased = self.frontier.pop()
+        if leased is None:
+            if self.frontier.pending():
+                # Other workers are still crawling and may queue more: ask again
+                # soon rather than at the engine's next 5s heartbeat
+                self.wake_engine(self.poll_seconds)
+            return None
+        key, data = leased
+        request = request_from_dict(pickle.loads(data), spider=self.spider)
+        self.leased[key] = request
+        self.stats.inc_value('scheduler/dequeued', spider=self.spider)
+        return request
+
+    def __len__(self):
+        return len(self.frontier)
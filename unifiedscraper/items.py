@@ -3,10 +3,164 @@
 # See documentation in:
 # https://docs.scrapy.org/en/latest/topics/items.html
 
+import json
+from dataclasses import InitVar, dataclass
+from typing import List, Optional
+
+import pyarrow as pa
 import scrapy
 
+from unifiedscraper.prices import parse_price
+
 
 class UnifiedscraperItem(scrapy.Item):
     # define the fields for your item here like:
     # name = scrapy.Field()
     pass
+
+
+# Columns written by every spider, in output order
+PRODUCT_SCHEMA = pa.schema([
+    pa.field('Brand', pa.string()),
+    pa.field('ProductName', pa.string()),
+    pa.field('ProductImage', pa.string()),
+    pa.field('ProductColor', pa.string()),
+    pa.field('ProductColorCode', pa.string()),
+    pa.field('ProductCode', pa.string()),
+    pa.field('sku', pa.string()),
+    pa.field('WebCode', pa.string()),
+    pa.field('Category', pa.string()),
+    pa.field('Department', pa.string()),
+    pa.field('Collection', pa.string()),
+    pa.field('CurrentPrice', pa.float64()),
+    pa.field('OriginalPrice', pa.float64()),
+    pa.field('PriceCurrency', pa.string()),
+    pa.field('AvailableSizes', pa.list_(pa.string())),
+    pa.field('StockAvailability', pa.string()),
+    pa.field('Description', pa.string()),
+    pa.field('Attributes', pa.string()),
+    pa.field('ProductURL', pa.string()),
+])
+
+PRODUCT_FIELD_NAMES = frozenset(PRODUCT_SCHEMA.names)
+
+# Keys some spiders use for a canonical field
+FIELD_ALIASES = {
+    'ProductLink': 'ProductURL',
+    'Color': 'ProductColor',
+    'ProductCurrency': 'PriceCurrency',
+    'Availability': 'StockAvailability',
+    'StockStatus': 'StockAvailability',
+    'SkuCode': 'sku',
+}
+
+
+def _to_string(value):
+    """Strings stay as they are; dicts and lists become JSON, anything else str()."""
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (dict, list, tuple)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def _to_float(value, locale=None):
+    if value is None or value == '':
+        return None
+    if isinstance(value, str):
+        # Raw price text such as '1.234,50 €'
+        return parse_price(value, locale=locale)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_string_list(value):
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return [_to_string(v) for v in value if v is not None]
+    return [_to_string(value)]
+
+
+@dataclass(slots=True)
+class ProductItem:
+    """A product as stored in the output, with the types of ``PRODUCT_SCHEMA``.
+
+    Values are coerced on creation: prices to float (or None, price text is
+    parsed with ``prices.parse_price`` in the site's ``price_locale``), ``AvailableSizes``
+    to a list of strings ("One Size" becomes ["One Size"]) and dicts or lists in
+    string fields such as ``Description`` to JSON. Keys a spider yields that are
+    not columns are kept, JSON encoded, in ``Attributes``.
+    """
+    Brand: Optional[str] = None
+    ProductName: Optional[str] = None
+    ProductImage: Optional[str] = None
+    ProductColor: Optional[str] = None
+    ProductColorCode: Optional[str] = None
+    ProductCode: Optional[str] = None
+    sku: Optional[str] = None
+    WebCode: Optional[str] = None
+    Category: Optional[str] = None
+    Department: Optional[str] = None
+    Collection: Optional[str] = None
+    CurrentPrice: Optional[float] = None
+    OriginalPrice: Optional[float] = None
+    PriceCurrency: Optional[str] = None
+    AvailableSizes: Optional[List[str]] = None
+    StockAvailability: Optional[str] = None
+    Description: Optional[str] = None
+    Attributes: Optional[str] = None
+    ProductURL: Optional[str] = None
+    # Locale of price text such as '1.234' (not a field, see prices.parse_price)
+    price_locale: InitVar[Optional[str]] = None
+
+    def __post_init__(self, price_locale):
+        for name in PRODUCT_FIELD_NAMES:
+            value = getattr(self, name)
+            if name in ('CurrentPrice', 'OriginalPrice'):
+                setattr(self, name, _to_float(value, price_locale))
+            elif name == 'AvailableSizes':
+                setattr(self, name, _to_string_list(value))
+            else:
+                setattr(self, name, _to_string(value))
+
+    @classmethod
+    def from_dict(cls, data, price_locale=None):
+        """
+        Build a ProductItem from the dict a spider yielded
+
+        Args:
+            data (dict): Scraped product, possibly with aliased or site-specific keys
+            price_locale (str): The site's price_locale, for prices given as text
+
+        Returns:
+            ProductItem: The typed product
+        """
+        values = {}
+        attributes = {}
+        for key, value in data.items():
+            name = FIELD_ALIASES.get(key, key)
+            if name in PRODUCT_FIELD_NAMES:
+                if values.get(name) is None:
+                    values[name] = value
+            else:
+                attributes[key] = value
+        if attributes:
+            values['Attributes'] = attributes
+        return cls(**values, price_locale=price_locale)
+
+
+@dataclass(slots=True)
+class SeenItem:
+    """A product page still listed by its site but unchanged since the previous run.
+
+    Incremental runs (see ``fingerprints.py``) write these to their own
+    JSON-lines file (INCREMENTAL_SEEN_URI) instead of exporting a full
+    ProductItem, so the product output only holds new and changed products.
+    """
+    ProductURL: str
+    # 'unchanged' (same content), 'not_modified' (HTTP 304) or 'skipped' (not requested)
+    status: str
+    seen_at: str
@@ -0,0 +1,256 @@
+import bisect
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from scrapy.utils.reactor import listen_tcp
+from twisted.internet import task
+from twisted.web.resource import Resource
+from twisted.web.server import Site
+
+# Seconds: covers a fast parse (0.5ms) up to a slow download (30s)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def escape(value):
+    """Label value quoted for the Prometheus text format"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Histogram:
+    """Cumulative-bucket histogram of one labelled series, as in Prometheus"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """
+        Estimate a quantile by linear interpolation inside its bucket, at most the maximum
+
+        Args:
+            q (float): Quantile between 0 and 1
+
+        Returns:
+            float: The estimate, or None without observations
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                if index == len(self.buckets):
+                    return self.max
+                lower = self.buckets[index - 1] if index else 0.0
+                return min(self.max, lower + (self.buckets[index] - lower) * (rank - seen) / count)
+            seen += count
+        return self.max
+
+
+class MetricsRegistry:
+    """
+    Counters, gauges and histograms of the crawl, keyed by name and labels
+
+    Everything is updated and read in the reactor thread, so there is no
+    locking. ``render`` produces the Prometheus text format served by
+    MetricsExtension; ``summary`` flattens the same numbers into stats keys.
+    """
+
+    def __init__(self):
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self.help = {}
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def describe(self, name, text):
+        self.help[name] = text
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        self.gauges[self._key(name, labels)] = value
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        histogram.observe(value)
+
+    def clear(self):
+        self.counters.clear()
+        self.gauges.clear()
+        self.histograms.clear()
+
+    @staticmethod
+    def _labels(labels, extra=()):
+        pairs = [f'{name}="{escape(value)}"' for name, value in (*labels, *extra)]
+        return '{' + ','.join(pairs) + '}' if pairs else ''
+
+    def render(self):
+        """Every metric in the Prometheus text exposition format"""
+        lines = []
+        for kind, series in (('counter', self.counters), ('gauge', self.gauges)):
+            for name in sorted({name for name, _ in series}):
+                if name in self.help:
+                    lines.append(f'# HELP {name} {self.help[name]}')
+                lines.append(f'# TYPE {name} {kind}')
+                for (series_name, labels), value in sorted(series.items()):
+                    if series_name == name:
+                        lines.append(f'{name}{self._labels(labels)} {value}')
+        for name in sorted({name for name, _ in self.histograms}):
+            if name in self.help:
+                lines.append(f'# HELP {name} {self.help[name]}')
+            lines.append(f'# TYPE {name} histogram')
+            for (series_name, labels), histogram in sorted(self.histograms.items(), key=lambda kv: kv[0]):
+                if series_name != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip((*histogram.buckets, '+Inf'), histogram.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{self._labels(labels, [("le", bound)])} {cumulative}')
+                lines.append(f'{name}_sum{self._labels(labels)} {histogram.sum}')
+                lines.append(f'{name}_count{self._labels(labels)} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def summary(self):
+        """
+        Flat view of the metrics for the crawl stats
+
+        Counters and gauges keep their value; histograms give their count,
+        sum, p50 and p95. Labels become path segments, e.g.
+        ``metrics/callback_cpu_seconds/parse_product_page/p95``.
+
+        Returns:
+            dict: Stats key to value
+        """
+        flat = {}
+        for (name, labels), value in (*self.counters.items(), *self.gauges.items()):
+            flat['/'.join(['metrics', name, *(str(value) for _, value in labels)])] = value
+        for (name, labels), histogram in self.histograms.items():
+            prefix = '/'.join(['metrics', name, *(str(value) for _, value in labels)])
+            flat[f'{prefix}/count'] = histogram.count
+            flat[f'{prefix}/sum'] = round(histogram.sum, 6)
+            flat[f'{prefix}/p50'] = round(histogram.quantile(0.5), 6)
+            flat[f'{prefix}/p95'] = round(histogram.quantile(0.95), 6)
+        return flat
+
+
+# Shared by the middlewares, the exporters and the extension of the crawl;
+# one process runs one crawl (run_spider.py starts scrapy per batch)
+REGISTRY = MetricsRegistry()
+REGISTRY.describe('callback_cpu_seconds', 'CPU seconds spent in a spider callback per response')
+REGISTRY.describe('callback_items_total', 'Items emitted by a spider callback')
+REGISTRY.describe('callback_requests_total', 'Requests emitted by a spider callback')
+REGISTRY.describe('download_latency_seconds', 'Seconds from sending a request to receiving the response headers')
+REGISTRY.describe('download_bytes_in_total', 'Response bytes received, headers and body as downloaded')
+REGISTRY.describe('download_bytes_out_total', 'Request bytes sent, headers and body')
+REGISTRY.describe('download_responses_total', 'Responses received, by domain and status')
+REGISTRY.describe('download_exceptions_total', 'Downloads that failed, by domain and exception')
+REGISTRY.describe('scheduler_queue_depth', 'Requests waiting in the scheduler')
+REGISTRY.describe('scheduler_queue_depth_max', 'Most requests that waited in the scheduler at once')
+REGISTRY.describe('downloader_active', 'Requests being downloaded')
+REGISTRY.describe('scraper_active', 'Responses being parsed')
+REGISTRY.describe('exporter_flush_seconds', 'Seconds spent writing a batch of exported items')
+
+
+class MetricsExtension:
+    """
+    Serve the crawl's metrics on a local endpoint and add them to the stats
+
+    With METRICS_ENABLED, queue depths are sampled every
+    METRICS_SAMPLE_SECONDS and the registry is served as Prometheus text at
+    ``http://METRICS_HOST:<port>/metrics``, on the first free port of the
+    METRICS_PORT range (an empty range only samples). When the spider closes,
+    ``MetricsRegistry.summary`` is written to the stats, so the final stats
+    dump of every run carries the same numbers for comparison.
+    """
+
+    def __init__(self, crawler):
+        settings = crawler.settings
+        if not settings.getbool('METRICS_ENABLED'):
+            raise NotConfigured
+        self.crawler = crawler
+        self.registry = REGISTRY
+        # '-s METRICS_PORT=' on the command line gives [''], i.e. do not serve
+        self.portrange = [int(port) for port in settings.getlist('METRICS_PORT') if str(port).strip()]
+        self.host = settings.get('METRICS_HOST', '127.0.0.1')
+        self.interval = settings.getfloat('METRICS_SAMPLE_SECONDS', 5.0)
+        self.port = None
+        self.sampler = None
+        crawler.signals.connect(self.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(self.spider_closed, signal=signals.spider_closed)
+        # Feeds are closed by another spider_closed handler, maybe after this one
+        crawler.signals.connect(self.write_stats, signal=signals.feed_exporter_closed)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler)
+
+    def spider_opened(self, spider):
+        self.registry.clear()
+        self.sampler = task.LoopingCall(self.sample)
+        self.sampler.start(self.interval, now=True)
+        if self.portrange:
+            self.port = listen_tcp(self.portrange, self.host, Site(MetricsResource(self)))
+            address = self.port.getHost()
+            spider.logger.info(f"Metrics on http://{address.host}:{address.port}/metrics")
+
+    def spider_closed(self, spider):
+        if self.sampler is not None and self.sampler.running:
+            self.sampler.stop()
+        if self.port is not None:
+            self.port.stopListening()
+        self.sample()
+        self.write_stats()
+
+    def write_stats(self):
+        """Copy the summary of the metrics to the crawl stats"""
+        for key, value in sorted(self.registry.summary().items()):
+            self.crawler.stats.set_value(key, value)
+
+    def sample(self):
+        """Record the queue depths of the engine"""
+        engine = self.crawler.engine
+        slot = getattr(engine, '_slot', None)
+        if slot is None:
+            return
+        depth = len(slot.scheduler)
+        self.registry.set('scheduler_queue_depth', depth)
+        deepest = self.registry.gauges.get(('scheduler_queue_depth_max', ()), 0)
+        self.registry.set('scheduler_queue_depth_max', max(deepest, depth))
+        self.registry.set('downloader_active', len(engine.downloader.active))
+        self.registry.set('scraper_active', len(engine.scraper.slot.active))
+
+
+class MetricsResource(Resource):
+    """``/metrics`` page of MetricsExtension"""
+
+    isLeaf = True
+
+    def __init__(self, extension):
+        super().__init__()
+        self.extension = extension
+
+    def render_GET(self, request):
+        if request.path.rstrip(b'/') not in (b'', b'/metrics'):
+            request.setResponseCode(404)
+            return b''
+        self.extension.sample()
+        request.setHeader(b'Content-Type', b'text/plain; version=0.0.4; charset=utf-8')
+        return self.extension.registry.render().encode('utf-8')
@@ -7,99 +7,136 @@ from scrapy import signals
 
 # useful for handling different item types with a single interface
 from itemadapter import ItemAdapter
+import json
 import random
+import time
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from scrapy import Request
+from scrapy.downloadermiddlewares.stats import get_header_size, get_status_size
 from scrapy.downloadermiddlewares.useragent import UserAgentMiddleware
+from scrapy.exceptions import IgnoreRequest, NotConfigured
+from scrapy.utils.httpobj import urlparse_cached
+
+from unifiedscraper.metrics import REGISTRY
 
 
 class UnifiedscraperSpiderMiddleware:
-    # Not all methods need to be defined. If a method is not defined,
-    # scrapy acts as if the spider middleware does not modify the
-    # passed objects.
+    """
+    CPU time and output of every spider callback
+
+    Sits next to the spider (highest order), so the ``result`` it wraps is the
+    callback's own generator: the CPU time spent producing each element is
+    the callback's work, not that of other middlewares. Recorded per callback
+    name: CPU seconds per response (histogram), items and requests emitted.
+    """
+
+    def __init__(self, registry):
+        self.registry = registry
 
     @classmethod
     def from_crawler(cls, crawler):
-        # This method is used by Scrapy to create your spiders.
-        s = cls()
-        crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
-        return s
+        if not crawler.settings.getbool('METRICS_ENABLED'):
+            raise NotConfigured
+        return cls(REGISTRY)
 
-    def process_spider_input(self, response, spider):
-        # Called for each response that goes through the spider
-        # middleware and into the spider.
+    @staticmethod
+    def _callback_name(response, spider):
+        callback = response.request.callback if response.request is not None else None
+        return getattr(callback, '__name__', None) or 'parse'
 
-        # Should return None or raise an exception.
-        return None
+    def _record(self, name, cpu_seconds, items, requests):
+        self.registry.observe('callback_cpu_seconds', cpu_seconds, callback=name)
+        if items:
+            self.registry.inc('callback_items_total', items, callback=name)
+        if requests:
+            self.registry.inc('callback_requests_total', requests, callback=name)
 
     def process_spider_output(self, response, result, spider):
-        # Called with the results returned from the Spider, after
-        # it has processed the response.
+        name = self._callback_name(response, spider)
+        cpu_seconds, items, requests = 0.0, 0, 0
+        result = iter(result)
+        try:
+            while True:
+                started = time.process_time()
+                try:
+                    element = next(result)
+                except StopIteration:
+                    break
+                finally:
+                    cpu_seconds += time.process_time() - started
+                if isinstance(element, Request):
+                    requests += 1
+                else:
+                    items += 1
+                yield element
+        finally:
+            self._record(name, cpu_seconds, items, requests)
 
-        # Must return an iterable of Request, or item objects.
-        for i in result:
-            yield i
+    async def process_spider_output_async(self, response, result, spider):
+        # Time spent awaiting downloads made by an async callback is not CPU time
+        name = self._callback_name(response, spider)
+        cpu_seconds, items, requests = 0.0, 0, 0
+        result = result.__aiter__()
+        try:
+            while True:
+                started = time.process_time()
+                try:
+                    element = await result.__anext__()
+                except StopAsyncIteration:
+                    break
+                finally:
+                    cpu_seconds += time.process_time() - started
+                if isinstance(element, Request):
+                    requests += 1
+                else:
+                    items += 1
+                yield element
+        finally:
+            self._record(name, cpu_seconds, items, requests)
 
-    def process_spider_exception(self, response, exception, spider):
-        # Called when a spider or process_spider_input() method
-        # (from other spider middleware) raises an exception.
 
-        # Should return either None or an iterable of Request or item objects.
-        pass
-
-    async def process_start(self, start):
-        # Called with an async iterator over the spider start() method or the
-        # maching method of an earlier spider middleware.
-        async for item_or_request in start:
-            yield item_or_request
-
-    def spider_opened(self, spider):
-        spider.logger.info("Spider opened: %s" % spider.name)
+class UnifiedscraperDownloaderMiddleware:
+    """
+    Per-domain download latency, bytes and outcomes
 
+    Sits next to the downloader, below HttpCompressionMiddleware, so byte
+    counts are what went over the wire. Latency is Scrapy's
+    ``download_latency`` (request sent to response headers received).
+    """
 
-class UnifiedscraperDownloaderMiddleware:
-    # Not all methods need to be defined. If a method is not defined,
-    # scrapy acts as if the downloader middleware does not modify the
-    # passed objects.
+    def __init__(self, registry):
+        self.registry = registry
 
     @classmethod
     def from_crawler(cls, crawler):
-        # This method is used by Scrapy to create your spiders.
-        s = cls()
-        crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
-        return s
+        if not crawler.settings.getbool('METRICS_ENABLED'):
+            raise NotConfigured
+        return cls(REGISTRY)
+
+    @staticmethod
+    def _domain(request):
+        return urlparse_cached(request).hostname or ''
 
     def process_request(self, request, spider):
-        # Called for each request that goes through the downloader
-        # middleware.
-
-        # Must either:
-        # - return None: continue processing this request
-        # - or return a Response object
-        # - or return a Request object
-        # - or raise IgnoreRequest: process_exception() methods of
-        #   installed downloader middleware will be called
+        size = len(request.body) + get_header_size(request.headers) + len(request.url) + 16
+        self.registry.inc('download_bytes_out_total', size, domain=self._domain(request))
         return None
 
     def process_response(self, request, response, spider):
-        # Called with the response returned from the downloader.
-
-        # Must either;
-        # - return a Response object
-        # - return a Request object
-        # - or raise IgnoreRequest
+        domain = self._domain(request)
+        latency = request.meta.get('download_latency')
+        if latency is not None:
+            self.registry.observe('download_latency_seconds', latency, domain=domain)
+        size = len(response.body) + get_header_size(response.headers) + get_status_size(response.status)
+        self.registry.inc('download_bytes_in_total', size, domain=domain)
+        self.registry.inc('download_responses_total', domain=domain, status=response.status)
         return response
 
     def process_exception(self, request, exception, spider):
-        # Called when a download handler or a process_request()
-        # (from other downloader middleware) raises an exception.
-
-        # Must either:
-        # - return None: continue processing this exception
-        # - return a Response object: stops process_exception() chain
-        # - return a Request object: stops process_exception() chain
-        pass
-
-    def spider_opened(self, spider):
-        spider.logger.info("Spider opened: %s" % spider.name)
+        self.registry.inc('download_exceptions_total', domain=self._domain(request),
+                          exception=type(exception).__name__)
+        return None
 
 class RandomUserAgentMiddleware(UserAgentMiddleware):
     def __init__(self, user_agent=''):
@@ -157,3 +194,223 @@ class RandomHeadersMiddleware:
         request.headers['Accept'] = random.choice(accept_headers)
         
         return None
+
+
+class SlotController:
+    """
+    AIMD concurrency and delay of one download slot (one host)
+
+    Downloads are judged in windows of ``window`` responses. A window with
+    acceptable latency and errors raises the limits additively: first the
+    delay is halved down to ``min_delay``, then the concurrency grows by one
+    up to ``ceiling``. A window whose mean latency exceeds ``latency_factor``
+    times the slot's usual latency, or whose error rate exceeds
+    ``max_error_rate``, halves the concurrency down to ``floor`` and, once
+    there, doubles the delay. A 429 or 503 response does so at once and
+    respects its Retry-After. Answers to requests sent before a decrease
+    are not counted again.
+    """
+
+    def __init__(self, floor=1, ceiling=16, concurrency=None, delay=0.0, latency=None, min_delay=0.0,
+                 window=20, latency_factor=2.0, max_error_rate=0.1, max_delay=60.0):
+        self.floor = floor
+        self.ceiling = max(ceiling, floor)
+        self.concurrency = float(min(max(concurrency or floor, floor), self.ceiling))
+        self.min_delay = min_delay
+        self.delay = max(delay, min_delay)
+        self.latency = latency
+        self.window = window
+        self.latency_factor = latency_factor
+        self.max_error_rate = max_error_rate
+        self.max_delay = max_delay
+        self.cooldown = 0
+        self._reset_window()
+
+    def _reset_window(self):
+        self.responses = 0
+        self.errors = 0
+        self.latency_total = 0.0
+        self.latency_count = 0
+
+    def record(self, latency=None, error=False, throttled=False, retry_after=None):
+        """
+        Account for one finished download
+
+        Args:
+            latency (float): Seconds from request to response headers
+            error (bool): The download failed or the server answered 5xx
+            throttled (bool): The server answered 429 or 503
+            retry_after (float): Seconds the server asked to wait
+
+        Returns:
+            bool: True if the concurrency or the delay changed
+        """
+        if self.cooldown:
+            self.cooldown -= 1
+            if throttled or error:
+                return False
+        if throttled:
+            self._decrease(retry_after)
+            return True
+
+        self.responses += 1
+        self.errors += bool(error)
+        if latency is not None:
+            self.latency_total += latency
+            self.latency_count += 1
+        if self.responses < self.window:
+            return False
+
+        mean = self.latency_total / self.latency_count if self.latency_count else None
+        degraded = mean is not None and self.latency is not None and mean > self.latency * self.latency_factor
+        if degraded or self.errors / self.responses > self.max_error_rate:
+            self._decrease()
+        else:
+            self._increase()
+        if mean is not None:
+            # The usual latency follows improvements at once and slowly drifts
+            # up with lasting slowdowns, so a lucky window is not a target forever
+            self.latency = mean if self.latency is None or mean < self.latency else self.latency + 0.05 * (mean - self.latency)
+        return True
+
+    def _increase(self):
+        self._reset_window()
+        if self.delay > self.min_delay:
+            self.delay = max(self.min_delay, self.delay / 2 if self.delay > 0.1 else 0.0)
+        elif self.concurrency < self.ceiling:
+            self.concurrency = min(self.ceiling, self.concurrency + 1)
+
+    def _decrease(self, retry_after=None):
+        self._reset_window()
+        if self.concurrency > self.floor:
+            self.concurrency = max(self.floor, self.concurrency / 2)
+        else:
+            self.delay = min(self.max_delay, max(self.delay * 2, 1.0))
+        if retry_after:
+            self.delay = min(self.max_delay, max(self.delay, retry_after))
+        # Requests already in flight were sent at the old limits
+        self.cooldown = int(self.concurrency * 2)
+
+    def state(self):
+        """Learned limits, to start the next crawl from"""
+        return {'concurrency': self.concurrency, 'delay': self.delay, 'latency': self.latency}
+
+
+class AdaptiveConcurrencyMiddleware:
+    """
+    Per-host concurrency and delay driven by latency, errors and throttling
+
+    Replaces AutoThrottle (which only adjusts the delay and must stay off):
+    every download slot gets a SlotController, whose limits are applied to the
+    slot after each response. Floors and ceilings come from the settings and
+    can be overridden per site in websites.json:
+
+        "concurrency": {"min": 1, "max": 2, "min_delay": 0.5}
+
+    What each slot learned is saved to ADAPTIVE_STATE_DIR/<spider>.concurrency.json
+    when the spider closes, so the next crawl starts at that speed instead of
+    ramping up from DOWNLOAD_DELAY again.
+    """
+
+    THROTTLE_STATUSES = (429, 503)
+
+    def __init__(self, crawler):
+        settings = crawler.settings
+        if not settings.getbool('ADAPTIVE_CONCURRENCY_ENABLED'):
+            raise NotConfigured
+        if settings.getbool('AUTOTHROTTLE_ENABLED'):
+            raise NotConfigured('AdaptiveConcurrencyMiddleware is disabled while AUTOTHROTTLE_ENABLED is set')
+        self.crawler = crawler
+        self.floor = settings.getint('ADAPTIVE_CONCURRENCY_MIN', 1)
+        self.ceiling = settings.getint('ADAPTIVE_CONCURRENCY_MAX', 16)
+        self.min_delay = 0.0
+        self.start_delay = settings.getfloat('DOWNLOAD_DELAY')
+        self.options = {
+            'window': settings.getint('ADAPTIVE_CONCURRENCY_WINDOW', 20),
+            'latency_factor': settings.getfloat('ADAPTIVE_LATENCY_FACTOR', 2.0),
+            'max_error_rate': settings.getfloat('ADAPTIVE_MAX_ERROR_RATE', 0.1),
+            'max_delay': settings.getfloat('ADAPTIVE_MAX_DELAY', 60.0),
+        }
+        self.state_dir = Path(settings.get('ADAPTIVE_STATE_DIR', 'state'))
+        self.state_path = None
+        self.learned = {}
+        self.controllers = {}
+        crawler.signals.connect(self.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(self.spider_closed, signal=signals.spider_closed)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler)
+
+    def spider_opened(self, spider):
+        limits = getattr(spider, 'config', {}).get('concurrency', {})
+        self.floor = limits.get('min', self.floor)
+        self.ceiling = limits.get('max', self.ceiling)
+        self.min_delay = limits.get('min_delay', self.min_delay)
+        self.state_path = self.state_dir / f'{spider.name}.concurrency.json'
+        if self.state_path.exists():
+            with open(self.state_path, 'r') as file:
+                self.learned = json.load(file)
+
+    def spider_closed(self, spider):
+        learned = {**self.learned, **{key: controller.state() for key, controller in self.controllers.items()}}
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.state_path, 'w') as file:
+            json.dump(learned, file, indent=2)
+        for key, controller in self.controllers.items():
+            spider.logger.info(f"Learned limits for {key}: concurrency {controller.concurrency:.1f}, "
+                               f"delay {controller.delay:.2f}s")
+
+    def _slot(self, request):
+        key = request.meta.get('download_slot')
+        slot = self.crawler.engine.downloader.slots.get(key) if key is not None else None
+        if slot is None:
+            return None, None
+        if key not in self.controllers:
+            learned = self.learned.get(key, {})
+            self.controllers[key] = SlotController(
+                self.floor, self.ceiling,
+                concurrency=learned.get('concurrency'),
+                delay=learned.get('delay', self.start_delay),
+                latency=learned.get('latency'),
+                min_delay=self.min_delay,
+                **self.options)
+            self._apply(self.controllers[key], slot)
+        return self.controllers[key], slot
+
+    @staticmethod
+    def _apply(controller, slot):
+        slot.concurrency = max(1, int(controller.concurrency))
+        slot.delay = controller.delay
+
+    @staticmethod
+    def _retry_after(response):
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        value = value.decode('latin-1').strip()
+        if value.isdigit():
+            return float(value)
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def process_response(self, request, response, spider):
+        controller, slot = self._slot(request)
+        if controller is not None:
+            throttled = response.status in self.THROTTLE_STATUSES
+            if controller.record(latency=request.meta.get('download_latency'),
+                                 error=response.status >= 500,
+                                 throttled=throttled,
+                                 retry_after=self._retry_after(response) if throttled else None):
+                self._apply(controller, slot)
+        return response
+
+    def process_exception(self, request, exception, spider):
+        if isinstance(exception, IgnoreRequest):
+            return None
+        controller, slot = self._slot(request)
+        if controller is not None and controller.record(error=True):
+            self._apply(controller, slot)
+        return None
@@ -7,7 +7,17 @@
 # useful for handling different item types with a single interface
 from itemadapter import ItemAdapter
 
+from unifiedscraper.items import ProductItem
+
 
 class UnifiedscraperPipeline:
     def process_item(self, item, spider):
         return item
+
+
+class ProductItemPipeline:
+    """Convert the dicts yielded by spiders into typed ProductItem objects"""
+    def process_item(self, item, spider):
+        if isinstance(item, ProductItem):
+            return item
+        return ProductItem.from_dict(ItemAdapter(item).asdict(), getattr(spider, 'config', {}).get('price_locale'))
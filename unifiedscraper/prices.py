@@ -0,0 +1,152 @@
+import re
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+
+# Item columns holding prices
+PRICE_COLUMNS = ('CurrentPrice', 'OriginalPrice')
+
+# Decimal separator by language, for the "price_locale" of websites.json
+LOCALE_DECIMAL_SEPARATORS = {
+    'it': ',', 'de': ',', 'fr': ',', 'es': ',', 'pt': ',', 'nl': ',', 'pl': ',', 'ro': ',',
+    'cs': ',', 'sk': ',', 'hu': ',', 'sv': ',', 'da': ',', 'fi': ',', 'el': ',', 'tr': ',', 'ru': ',',
+    'en': '.', 'ja': '.', 'zh': '.', 'ko': '.', 'he': '.', 'th': '.',
+}
+
+_PRICE_NUMBER = re.compile(r'\d[\d.,\s  \']*')
+# Spaces (also non-breaking) and apostrophes only ever group thousands
+_PRICE_GROUPING = re.compile(r'[\s  \']')
+_CURRENCY_SYMBOLS = {'€': 'EUR', '$': 'USD', '£': 'GBP', '¥': 'JPY', '₹': 'INR', '₽': 'RUB', '₩': 'KRW',
+                     '₪': 'ILS', '₺': 'TRY', '₴': 'UAH', '₸': 'KZT', '฿': 'THB', '₫': 'VND', '₱': 'PHP'}
+CURRENCY_PATTERN = re.compile('[' + re.escape(''.join(_CURRENCY_SYMBOLS)) + r']|\b[A-Z]{3}\b')
+
+
+def locale_decimal_separator(locale):
+    """
+    Decimal separator of a locale such as 'it', 'it_IT' or 'en-GB'
+
+    Args:
+        locale (str): Locale name, or None
+
+    Returns:
+        str: '.' or ',', or None when no locale is given
+    """
+    if not locale:
+        return None
+    language = re.split('[_-]', locale)[0].lower()
+    if language not in LOCALE_DECIMAL_SEPARATORS:
+        raise ValueError(f"Unknown price locale {locale!r}")
+    return LOCALE_DECIMAL_SEPARATORS[language]
+
+
+def parse_price(text, decimal=None, locale=None):
+    """
+    Parse the first number of a price string
+
+    Without ``decimal`` the separator is guessed: when both '.' and ',' occur
+    the last one is the decimal separator, and a separator that repeats groups
+    thousands. A single separator followed by exactly three digits ('1.234')
+    is ambiguous: it is taken as the decimal separator only when it is the
+    ``locale``'s, otherwise as thousands. '1.234,50 €', '€1,234.50', '1234.50'
+    and '75,5' parse the same in every locale.
+
+    Args:
+        text (str): Price as shown on the page
+        decimal (str): '.' or ',' to force the decimal separator
+        locale (str): Site locale, used for the ambiguous case only
+
+    Returns:
+        float: The price, or None when the text has no number
+    """
+    match = _PRICE_NUMBER.search(text)
+    if not match:
+        return None
+    number = _PRICE_GROUPING.sub('', match.group()).rstrip('.,')
+    if decimal is None:
+        last = max(number.rfind('.'), number.rfind(','))
+        if last == -1:
+            return float(number)
+        separator = number[last]
+        other = ',' if separator == '.' else '.'
+        if other in number:
+            decimal = separator
+        elif number.count(separator) > 1:
+            decimal = other
+        elif len(number) - last - 1 != 3:
+            decimal = separator
+        else:
+            decimal = separator if locale_decimal_separator(locale) == separator else other
+    thousands = ',' if decimal == '.' else '.'
+    return float(number.replace(thousands, '').replace(decimal, '.'))
+
+
+def currency_code(text):
+    """
+    ISO code of the first currency symbol or code in a price string
+
+    Args:
+        text (str): Price as shown on the page, e.g. '€75.5', '60$', '99,90 EUR'
+
+    Returns:
+        str: e.g. 'EUR', 'USD', 'GBP', or None when there is no currency
+    """
+    match = CURRENCY_PATTERN.search(text)
+    if not match:
+        return None
+    return _CURRENCY_SYMBOLS.get(match.group(), match.group())
+
+
+def parse_price_array(prices, locale=None):
+    """
+    Parse a whole column of price strings
+
+    A feed repeats the same few prices across thousands of rows, so each
+    distinct string is parsed once with ``parse_price`` and the results are
+    spread back over the column with Arrow's ``unique``, ``index_in`` and
+    ``take``. Nulls and strings without a number become null.
+
+    Args:
+        prices (pa.Array | pa.ChunkedArray | list): Price strings
+        locale (str): Site locale, used for the ambiguous case only
+
+    Returns:
+        pa.Array | pa.ChunkedArray: float64 prices
+    """
+    # An unknown locale is an error even when no price needs it
+    locale_decimal_separator(locale)
+    if not isinstance(prices, (pa.Array, pa.ChunkedArray)):
+        prices = pa.array(prices, type=pa.string())
+    if not pa.types.is_string(prices.type):
+        prices = prices.cast(pa.string())
+
+    distinct = pc.unique(prices)
+    parsed = pa.array([None if text is None else parse_price(text, locale=locale) for text in distinct.to_pylist()],
+                      type=pa.float64())
+    return pc.take(parsed, pc.index_in(prices, value_set=distinct))
+
+
+def price_columns_schema(schema):
+    """Schema with string price columns declared as float64, as ``parse_price_batch`` returns them"""
+    for index, field in enumerate(schema):
+        if field.name in PRICE_COLUMNS and (pa.types.is_string(field.type) or pa.types.is_large_string(field.type)):
+            schema = schema.set(index, field.with_type(pa.float64()))
+    return schema
+
+
+def parse_price_batch(batch, locale=None):
+    """
+    Parse the price columns of a record batch stored as raw strings
+
+    Args:
+        batch (pa.RecordBatch): Batch read from a feed file
+        locale (str): Site locale, used for the ambiguous case only
+
+    Returns:
+        pa.RecordBatch: The batch with float64 price columns
+    """
+    columns = list(batch.columns)
+    for index, field in enumerate(batch.schema):
+        if field.name in PRICE_COLUMNS and (pa.types.is_string(field.type) or pa.types.is_large_string(field.type)):
+            columns[index] = parse_price_array(columns[index], locale)
+    return pa.RecordBatch.from_arrays(columns, schema=price_columns_schema(batch.schema))
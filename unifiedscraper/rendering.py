@@ -0,0 +1,37 @@
+# Resource types a rendered page does not need to expose its product data
+BLOCKED_RESOURCE_TYPES = ('image', 'media', 'font', 'stylesheet')
+
+
+def should_abort_request(request):
+    """
+    PLAYWRIGHT_ABORT_REQUEST predicate: skip downloads that only affect how a page looks
+
+    Args:
+        request: Playwright request made by a rendered page
+
+    Returns:
+        bool: True to abort the request
+    """
+    return request.resource_type in BLOCKED_RESOURCE_TYPES
+
+
+def render_request(request):
+    """
+    Copy of a plain HTTP request to download it again through Playwright
+
+    The copy bypasses the dupefilter and goes back to a shared frontier even
+    though the original is already crawled there. Conditional headers are
+    dropped: the browser must get the page, not a 304.
+
+    Args:
+        request: The request whose response lacked required content
+
+    Returns:
+        scrapy.Request: The request to render
+    """
+    headers = request.headers.copy()
+    for name in ('If-None-Match', 'If-Modified-Since'):
+        headers.pop(name, None)
+    return request.replace(headers=headers,
+                           dont_filter=True,
+                           meta={**request.meta, 'playwright': True, 'frontier_requeue': True})
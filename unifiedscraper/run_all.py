@@ -0,0 +1,228 @@
+import argparse
+import json
+import os
+import sys
+import traceback
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from time import monotonic
+from urllib.parse import urlparse
+
+from scrapy.spiderloader import SpiderLoader
+from scrapy.utils.project import get_project_settings
+
+if not __package__:
+    # Allow running as a script: `python unifiedscraper/run_all.py`
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from unifiedscraper.run_spider import run_spider_in_batches, run_spider_in_process
+
+
+CONFIG_PATH = Path(__file__).parent / 'configs' / 'websites.json'
+
+
+def load_websites(config_path=CONFIG_PATH):
+    """Load the websites configuration keyed by spider name."""
+    with open(config_path, 'r') as file:
+        return json.load(file)
+
+
+def get_site_domain(site_config):
+    """
+    Get the host a site is crawled from, used to cap concurrent crawls per host
+
+    Args:
+        site_config (dict): Entry of websites.json
+
+    Returns:
+        str: Host name without a leading ``www.``, e.g. 'answear.it'
+    """
+    host = urlparse(site_config['base_url']).hostname or site_config['base_url']
+    return host[4:] if host.startswith('www.') else host
+
+
+def run_site(website, run_options):
+    """
+    Crawl one website in a worker process
+
+    Args:
+        website (str): Name of the spider to run
+        run_options (dict): Keyword arguments for the batch runner, plus ``subprocess``
+
+    Returns:
+        dict: Summary returned by the batch runner, with ``status`` and ``duration``
+    """
+    run_options = dict(run_options)
+    run = run_spider_in_batches if run_options.pop('subprocess', False) else run_spider_in_process
+    started = monotonic()
+    try:
+        summary = run(website=website, **run_options)
+        summary['status'] = 'ok'
+    except Exception:
+        summary = {'website': website, 'batches': 0, 'items_per_directory': {},
+                   'status': 'failed', 'error': traceback.format_exc()}
+    summary['duration'] = monotonic() - started
+    return summary
+
+
+def site_result(future, website, started):
+    """
+    Summary of a finished worker, also when the worker process itself died
+
+    Args:
+        future (Future): Done future of ``run_site``
+        website (str): Name of the spider it ran
+        started (float): ``monotonic()`` time it was submitted at
+
+    Returns:
+        dict: Summary of the site, as returned by ``run_site``
+    """
+    try:
+        return future.result()
+    except Exception as e:
+        # run_site catches what the crawl raises: this is a crash, OOM kill or broken pool
+        return {'website': website, 'batches': 0, 'items_per_directory': {}, 'status': 'failed',
+                'error': f"Worker process failed: {e!r}", 'duration': monotonic() - started}
+
+
+def run_all(websites=None, workers=None, per_domain_limit=1, **run_options):
+    """
+    Crawl every configured website, spreading spiders over a process pool
+
+    Sites sharing a host (goccia-men/goccia-women, the answear sections) count
+    against the same per-domain limit, so with the default limit of 1 they are
+    crawled one after the other while unrelated sites run in parallel.
+
+    Every worker process runs exactly one site: Twisted's reactor cannot be
+    restarted, so pool processes are never reused. A worker that dies (killed
+    for memory, segfault) fails its site, and the sites crawling alongside it
+    when the pool breaks; the remaining sites go on in a new pool.
+
+    Args:
+        websites (list): Spider names to run (default: every key in websites.json)
+        workers (int): Number of worker processes (default: CPU count)
+        per_domain_limit (int): Maximum concurrent crawls against the same host
+        **run_options: Passed to the batch runner of every site
+
+    Returns:
+        list: One summary dict per site
+    """
+    config = load_websites()
+    available_spiders = set(SpiderLoader.from_settings(get_project_settings()).list())
+
+    if websites is None:
+        websites = list(config)
+
+    pending = deque()
+    for website in websites:
+        if website not in config:
+            print(f"Skipping {website}: not configured in websites.json")
+        elif website not in available_spiders:
+            print(f"Skipping {website}: no spider with this name")
+        else:
+            pending.append(website)
+
+    domains = {website: get_site_domain(config[website]) for website in pending}
+    workers = workers or os.cpu_count() or 1
+    print(f"Running {len(pending)} spiders on {workers} workers "
+          f"(max {per_domain_limit} per domain)")
+
+    summaries = []
+    running = {}
+    domain_load = Counter()
+
+    pool = ProcessPoolExecutor(max_workers=workers, max_tasks_per_child=1)
+    try:
+        while pending or running:
+            # Submit every site whose host still has room, keeping config order
+            for website in list(pending):
+                if len(running) >= workers:
+                    break
+                domain = domains[website]
+                if domain_load[domain] >= per_domain_limit:
+                    continue
+                pending.remove(website)
+                domain_load[domain] += 1
+                running[pool.submit(run_site, website, run_options)] = (website, monotonic())
+                print(f"Started {website} ({domain})")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            if any(isinstance(future.exception(), BrokenProcessPool) for future in done):
+                # A broken pool takes no more work and fails every site it still runs
+                print("Worker pool broken, starting a new one")
+                pool.shutdown(wait=True)
+                pool = ProcessPoolExecutor(max_workers=workers, max_tasks_per_child=1)
+                done = list(running)
+            for future in done:
+                website, started = running.pop(future)
+                domain_load[domains[website]] -= 1
+                summary = site_result(future, website, started)
+                summaries.append(summary)
+                print(f"Finished {website}: {summary['status']}")
+    finally:
+        pool.shutdown(wait=True)
+
+    print_combined_summary(summaries)
+    return summaries
+
+
+def print_combined_summary(summaries):
+    """Print one line per site and the overall totals."""
+    print("\n=== Combined Summary ===")
+    total_items = 0
+    for summary in sorted(summaries, key=lambda s: s['website']):
+        items = sum(summary['items_per_directory'].values())
+        total_items += items
+        print(f"{summary['website']:<20} {summary['status']:<7} "
+              f"batches={summary['batches']:<4} items={items:<8} "
+              f"time={summary['duration']:.0f}s")
+        if summary['status'] != 'ok':
+            print(summary['error'])
+
+    failed = [s['website'] for s in summaries if s['status'] != 'ok']
+    print(f"Total items scraped across {len(summaries)} sites: {total_items}")
+    if failed:
+        print(f"Failed sites: {', '.join(failed)}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run every configured spider in parallel')
+    parser.add_argument('websites', nargs='*', help='Spiders to run (default: all in websites.json)')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--per_domain_limit', type=int, default=1,
+                        help='Maximum concurrent spiders against the same host')
+    parser.add_argument('--batch_size', type=int, default=50, help='Items per batch')
+    parser.add_argument('--max_batches', type=int, default=None, help='Maximum number of batches')
+    parser.add_argument('--wait_time', type=int, default=None,
+                        help='Seconds between batches (default: 0, or 10 with --subprocess)')
+    parser.add_argument('--max_empty_batches', type=int, default=3,
+                        help='Maximum consecutive batches with requests left but no progress before stopping')
+    parser.add_argument('--min_items_threshold', type=int, default=1,
+                        help='Least progress (items, unchanged products seen, pages downloaded) of a non-empty batch')
+    parser.add_argument('--subprocess', action='store_true',
+                        help='Run every batch as a separate `scrapy crawl` process (legacy mode)')
+    parser.add_argument('--price_sweep', action='store_true',
+                        help='Take prices from the listing pages, opening only new or changed products')
+    parser.add_argument('--shared_frontier', action='store_true',
+                        help='Share every site\'s crawl with the workers of other machines (see FRONTIER_DIR)')
+    parser.add_argument('--log_level', default='INFO',
+                        help='Scrapy log level of the crawls, e.g. DEBUG (default: INFO)')
+
+    args = parser.parse_args()
+
+    run_all(
+        websites=args.websites or None,
+        workers=args.workers,
+        per_domain_limit=args.per_domain_limit,
+        batch_size=args.batch_size,
+        max_batches=args.max_batches,
+        wait_time=args.wait_time if args.wait_time is not None else (10 if args.subprocess else 0),
+        max_empty_batches=args.max_empty_batches,
+        min_items_threshold=args.min_items_threshold,
+        subprocess=args.subprocess,
+        price_sweep=args.price_sweep,
+        shared_frontier=args.shared_frontier,
+        log_level=args.log_level,
+    )
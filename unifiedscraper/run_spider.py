@@ -1,4 +1,5 @@
 import os
+import sys
 import subprocess
 import argparse
 import json
@@ -7,66 +8,24 @@ from datetime import datetime
 from pathlib import Path
 
 import pyarrow.parquet as pq
+from scrapy.crawler import Crawler, CrawlerRunner
+from scrapy.utils.log import configure_logging
+from scrapy.utils.project import get_project_settings
+from scrapy.utils.reactor import install_reactor
+from twisted.internet import defer
 
+if not __package__:
+    # Allow running as a script: `python unifiedscraper/run_spider.py <website>`
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-def concatenate_parquet_files(input_folder, output_file, delete_original=True):
-    """
-    Concatenates all parquet files in a folder into a single file efficiently.
-
-    Args:
-        input_folder (str): Path to folder containing parquet files
-        output_file (str): Path for the output concatenated parquet file
-        delete_original (bool): Whether to delete original files (default: True)
-
-    Returns:
-        None
-    """
-    # Get list of parquet files in the input folder (exclude combined.parquet)
-    parquet_files = [f for f in Path(input_folder).glob('*.parquet')
-                     if f.is_file() and f.name != 'combined.parquet']
-
-    if not parquet_files:
-        print(f"No parquet files to concatenate in {input_folder}")
-        return
-
-    print(f"Found {len(parquet_files)} parquet files to concatenate in {input_folder}")
-
-    # Read schema from first file
-    # Initialize with first file
-    first_table = pq.read_table(parquet_files[0], memory_map=True)
-    writer = pq.ParquetWriter(output_file, first_table.schema)
-
-    try:
-        for file_path in parquet_files:
-            try:
-                table = pq.read_table(file_path, memory_map=True)
-                
-                # Convert binary columns to string if needed
-                for i in range(table.num_columns):
-                    col_name = table.column_names[i]
-                    if str(table.schema.types[i]) == 'binary':
-                        table = table.set_column(
-                            i,
-                            col_name,
-                            table.column(i).cast('string')
-                        )
-                
-                writer.write_table(table)
-
-                if delete_original:
-                    os.remove(file_path)
-                    print(f"Processed and deleted {file_path}")
-                else:
-                    print(f"Processed {file_path}")
-                    
-            except Exception as e:
-                print(f"Error processing {file_path}: {str(e)}")
-                continue
+from unifiedscraper.compaction import COMBINED_FILE_NAME, compact_parquet_files
+from unifiedscraper.crawlstate import STATE_FILE_NAME, batch_progress, batch_stop_reason
+from unifiedscraper.events import EventLog, parse_event
 
-    finally:
-        writer.close()
+# Scheduler of the workers sharing a site's crawl (--shared_frontier)
+FRONTIER_SCHEDULER = 'unifiedscraper.frontier.FrontierScheduler'
 
-    print(f"Successfully concatenated files into {output_file}")
+CONFIG_PATH = Path(__file__).parent / 'configs' / 'websites.json'
 
 
 def get_current_output_folder(base_name=None):
@@ -84,9 +43,46 @@ def get_current_output_folder(base_name=None):
     return str(today_folder.resolve())
 
 
+# Row counts per parquet file, keyed by path and invalidated when mtime or size change.
+# get_scraped_item_count drops the files no longer in a folder (consolidated), so
+# the cache only holds the files of the folders being counted.
+_row_count_cache = {}
+
+
+def get_parquet_row_count(file_path):
+    """
+    Count the rows of a parquet file from its footer metadata
+
+    Args:
+        file_path (str): Path to the parquet file
+
+    Returns:
+        int: Number of rows in the file
+    """
+    file_path = str(file_path)
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        _row_count_cache.pop(file_path, None)
+        raise
+    signature = (stat.st_mtime_ns, stat.st_size)
+
+    cached = _row_count_cache.get(file_path)
+    if cached and cached[0] == signature:
+        return cached[1]
+
+    num_rows = pq.read_metadata(file_path).num_rows
+    _row_count_cache[file_path] = (signature, num_rows)
+    return num_rows
+
+
 def get_scraped_item_count(output_folder):
     """
-    Count total items scraped by reading all parquet files in the output folder
+    Count total items scraped from the footers of all parquet files in the output folder
+
+    Only the footer of each file is read, and unchanged files are answered from a
+    cache, so the cost grows with the number of files rather than the number of rows.
+    Files gone from the folder since the last count leave the cache.
 
     Args:
         output_folder (str): Path to the output folder containing parquet files
@@ -97,27 +93,37 @@ def get_scraped_item_count(output_folder):
     parquet_files = [f for f in Path(output_folder).glob('*.parquet') if f.is_file()]
     total_items = 0
 
+    present = {str(f) for f in parquet_files}
+    for cached_path in [path for path in _row_count_cache
+                        if Path(path).parent == Path(output_folder) and path not in present]:
+        del _row_count_cache[cached_path]
+
     for file_path in parquet_files:
         try:
-            table = pq.read_table(file_path, memory_map=True)
-            total_items += len(table)
+            total_items += get_parquet_row_count(file_path)
         except Exception as e:
             print(f"Error reading {file_path}: {e}")
 
     return total_items
 
 
+def get_state_path(spider_name):
+    """Crawl state written by CrawlStateExtension when a batch closes"""
+    return Path(f"crawls/{spider_name}") / STATE_FILE_NAME
+
+
 def check_scrapy_stats(spider_name):
     """
-    Check Scrapy stats from the stats file to see if items were scraped in last run
+    Read how the last batch of a spider closed
 
     Args:
         spider_name (str): Name of the spider
 
     Returns:
-        dict: Stats from the last run, or None if file doesn't exist
+        dict: Close reason, pending requests and stats of the last batch
+            (see CrawlStateExtension), or None if file doesn't exist
     """
-    stats_file = Path(f"crawls/{spider_name}/spider.stats")
+    stats_file = get_state_path(spider_name)
     if stats_file.exists():
         try:
             with open(stats_file, 'r') as f:
@@ -128,6 +134,21 @@ def check_scrapy_stats(spider_name):
     return None
 
 
+def get_price_locale(directory):
+    """
+    price_locale in websites.json of the website of an output folder
+
+    Args:
+        directory (str): Output folder ending in website=<name>
+
+    Returns:
+        str: The locale, or None for a folder of no configured website
+    """
+    name = Path(directory).name.partition('website=')[2]
+    with open(CONFIG_PATH, 'r') as file:
+        return json.load(file).get(name, {}).get('price_locale')
+
+
 def consolidate_all_directories(used_directories):
     """
     Consolidate parquet files in all directories that were used during scraping.
@@ -146,7 +167,7 @@ def consolidate_all_directories(used_directories):
 
         # Check if there are individual parquet files to consolidate
         individual_files = [f for f in directory_path.glob('*.parquet')
-                            if f.is_file() and f.name != 'combined.parquet']
+                            if f.is_file() and f.name != COMBINED_FILE_NAME]
 
         if not individual_files:
             print(f"No individual parquet files to consolidate in {directory}")
@@ -155,13 +176,14 @@ def consolidate_all_directories(used_directories):
         print(f"Consolidating {len(individual_files)} files in {directory}")
 
         # Create combined file path
-        combined_file = directory_path / 'combined.parquet'
+        combined_file = directory_path / COMBINED_FILE_NAME
 
-        # Consolidate the files
-        concatenate_parquet_files(
+        # Consolidate the files, appending to an earlier combined file of the same day
+        compact_parquet_files(
             input_folder=str(directory_path),
             output_file=str(combined_file),
-            delete_original=True
+            delete_original=True,
+            price_locale=get_price_locale(directory)
         )
 
         print(f"Consolidated files in {directory} -> {combined_file}")
@@ -169,22 +191,115 @@ def consolidate_all_directories(used_directories):
     print("=== Consolidation completed ===\n")
 
 
+def summarize_and_consolidate(batch_count, used_directories):
+    """
+    Print per-directory counts, consolidate every used directory and print the final summary
+
+    Args:
+        batch_count (int): Number of batches that were run
+        used_directories (set): Set of directory paths that were used during scraping
+
+    Returns:
+        dict: Final item count per directory
+    """
+    print(f"\nScraping completed after {batch_count} batches")
+    print(f"Used directories during scraping: {len(used_directories)}")
+    for directory in sorted(used_directories):
+        item_count = get_scraped_item_count(directory)
+        print(f"  - {directory}: {item_count} items")
+
+    # Now consolidate all directories that were used
+    consolidate_all_directories(used_directories)
+
+    # Print final summary
+    print("\n=== Final Summary ===")
+    total_items_across_all_dirs = 0
+    items_per_directory = {}
+    for directory in used_directories:
+        # Count items in combined.parquet if it exists, otherwise count all parquet files
+        combined_file = Path(directory) / COMBINED_FILE_NAME
+        if combined_file.exists():
+            try:
+                items_in_dir = get_parquet_row_count(combined_file)
+            except Exception as e:
+                print(f"Error reading combined file in {directory}: {e}")
+                items_in_dir = get_scraped_item_count(directory)
+        else:
+            items_in_dir = get_scraped_item_count(directory)
+
+        total_items_across_all_dirs += items_in_dir
+        items_per_directory[directory] = items_in_dir
+        print(f"Final items in {directory}: {items_in_dir}")
+
+    print(f"Total items scraped across all directories: {total_items_across_all_dirs}")
+
+    return items_per_directory
+
+
+def get_events_path(website):
+    """Default event stream of a website's runs, next to its JOBDIR"""
+    return f"crawls/{website}/events.jsonl"
+
+
+def crawl_batch_subprocess(cmd, events):
+    """
+    Run one `scrapy crawl` batch and relay its events
+
+    The crawl writes its events to stdout (EVENT_LOG=-) and its log to
+    stderr, which is not captured. Events are read line by line as they come
+    and copied to ``events``; anything else printed on stdout is passed on.
+
+    Args:
+        cmd (list): The scrapy command line
+        events (EventLog): Event stream of the run
+
+    Returns:
+        tuple: (spider_closed event or None if the crawl did not close, exit code)
+    """
+    closed = None
+    with subprocess.Popen(cmd + ['-s', 'EVENT_LOG=-'], stdout=subprocess.PIPE, text=True) as process:
+        for line in process.stdout:
+            event = parse_event(line)
+            if event is None:
+                print(line, end='')
+                continue
+            events.write(event)
+            if event['event'] == 'spider_closed':
+                closed = event
+    return closed, process.returncode
+
+
 def run_spider_in_batches(website, batch_size=1, max_batches=None, wait_time=50,
-                          max_empty_batches=3, min_items_threshold=1):
+                          max_empty_batches=3, min_items_threshold=1, price_sweep=False,
+                          shared_frontier=False, log_level='INFO', events_path=None, spider_args=None):
     """
-    Run spider in batches with automatic stopping when no new data is found
+    Run spider in batches, each a `scrapy crawl` process, until nothing is left to crawl
+
+    After each batch the crawl state (JOBDIR/spider.stats) tells whether the
+    batch stopped at its limit with requests still queued; only then is
+    another batch started.
 
     Args:
         website (str): Name of the spider to run
         batch_size (int): Items per batch
         max_batches (int): Maximum number of batches
         wait_time (int): Seconds between batches
-        max_empty_batches (int): Maximum consecutive batches with no new items before stopping
-        min_items_threshold (int): Minimum items required in a batch to continue
+        max_empty_batches (int): Maximum consecutive batches with requests left but no progress before stopping
+        min_items_threshold (int): Least progress of a batch that is not empty: items,
+            unchanged products seen and pages downloaded (see crawlstate.batch_progress)
+        price_sweep (bool): Take prices from the listing pages (PRICE_SWEEP)
+        shared_frontier (bool): Pull requests from the site's shared frontier
+        log_level (str): Scrapy log level of the crawls (DEBUG only when asked for)
+        events_path (str): JSON-lines event stream of the run, '-' for stdout
+            (default: crawls/<website>/events.jsonl)
+        spider_args (dict): Spider arguments, as `scrapy crawl -a` (e.g. base_url)
+
+    Returns:
+        dict: Website name, number of batches and final item count per directory
     """
+    events = EventLog(events_path or get_events_path(website))
     batch_count = 0
     empty_batch_count = 0
-    last_total_items = 0
 
     # Set to track all directories used during scraping
     used_directories = set()
@@ -208,88 +323,210 @@ def run_spider_in_batches(website, batch_size=1, max_batches=None, wait_time=50,
 
         print(f"Starting batch {batch_count + 1} for {website}")
         print(f"Current output directory: {current_output_folder}")
-
-        # Count items before running the batch
-        items_before = get_scraped_item_count(current_output_folder)
+        events.emit('batch_start', website=website, batch=batch_count + 1, mode='subprocess')
 
         # Run the spider
         cmd = [
             'scrapy', 'crawl', website,
             '-s', f'CLOSESPIDER_ITEMCOUNT={batch_size}',
             '-s', f'JOBDIR=crawls/{website}',
-            '-s', 'LOG_LEVEL=DEBUG'  # Add logging to see what's happening
+            '-s', f'LOG_LEVEL={log_level}',
+            '-s', f'BATCH_NUMBER={batch_count + 1}',
         ]
-
-        result = subprocess.run(cmd, capture_output=True, text=True)
-
-        # Count items after running the batch
+        if price_sweep:
+            cmd += ['-s', 'PRICE_SWEEP=True']
+        if shared_frontier:
+            cmd += ['-s', f'SCHEDULER={FRONTIER_SCHEDULER}']
+        for name, value in (spider_args or {}).items():
+            cmd += ['-a', f'{name}={value}']
+
+        # A state file left by an earlier batch must not be taken for this one's
+        get_state_path(website).unlink(missing_ok=True)
+        closed, exit_code = crawl_batch_subprocess(cmd, events)
+        state = check_scrapy_stats(website) or {}
+
+        # The crawl reported what it scraped; only the total needs the files
+        items_scraped_this_batch = closed['items'] if closed else 0
         items_after = get_scraped_item_count(current_output_folder)
-        items_scraped_this_batch = items_after - items_before
+        finish_reason = state.get('reason')
+        pending = state.get('pending')
+        progress = batch_progress(state.get('stats', {}))
 
         batch_count += 1
-        print(f"Batch {batch_count} completed. Items scraped this batch: {items_scraped_this_batch}")
+        events.emit('batch_end', website=website, batch=batch_count, reason=finish_reason, pending=pending,
+                    items=items_scraped_this_batch, progress=progress, total_items=items_after,
+                    exit_code=exit_code)
+        print(f"Batch {batch_count} completed ({finish_reason or f'exit code {exit_code}'}, "
+              f"{pending if pending is not None else 'unknown'} requests pending). "
+              f"Items scraped this batch: {items_scraped_this_batch}")
         print(f"Total items scraped in current directory: {items_after}")
 
-        # Check if we scraped enough items in this batch
-        if items_scraped_this_batch < min_items_threshold:
-            empty_batch_count += 1
-            print(f"Low/no items in batch {batch_count}. Empty batch count: {empty_batch_count}")
-
-            # Check if spider has finished (no more URLs to process)
-            if "Spider closed" in result.stdout or "closespider" in result.stdout.lower():
-                print("Spider indicates it has finished crawling")
-                break
-
-            if empty_batch_count >= max_empty_batches:
-                print(f"Reached maximum empty batches limit: {max_empty_batches}")
-                print("Stopping spider - likely finished crawling all available data")
-                break
-        else:
-            # Reset empty batch count if we got items
-            empty_batch_count = 0
-
-        # Additional check: if total items hasn't changed for several batches
-        if items_after == last_total_items and batch_count > 1:
-            print("No new items scraped in this batch, spider may have finished")
+        stop, empty_batch_count = batch_stop_reason(finish_reason, pending, progress, empty_batch_count,
+                                                    min_items_threshold, max_empty_batches)
+        if stop:
+            print(f"Stopping: {stop} (exit code {exit_code})")
             break
-
-        last_total_items = items_after
+        if empty_batch_count:
+            print(f"No progress in batch {batch_count}. Empty batch count: {empty_batch_count}")
 
         # Wait before next batch (but not after the last batch)
-        if empty_batch_count < max_empty_batches and (not max_batches or batch_count < max_batches):
+        if not max_batches or batch_count < max_batches:
             print(f"Waiting {wait_time} seconds before next batch...")
             sleep(wait_time)
 
-    print(f"\nScraping completed after {batch_count} batches")
-    print(f"Used directories during scraping: {len(used_directories)}")
-    for directory in sorted(used_directories):
-        item_count = get_scraped_item_count(directory)
-        print(f"  - {directory}: {item_count} items")
+    events.emit('run_end', website=website, batches=batch_count)
+    events.close()
+    return {
+        'website': website,
+        'batches': batch_count,
+        'items_per_directory': summarize_and_consolidate(batch_count, used_directories),
+    }
 
-    # Now consolidate all directories that were used
-    consolidate_all_directories(used_directories)
 
-    # Print final summary
-    print("\n=== Final Summary ===")
-    total_items_across_all_dirs = 0
-    for directory in used_directories:
-        # Count items in combined.parquet if it exists, otherwise count all parquet files
-        combined_file = Path(directory) / 'combined.parquet'
-        if combined_file.exists():
-            try:
-                table = pq.read_table(str(combined_file), memory_map=True)
-                items_in_dir = len(table)
-            except Exception as e:
-                print(f"Error reading combined file in {directory}: {e}")
-                items_in_dir = get_scraped_item_count(directory)
-        else:
-            items_in_dir = get_scraped_item_count(directory)
+def build_batch_settings(settings, website, batch_size, price_sweep=False, shared_frontier=False,
+                         batch_number=1):
+    """
+    Build the settings for one in-process batch.
 
-        total_items_across_all_dirs += items_in_dir
-        print(f"Final items in {directory}: {items_in_dir}")
+    The values are set with ``cmdline`` priority so that they win over the spider's
+    ``custom_settings``, exactly like the ``-s`` options of the subprocess mode.
 
-    print(f"Total items scraped across all directories: {total_items_across_all_dirs}")
+    Args:
+        settings (scrapy.settings.Settings): Project settings
+        website (str): Name of the spider to run
+        batch_size (int): Items per batch
+        price_sweep (bool): Take prices from the listing pages (PRICE_SWEEP)
+        shared_frontier (bool): Pull requests from the site's shared frontier
+        batch_number (int): Number of the batch in the run, part of its feed file names
+
+    Returns:
+        scrapy.settings.Settings: A copy of the settings for this batch
+    """
+    batch_settings = settings.copy()
+    batch_settings.set('CLOSESPIDER_ITEMCOUNT', batch_size, priority='cmdline')
+    batch_settings.set('BATCH_NUMBER', batch_number, priority='cmdline')
+    batch_settings.set('JOBDIR', f'crawls/{website}', priority='cmdline')
+    if price_sweep:
+        batch_settings.set('PRICE_SWEEP', True, priority='cmdline')
+    if shared_frontier:
+        batch_settings.set('SCHEDULER', FRONTIER_SCHEDULER, priority='cmdline')
+    return batch_settings
+
+
+def run_spider_in_process(website, batch_size=1, max_batches=None, wait_time=0,
+                          max_empty_batches=3, min_items_threshold=1, log_level='INFO',
+                          price_sweep=False, shared_frontier=False, events_path=None, spider_args=None):
+    """
+    Run spider in batches inside a single Twisted reactor
+
+    Interpreter, reactor, Scrapy and pyarrow start up once; every batch is a new
+    Crawler on the same CrawlerRunner resuming the same JOBDIR, so a batch boundary
+    only costs the spider open/close.
+
+    Args:
+        website (str): Name of the spider to run
+        batch_size (int): Items per batch
+        max_batches (int): Maximum number of batches
+        wait_time (int): Seconds between batches (default: none, the next batch starts at once)
+        max_empty_batches (int): Maximum consecutive batches with requests left but no progress before stopping
+        min_items_threshold (int): Least progress of a batch that is not empty: items,
+            unchanged products seen and pages downloaded (see crawlstate.batch_progress)
+        log_level (str): Scrapy log level for the crawls
+        price_sweep (bool): Take prices from the listing pages (PRICE_SWEEP)
+        shared_frontier (bool): Pull requests from the site's shared frontier, so
+            that several processes or machines can crawl the site together
+        events_path (str): JSON-lines event stream of the run, '-' for stdout
+            (default: crawls/<website>/events.jsonl)
+        spider_args (dict): Spider arguments, as `scrapy crawl -a` (e.g. base_url)
+
+    Returns:
+        dict: Website name, number of batches and final item count per directory
+    """
+    events_path = events_path or get_events_path(website)
+    settings = get_project_settings()
+    settings.set('LOG_LEVEL', log_level, priority='cmdline')
+    # The crawls add their spider_opened/spider_closed events to the run's stream
+    settings.set('EVENT_LOG', events_path, priority='cmdline')
+    if settings.get('TWISTED_REACTOR'):
+        install_reactor(settings['TWISTED_REACTOR'], settings.get('ASYNCIO_EVENT_LOOP'))
+    configure_logging(settings)
+
+    runner = CrawlerRunner(settings)
+    spidercls = runner.spider_loader.load(website)
+
+    # Imported after install_reactor so the configured reactor is the one we get
+    from twisted.internet import reactor, task
+
+    used_directories = set()
+    progress = {'batch_count': 0}
+
+    os.makedirs('crawls', exist_ok=True)
+    events = EventLog(events_path)
+
+    @defer.inlineCallbacks
+    def crawl_batches():
+        empty_batch_count = 0
+
+        while True:
+            current_output_folder = get_current_output_folder(website)
+            used_directories.add(current_output_folder)
+            os.makedirs(current_output_folder, exist_ok=True)
+
+            if max_batches and progress['batch_count'] >= max_batches:
+                print(f"Reached maximum batches limit: {max_batches}")
+                break
+
+            print(f"Starting batch {progress['batch_count'] + 1} for {website} (in-process)")
+            print(f"Current output directory: {current_output_folder}")
+            events.emit('batch_start', website=website, batch=progress['batch_count'] + 1, mode='in-process')
+
+            crawler = Crawler(spidercls, build_batch_settings(settings, website, batch_size, price_sweep,
+                                                           shared_frontier, progress['batch_count'] + 1))
+            yield runner.crawl(crawler, **(spider_args or {}))
+
+            # The crawler already counted what it scraped; only the total needs the files
+            items_scraped_this_batch = crawler.stats.get_value('item_scraped_count', 0)
+            items_after = get_scraped_item_count(current_output_folder)
+            finish_reason = crawler.stats.get_value('finish_reason')
+            pending = crawler.stats.get_value('scheduler/pending')
+            batch_progress_made = batch_progress(crawler.stats.get_stats())
+
+            progress['batch_count'] += 1
+            events.emit('batch_end', website=website, batch=progress['batch_count'], reason=finish_reason,
+                        pending=pending, items=items_scraped_this_batch, progress=batch_progress_made,
+                        total_items=items_after)
+            print(f"Batch {progress['batch_count']} completed ({finish_reason}, "
+                  f"{pending if pending is not None else 'unknown'} requests pending). "
+                  f"Items scraped this batch: {items_scraped_this_batch}")
+            print(f"Total items scraped in current directory: {items_after}")
+
+            stop, empty_batch_count = batch_stop_reason(finish_reason, pending, batch_progress_made,
+                                                        empty_batch_count, min_items_threshold, max_empty_batches)
+            if stop:
+                print(f"Stopping: {stop}")
+                break
+            if empty_batch_count:
+                print(f"No progress in batch {progress['batch_count']}. Empty batch count: {empty_batch_count}")
+
+            if wait_time and (not max_batches or progress['batch_count'] < max_batches):
+                print(f"Waiting {wait_time} seconds before next batch...")
+                yield task.deferLater(reactor, wait_time, lambda: None)
+
+    def start():
+        d = crawl_batches()
+        d.addErrback(lambda failure: print(f"In-process crawl failed: {failure.getErrorMessage()}"))
+        d.addBoth(lambda _: reactor.stop())
+
+    reactor.callWhenRunning(start)
+    reactor.run()
 
+    events.emit('run_end', website=website, batches=progress['batch_count'])
+    events.close()
+    return {
+        'website': website,
+        'batches': progress['batch_count'],
+        'items_per_directory': summarize_and_consolidate(progress['batch_count'], used_directories),
+    }
 
 if __name__ == '__main__':
     # Set up argument parser
@@ -297,20 +534,39 @@ if __name__ == '__main__':
     parser.add_argument('website', type=str, help='Name of the spider to run')
     parser.add_argument('--batch_size', type=int, default=50, help='Items per batch')
     parser.add_argument('--max_batches', type=int, default=None, help='Maximum number of batches')
-    parser.add_argument('--wait_time', type=int, default=10, help='Seconds between batches')
+    parser.add_argument('--wait_time', type=int, default=None,
+                        help='Seconds between batches (default: 0, or 10 with --subprocess)')
     parser.add_argument('--max_empty_batches', type=int, default=3,
-                        help='Maximum consecutive batches with no new items before stopping')
+                        help='Maximum consecutive batches with requests left but no progress before stopping')
     parser.add_argument('--min_items_threshold', type=int, default=1,
-                        help='Minimum items required in a batch to continue')
+                        help='Least progress (items, unchanged products seen, pages downloaded) of a non-empty batch')
+    parser.add_argument('--subprocess', action='store_true',
+                        help='Run every batch as a separate `scrapy crawl` process (legacy mode)')
+    parser.add_argument('--price_sweep', action='store_true',
+                        help='Take prices from the listing pages, opening only new or changed products')
+    parser.add_argument('--shared_frontier', action='store_true',
+                        help='Share the crawl with the other workers started with this flag (see FRONTIER_DIR)')
+    parser.add_argument('--log_level', default='INFO',
+                        help='Scrapy log level of the crawls, e.g. DEBUG (default: INFO)')
+    parser.add_argument('--events', default=None,
+                        help='JSON-lines event stream, a file or - for stdout (default: crawls/<website>/events.jsonl)')
+    parser.add_argument('-a', dest='spider_args', action='append', default=[], metavar='NAME=VALUE',
+                        help='Spider argument, as for scrapy crawl, e.g. -a base_url=http://127.0.0.1:8080/')
 
     args = parser.parse_args()
 
     # Run the spider
-    run_spider_in_batches(
+    run = run_spider_in_batches if args.subprocess else run_spider_in_process
+    run(
         website=args.website,
         batch_size=args.batch_size,
         max_batches=args.max_batches,
-        wait_time=args.wait_time,
+        wait_time=args.wait_time if args.wait_time is not None else (10 if args.subprocess else 0),
         max_empty_batches=args.max_empty_batches,
-        min_items_threshold=args.min_items_threshold
-    )
\ No newline at end of file
+        min_items_threshold=args.min_items_threshold,
+        price_sweep=args.price_sweep,
+        shared_frontier=args.shared_frontier,
+        log_level=args.log_level,
+        events_path=args.events,
+        spider_args=dict(arg.split('=', 1) for arg in args.spider_args),
+    )
@@ -9,12 +9,15 @@
 
 BOT_NAME = "unifiedscraper"
 
-# DOWNLOAD_HANDLERS = {
-#     "http": "scrapy_playwright.handler.ScrapyPlaywrightDownloadHandler",
-#     "https": "scrapy_playwright.handler.ScrapyPlaywrightDownloadHandler",
-# }
+# Playwright rendering: the download handlers are installed by the spiders of
+# sites with "playwright" in websites.json (true renders every page, "lazy" only
+# the pages whose static HTML lacks required content). Rendered pages share one
+# browser context, and images, media, fonts and stylesheets are not downloaded.
 # TWISTED_REACTOR = "twisted.internet.asyncioreactor.AsyncioSelectorReactor"
-# PLAYWRIGHT_BROWSER_TYPE = "chromium"
+PLAYWRIGHT_BROWSER_TYPE = "chromium"
+PLAYWRIGHT_MAX_CONTEXTS = 1
+PLAYWRIGHT_MAX_PAGES_PER_CONTEXT = 4
+PLAYWRIGHT_ABORT_REQUEST = "unifiedscraper.rendering.should_abort_request"
 
 SPIDER_MODULES = ["unifiedscraper.spiders"]
 NEWSPIDER_MODULE = "unifiedscraper.spiders"
@@ -33,26 +36,88 @@ ADDONS = {}
 #     }
 # }
 
-FEED_EXPORTERS={'parquet': 'zuinnote.scrapy.contrib.bigexporters.ParquetItemExporter'} # register additional format
-from datetime import datetime
+FEED_EXPORTERS={'parquet': 'unifiedscraper.exporters.ArrowParquetItemExporter'} # register additional format
+# year/month/day and the batch number are filled in when each feed is opened
+# (see unifiedscraper.utils); run_spider.py sets BATCH_NUMBER for every batch
+FEED_URI_PARAMS = 'unifiedscraper.utils.feed_uri_params'
+BATCH_NUMBER = 1
 FEEDS = {
-f'data/year={datetime.now().year}/month={datetime.now().month}/day={datetime.now().day}/website=%(name)s/%(time)s.parquet': {
+'data/year=%(year)s/month=%(month)s/day=%(day)s/website=%(name)s/%(time)s-batch%(batch)s.parquet': {
         'format': 'parquet',
         'encoding': 'utf8',
         'store_empty': False,
+        'item_classes': ['unifiedscraper.items.ProductItem'],
         'item_export_kwargs': {
-           'compression': 'GZIP',
-           'times': 'int64',
-           'hasnulls': True,
-           'convertallstrings': False,
-           'writeindex': False,
-           'objectencoding': 'infer',
-           'rowgroupoffset': 8 * 1024 * 1024,   # 8MB
-           'items_rowgroup': 1000,  # 1000 items per row group
+           'compression': 'zstd',
+           'items_rowgroup': 10000,  # at most 10000 items per row group
+           'rowgroup_bytes': 8 * 1024 * 1024,   # or about 8MB of uncompressed data
         },
-    }
+    },
 }
 
+# Incremental crawling: product pages are fingerprinted in
+# INCREMENTAL_STATE_DIR/<spider>.sqlite and only new or changed products are
+# exported. Known pages are fetched with If-None-Match/If-Modified-Since;
+# pages confirmed less than INCREMENTAL_SKIP_HOURS ago are not fetched at all
+# (0 always asks the server). The product feed then only holds new and changed
+# products; unchanged ones get a "still seen" record in INCREMENTAL_SEEN_URI,
+# which does not count towards CLOSESPIDER_ITEMCOUNT.
+INCREMENTAL_ENABLED = True
+INCREMENTAL_STATE_DIR = 'state'
+INCREMENTAL_SKIP_HOURS = 0
+INCREMENTAL_SEEN_URI = 'seen/year=%(year)s/month=%(month)s/day=%(day)s/website=%(name)s/%(time)s-batch%(batch)s.jsonl'
+
+# Price sweep: read brand, name and price from the listing tiles
+# (listing_item_schema of the site schema) and only open the product pages
+# of new products or changed tiles. Needs INCREMENTAL_ENABLED.
+PRICE_SWEEP = False
+
+# Offline record/replay: ARCHIVE_MODE = 'record' stores every response of a
+# crawl in ARCHIVE_DIR/<spider>.warc.gz (indexed by <spider>.index.sqlite);
+# 'replay' serves the crawl from there without the network and without delays,
+# e.g. for python -m unifiedscraper.bench.replay. Record with INCREMENTAL_ENABLED
+# off: a 304 never replaces an archived page, but a page first recorded as a
+# 304 has no body to replay.
+ARCHIVE_MODE = None
+ARCHIVE_DIR = 'archive'
+
+# Request priorities: product pages always go first, so a batch limited by
+# CLOSESPIDER_ITEMCOUNT spends its requests on items rather than listings.
+# 'depth' then follows a brand's next pages before starting another brand,
+# keeping few listings queued; 'breadth' opens every brand's first page before
+# any next page, so a batch covers more brands.
+CRAWL_ORDER = 'depth'
+
+# Crawl state: the scheduler counts the requests left in JOBDIR when a batch
+# closes (scheduler/pending), and JOBDIR/spider.stats records the close reason,
+# that count and the stats, so run_spider.py starts a batch only when there is
+# something left to crawl.
+SCHEDULER = 'unifiedscraper.crawlstate.StatefulScheduler'
+
+# Shared frontier: with SCHEDULER = 'unifiedscraper.frontier.FrontierScheduler'
+# (run_spider.py --shared_frontier) every worker crawling a site, on any
+# machine, pulls from the same FRONTIER_DIR/<spider>.sqlite. Requests leased by
+# a worker that died go back to the queue after FRONTIER_LEASE_SECONDS, at most
+# FRONTIER_MAX_ATTEMPTS times.
+FRONTIER_BACKEND = 'unifiedscraper.frontier.SQLiteFrontier'
+FRONTIER_DIR = 'crawls/frontier'
+FRONTIER_LEASE_SECONDS = 300
+FRONTIER_MAX_ATTEMPTS = 3
+# How often a worker with nothing to do asks again while others are crawling
+FRONTIER_POLL_SECONDS = 0.5
+# WAL only works between processes of one machine; use 'DELETE' on a network volume
+FRONTIER_SQLITE_JOURNAL = 'WAL'
+
+# Duplicate request filter persisted in JOBDIR. 'bloom' keeps a scalable Bloom
+# filter of a few bytes per request that wrongly drops about
+# DUPEFILTER_ERROR_RATE of the new requests; 'exact' keeps every fingerprint in
+# SQLite on disk, slower but without false positives. DUPEFILTER_CAPACITY is
+# the size of the first Bloom slice; later slices double.
+DUPEFILTER_CLASS = 'unifiedscraper.dupefilter.CompactDupeFilter'
+DUPEFILTER_MODE = 'bloom'
+DUPEFILTER_CAPACITY = 1_000_000
+DUPEFILTER_ERROR_RATE = 0.0001
+
 
 
 # Crawl responsibly by identifying yourself (and your website) on the user-agent
@@ -89,9 +154,10 @@ ROBOTSTXT_OBEY = False
 
 # Enable or disable spider middlewares
 # See https://docs.scrapy.org/en/latest/topics/spider-middleware.html
-#SPIDER_MIDDLEWARES = {
-#    "unifiedscraper.middlewares.UnifiedscraperSpiderMiddleware": 543,
-#}
+SPIDER_MIDDLEWARES = {
+    # Next to the spider, so it times the callbacks themselves
+    "unifiedscraper.middlewares.UnifiedscraperSpiderMiddleware": 950,
+}
 
 # Enable or disable downloader middlewares
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
@@ -99,29 +165,72 @@ ROBOTSTXT_OBEY = False
 #     'scrapy.downloadermiddlewares.useragent.UserAgentMiddleware': None,
 #     'scrapy_user_agents.middlewares.RandomUserAgentMiddleware': 400,
 # }
+DOWNLOADER_MIDDLEWARES = {
+    # Below HttpCompressionMiddleware (590), so it counts the bytes as downloaded
+    'unifiedscraper.middlewares.UnifiedscraperDownloaderMiddleware': 900,
+    # After RetryMiddleware (550) in process_response, so it sees the 429/503 responses that get retried
+    'unifiedscraper.middlewares.AdaptiveConcurrencyMiddleware': 950,
+    # Closest to the downloader, so it stores responses as they were received
+    'unifiedscraper.archive.ArchiveRecorderMiddleware': 990,
+}
 
 # Optional: Configure random delay between requests
 RANDOMIZE_DOWNLOAD_DELAY = True
 DOWNLOAD_DELAY = 1
 RANDOMIZE_DOWNLOAD_DELAY = True
 
+# Adaptive per-host concurrency (AdaptiveConcurrencyMiddleware): every window of
+# ADAPTIVE_CONCURRENCY_WINDOW responses raises the host's limits by a step, first
+# lowering the delay and then adding a concurrent request, until latency grows past
+# ADAPTIVE_LATENCY_FACTOR times the usual one or errors pass ADAPTIVE_MAX_ERROR_RATE;
+# then the concurrency is halved. 429/503 responses halve it immediately. Sites
+# can override the MIN/MAX in websites.json ("concurrency"), and what was learned
+# is kept in ADAPTIVE_STATE_DIR for the next run. DOWNLOAD_DELAY is the first delay.
+ADAPTIVE_CONCURRENCY_ENABLED = True
+ADAPTIVE_CONCURRENCY_MIN = 1
+ADAPTIVE_CONCURRENCY_MAX = 8
+ADAPTIVE_CONCURRENCY_WINDOW = 20
+ADAPTIVE_LATENCY_FACTOR = 2.0
+ADAPTIVE_MAX_ERROR_RATE = 0.1
+ADAPTIVE_MAX_DELAY = 60
+ADAPTIVE_STATE_DIR = 'state'
+
 # Optional: Enable AutoThrottle for adaptive delays
-AUTOTHROTTLE_ENABLED = True
+# (disabled: it fights the adaptive concurrency controller over the delay)
+AUTOTHROTTLE_ENABLED = False
 AUTOTHROTTLE_START_DELAY = 1
 AUTOTHROTTLE_MAX_DELAY = 10
 AUTOTHROTTLE_TARGET_CONCURRENCY = 2.0
 
 # Enable or disable extensions
 # See https://docs.scrapy.org/en/latest/topics/extensions.html
-#EXTENSIONS = {
-#    "scrapy.extensions.telnet.TelnetConsole": None,
-#}
+EXTENSIONS = {
+    "unifiedscraper.metrics.MetricsExtension": 500,
+    "unifiedscraper.events.EventLogExtension": 510,
+    "unifiedscraper.crawlstate.CrawlStateExtension": 520,
+}
+
+# Structured events (unifiedscraper.events): spider_opened and spider_closed
+# (close reason and counts) as JSON lines, appended to the EVENT_LOG file or
+# written to stdout with '-'. run_spider.py sets it and decides from them.
+EVENT_LOG = None
+
+# Metrics (unifiedscraper.metrics): CPU time and output per spider callback,
+# download latency and bytes per domain, queue depths and exporter flush time.
+# Served as Prometheus text on http://METRICS_HOST:<port>/metrics, on the first
+# free port of METRICS_PORT (workers of one machine take the next ports; [] to
+# not serve), and added to the final stats as metrics/... keys.
+METRICS_ENABLED = True
+METRICS_HOST = '127.0.0.1'
+METRICS_PORT = [9410, 9450]
+METRICS_SAMPLE_SECONDS = 5
 
 # Configure item pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
-#ITEM_PIPELINES = {
-#    "unifiedscraper.pipelines.UnifiedscraperPipeline": 300,
-#}
+ITEM_PIPELINES = {
+    # Every spider's output is converted to the shared ProductItem schema
+    "unifiedscraper.pipelines.ProductItemPipeline": 100,
+}
 
 # Enable and configure the AutoThrottle extension (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/autothrottle.html
@@ -5,7 +5,36 @@ from typing import AsyncIterator, Any, List
 
 import scrapy
 from pathlib import Path
-from urllib.parse import urljoin
+from scrapy import signals
+from urllib.parse import urljoin, urlsplit
+
+from unifiedscraper.extraction import (CompiledSelector, ProductExtractor, compile_fields, compile_schema,
+                                       extract_structured_product)
+from unifiedscraper.fingerprints import FingerprintStore, SeenLog
+from unifiedscraper.items import ProductItem
+from unifiedscraper.prices import CURRENCY_PATTERN, currency_code, parse_price
+from unifiedscraper.rendering import render_request
+from unifiedscraper.urls import UrlCanonicalizer, add_query_params
+
+CONFIG_PATH = Path(__file__).parent.parent / 'configs' / 'websites.json'
+
+# Download handlers of the sites with "playwright" in websites.json
+PLAYWRIGHT_HANDLERS = {
+    "http": "scrapy_playwright.handler.ScrapyPlaywrightDownloadHandler",
+    "https": "scrapy_playwright.handler.ScrapyPlaywrightDownloadHandler",
+}
+
+# Download handlers of a crawl replayed from its archive (ARCHIVE_MODE = 'replay')
+ARCHIVE_HANDLERS = {
+    "http": "unifiedscraper.archive.ArchiveDownloadHandler",
+    "https": "unifiedscraper.archive.ArchiveDownloadHandler",
+}
+
+# Request priority of each kind of page, by CRAWL_ORDER (higher is crawled first)
+PRIORITY_TIERS = {
+    'depth': {'product': 20, 'next_page': 10, 'brand': 0},
+    'breadth': {'product': 20, 'brand': 10, 'next_page': 0},
+}
 
 
 class BaseScraper(scrapy.Spider , ABC):
@@ -26,20 +55,115 @@ class BaseScraper(scrapy.Spider , ABC):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.config = self._load_config()
+        # A base_url spider argument (-a base_url=...) crawls the site's pages
+        # from another host, such as the mock shop of the load tests
+        if getattr(self, 'base_url', None):
+            self.config = {**self.config, 'base_url': self.base_url}
+            self.allowed_domains = [urlsplit(self.base_url).hostname]
         self.schema = self._load_schema()
+        self.url_canonicalizer = UrlCanonicalizer.from_config(self.config, self.allowed_domains)
 
-        # Adding Persistent state management
-        self.pending_urls = []
-        self.state_file = Path(f'state/{self.name}.json')
+        # "playwright": true renders every page in a browser; "lazy" downloads
+        # pages with plain HTTP and only renders those missing required content
+        self.render_always = self.config.get('playwright') is True
+        self.render_lazily = self.config.get('playwright') == 'lazy'
+        self.required_fields = self.config.get('required_fields', ['ProductName', 'CurrentPrice'])
 
+        # Product fingerprints of previous runs, opened in from_crawler when
+        # INCREMENTAL_ENABLED is set
+        self.fingerprints = None
+        self.seen_log = None
+        # Fingerprints of changed products, stored once the products are exported
+        self.unexported = {}
+        self.feeds_enabled = False
+        self.price_sweep = False
+        self.priorities = PRIORITY_TIERS['depth']
 
-    def _load_config(self):
+    @classmethod
+    def update_settings(cls, settings):
+        super().update_settings(settings)
+        # Only sites that render pages need the browser
+        if cls.name and cls._load_websites().get(cls.name, {}).get('playwright'):
+            settings.set('DOWNLOAD_HANDLERS', PLAYWRIGHT_HANDLERS, priority='spider')
+        # A replay reads the archive as fast as the spider parses
+        if settings.get('ARCHIVE_MODE') == 'replay':
+            settings.set('DOWNLOAD_HANDLERS', ARCHIVE_HANDLERS, priority='spider')
+            settings.set('DOWNLOAD_DELAY', 0, priority='spider')
+            settings.set('ADAPTIVE_CONCURRENCY_ENABLED', False, priority='spider')
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        spider.fingerprints = FingerprintStore.from_settings(crawler.settings, spider.name)
+        if spider.fingerprints is not None:
+            spider.seen_log = SeenLog.from_settings(crawler.settings, spider)
+            spider.feeds_enabled = bool(crawler.settings.getdict('FEEDS'))
+            crawler.signals.connect(spider.item_scraped, signal=signals.item_scraped)
+            if spider.feeds_enabled:
+                crawler.signals.connect(spider.feed_exporter_closed, signal=signals.feed_exporter_closed)
+        crawl_order = crawler.settings.get('CRAWL_ORDER', 'depth')
+        if crawl_order not in PRIORITY_TIERS:
+            raise ValueError(f"Unknown CRAWL_ORDER {crawl_order!r}, expected one of {', '.join(PRIORITY_TIERS)}")
+        spider.priorities = PRIORITY_TIERS[crawl_order]
+        if crawler.settings.getbool('PRICE_SWEEP'):
+            if spider.listing_extractor is None or spider.fingerprints is None:
+                spider.logger.warning(f"PRICE_SWEEP needs a listing_item_schema for {spider.name} and "
+                                      f"INCREMENTAL_ENABLED; crawling product pages as usual")
+            else:
+                spider.price_sweep = True
+        return spider
+
+    def closed(self, reason):
+        # With feeds, the fingerprints wait for the feeds to be stored (feed_exporter_closed)
+        if not self.feeds_enabled:
+            self.store_fingerprints()
+        if self.seen_log is not None:
+            self.seen_log.close()
+        if self.render_lazily:
+            stats = self.crawler.stats
+            checked = stats.get_value('playwright/lazy/checked', 0)
+            rendered = stats.get_value('playwright/lazy/rendered', 0)
+            stats.set_value('playwright/lazy/render_ratio', round(rendered / checked, 4) if checked else 0.0)
+
+    def item_scraped(self, item, response, spider):
+        """Remember the fingerprint of a changed product that passed the pipelines"""
+        meta = response.meta if response is not None else {}
+        if isinstance(item, ProductItem) and meta.get('content_hash'):
+            self.unexported[meta['fingerprint_url']] = (meta['content_hash'], response.headers, meta.get('listing_hash'))
+
+    def feed_exporter_closed(self):
+        failed = [key for key in self.crawler.stats.get_stats() if key.startswith('feedexport/failed_count/')]
+        if failed:
+            self.logger.warning(f"Feed export failed, not storing {len(self.unexported)} product fingerprints; "
+                                f"these products are exported again next run")
+            self.unexported.clear()
+        self.store_fingerprints()
+
+    def store_fingerprints(self):
+        """Store the fingerprints of the exported products and close the store"""
+        if self.fingerprints is None:
+            return
+        for url, (content_hash, headers, listing_hash) in self.unexported.items():
+            self.fingerprints.record(url, content_hash, headers, listing_hash)
+        self.crawler.stats.set_value('incremental/stored', len(self.unexported))
+        self.unexported.clear()
+        self.fingerprints.close()
+        self.fingerprints = None
+
+    def mark_seen(self, url, status):
+        """Write the "still seen" record of an unchanged product page"""
+        self.crawler.stats.inc_value(f'incremental/seen/{status}')
+        if self.seen_log is not None:
+            self.seen_log.write(url, status)
+
+    @staticmethod
+    def _load_websites():
         # Load the configuration file
-        config_path = Path(__file__).parent.parent / 'configs' / 'websites.json'
-        with open(config_path, 'r') as file:
-            config = json.load(file)
+        with open(CONFIG_PATH, 'r') as file:
+            return json.load(file)
 
-        return config[self.name]
+    def _load_config(self):
+        return self._load_websites()[self.name]
 
     def _load_schema(self):
         # Load the schema file
@@ -47,8 +171,74 @@ class BaseScraper(scrapy.Spider , ABC):
         with open(schema_path, 'r') as file:
             schema = json.load(file)
 
+        # Compile every selector once instead of on each response.css() call
+        self.selectors = compile_schema(schema)
+        self.extractor = ProductExtractor(schema['product_page_schema'], self.selectors,
+                                          price_locale=self.config.get('price_locale'))
+
+        # Optional product tile fields of the listing pages, for price sweeps
+        listing_schema = schema.get('listing_item_schema')
+        if listing_schema:
+            self.listing_container = CompiledSelector(listing_schema['container'])
+            self.listing_extractor = ProductExtractor(listing_schema['fields'],
+                                                      compile_fields(listing_schema['fields']),
+                                                      price_locale=self.config.get('price_locale'))
+        else:
+            self.listing_container = self.listing_extractor = None
+
         return schema
 
+    def extract(self, response, field, getall=False):
+        """Run the compiled selector of a schema field on the response
+
+        Args:
+            response: The response to extract from
+            field (str): Product field or top-level selector name of the schema
+            getall (bool): Return every match instead of the first one
+
+        Returns:
+            str | list: First match (or None), or the list of all matches.
+                A field with several selectors returns the first that matches.
+        """
+        root = response.selector.root
+        for selector in self.selectors[field]:
+            results = selector.get_all(root) if getall else selector.get(root)
+            if results:
+                return results
+        return [] if getall else None
+
+    def extract_number(self, response, field):
+        """Largest integer among the matches of an optional schema selector
+
+        Thousands separators are ignored ("1.250 prodotti" is 1250), so the
+        selector can match a product count or every numbered page link.
+
+        Returns:
+            int: The number, or None if the schema or the page has none
+        """
+        if field not in self.selectors:
+            return None
+        numbers = [int(re.sub(r'\D', '', match.group()))
+                   for text in self.extract(response, field, getall=True)
+                   for match in [re.search(r'\d[\d.,]*', text)] if match]
+        return max(numbers, default=None)
+
+    def extract_structured_data(self, response):
+        """Product fields from the page's JSON-LD and microdata
+
+        Only read when the site config sets "structured_data"; the schema's
+        selectors then run only for the fields the markup does not provide.
+
+        Args:
+            response: The product page response
+
+        Returns:
+            dict: Item field -> value, empty when disabled or nothing was found
+        """
+        if not self.config.get('structured_data', False):
+            return {}
+        return extract_structured_product(response.selector.root)
+
     def make_absolute_url(self, follow_url, parent_url = None):
         """Convert any URL to absolute form"""
         if parent_url is None:
@@ -68,120 +258,337 @@ class BaseScraper(scrapy.Spider , ABC):
         yield scrapy.Request(brands_page,
                              callback=self.parse_site_brand_page,
                              meta={
-                                 "playwright": self.config.get('playwright' , False),
+                                 "playwright": self.render_always,
                              })
 
     def parse_site_brand_page(self, response):
         """Parse the brand page"""
         # Extract brand URLs from the response
-        brand_urls = response.css(self.schema['brands_urls_schema']).getall()
+        brand_urls = self.extract(response, 'brands_urls_schema', getall=True)
+        rendering = self.render_if_incomplete(response, [] if brand_urls else ['brands_urls_schema'])
+        if rendering is not None:
+            yield rendering
+            return
         self.logger.info(f"Trying to extract brand URLs with selector: {self.schema['brands_urls_schema']} with {response.url}")
         self.logger.info(f"Found {len(brand_urls)} brand URLs")
         yield from self.parse_urls(response,
                         brand_urls,
                         self.parse_site_products_page,
                         meta={'brand_url': response.url},
-                        query_params=self.config.get('products_page_query_params' , None))
+                        query_params=self.config.get('products_page_query_params' , None),
+                        priority=self.priorities['brand'])
+
+    def render_if_incomplete(self, response, missing):
+        """Re-request a page through Playwright if its static HTML lacks required content
+
+        Only for sites with "playwright": "lazy", and only once per page: the
+        playwright/lazy/checked and playwright/lazy/rendered stats (and their
+        render_ratio at close) tell how many pages needed the browser.
 
-    def parse_urls(self,response ,urls:List[str] ,parsing_function ,meta:dict = None , query_params:str = None):
-        """Follow any url URLs"""
+        Args:
+            response: Page downloaded with plain HTTP
+            missing (list): Required fields or selectors that found nothing
+
+        Returns:
+            scrapy.Request: The request rendering the page, or None to parse this response
+        """
+        if not self.render_lazily or response.meta.get('playwright'):
+            return None
+        self.crawler.stats.inc_value('playwright/lazy/checked')
+        if not missing:
+            return None
+        self.crawler.stats.inc_value('playwright/lazy/rendered')
+        self.logger.debug(f"Rendering {response.url}: the static page lacks {', '.join(missing)}")
+        return render_request(response.request)
+
+    def canonical_url(self, url, parent_url=None):
+        """Absolute, canonical form of a link (see UrlCanonicalizer), or None if it leaves the site"""
+        absolute_url = self.url_canonicalizer.canonicalize(self.make_absolute_url(url, parent_url))
+        if not self.url_canonicalizer.is_allowed(absolute_url):
+            self.logger.debug(f"Skipping external URL: {absolute_url}")
+            return None
+        return absolute_url
+
+    def parse_urls(self,response ,urls:List[str] ,parsing_function ,meta:dict = None , query_params:str = None,
+                   priority:int = 0):
+        """Follow any url URLs, at the given request priority (see PRIORITY_TIERS)"""
+        followed = set()
         for url in urls:
+            absolute_url = self.canonical_url(url)
+            # Links to the same page (image and title of a tile) are followed once
+            if absolute_url is None or absolute_url in followed:
+                continue
+            followed.add(absolute_url)
             if query_params:
-                url = url + query_params
+                absolute_url = add_query_params(absolute_url, query_params)
+
+            if parsing_function == self.parse_product_page and self.fingerprints is not None:
+                yield from self.follow_product(response, absolute_url, meta)
+                continue
+            yield response.follow(absolute_url,
+                                 callback=parsing_function,
+                                 meta=meta,
+                                 priority=priority)
+
+    def follow_product(self, response, url, meta=None, listing_hash=None):
+        """Request a product page known from a previous run only if it may have changed
 
-            absolute_url = self.make_absolute_url(url)
-            if self.allowed_domains[0] in absolute_url:
-                yield response.follow(absolute_url,
-                                     callback=parsing_function,
-                                     meta=meta)
+        Pages confirmed within INCREMENTAL_SKIP_HOURS are not requested and
+        only get a "still seen" record; the others are requested with the
+        validators the server sent last time, so an unchanged page costs a 304.
+        A price sweep passes the hash of the product's changed listing tile,
+        which is stored once the page is parsed.
+        """
+        record = self.fingerprints.get(url)
+        if listing_hash is None and self.fingerprints.is_fresh(record):
+            self.fingerprints.touch(url)
+            self.mark_seen(url, 'skipped')
+            return
+        yield response.follow(url,
+                              callback=self.parse_product_page,
+                              priority=self.priorities['product'],
+                              headers=self.fingerprints.conditional_headers(record),
+                              meta={**(meta or {}),
+                                    'fingerprint_url': url,
+                                    'listing_hash': listing_hash,
+                                    'handle_httpstatus_list': [304]})
+
+    def sweep_listing(self, response, meta=None):
+        """Price sweep of a listing page: one reduced item per unchanged tile
+
+        Every product tile (the "container" of listing_item_schema) is
+        extracted with the block's "fields", which must include ProductURL.
+        A tile identical to the one seen last time is yielded as a ProductItem
+        with just those fields; only new products and products whose tile
+        changed (price, name...) are followed to their product page.
+        """
+        followed = set()
+        for tile in self.listing_container.nodes(response.selector.root):
+            fields = self.listing_extractor.extract(response, root=tile)
+            url = self.canonical_url(fields['ProductURL'], parent_url=response.url) if fields.get('ProductURL') else None
+            if url is None or url in followed:
+                continue
+            followed.add(url)
+            fields['ProductURL'] = url
+
+            listing_hash = self.fingerprints.item_hash(fields)
+            record = self.fingerprints.get(url)
+            if record is not None and record['listing_hash'] == listing_hash:
+                self.fingerprints.touch(url)
+                yield ProductItem.from_dict(fields, self.config.get('price_locale'))
             else:
-                self.logger.debug(f"Skipping external URL: {absolute_url}")
+                yield from self.follow_product(response, url, meta, listing_hash=listing_hash)
 
     @abstractmethod
     def parse_site_products_page(self, response):
         pass
 
-    @abstractmethod
     def parse_product_page(self, response):
-        """Parse the product page"""
-        pass
+        """Parse the product page with the field declarations of product_page_schema"""
+        fingerprint_url = response.meta.get('fingerprint_url')
+        listing_hash = response.meta.get('listing_hash')
+        if response.status == 304:
+            self.fingerprints.touch(fingerprint_url, listing_hash)
+            self.mark_seen(fingerprint_url, 'not_modified')
+            return
+
+        product = self.extractor.extract(response, self.extract_structured_data(response))
+        rendering = self.render_if_incomplete(response, [field for field in self.required_fields
+                                                         if not product.get(field)])
+        if rendering is not None:
+            yield rendering
+            return
+        if product.get('ProductURL') is None:
+            product['ProductURL'] = response.url
+        product = self.finalize_product(product, response)
+        item = ProductItem.from_dict(product, self.config.get('price_locale'))
+
+        # Unchanged products only get a "still seen" record; the fingerprint of
+        # a changed one is stored once it is exported (item_scraped)
+        if fingerprint_url:
+            content_hash = self.fingerprints.item_hash(item)
+            if not self.fingerprints.has_changed(fingerprint_url, content_hash):
+                self.fingerprints.record(fingerprint_url, content_hash, response.headers, listing_hash)
+                self.mark_seen(fingerprint_url, 'unchanged')
+                return
+            response.meta['content_hash'] = content_hash
+        yield item
+
+    def finalize_product(self, product, response):
+        """Site-specific cleaning the schema cannot express
+
+        Args:
+            product (dict): Fields extracted by the schema
+            response: The product page response
+
+        Returns:
+            dict: The product to yield
+        """
+        return product
 
 class LoadMoreScrapper(BaseScraper):
-    """Scraper for websites that use a "Load More" button to load products"""
+    """Scraper for websites that use a "Load More" button to load products
+
+    Page n of a listing (n >= 2) is the listing URL with "load_more_query"
+    and the offset of its first product, (n - 1) * "load_more_offset",
+    added: "?offset=" and 24 give "?offset=24" for page 2. Pages are
+    requested concurrently instead of one per round trip:
+
+    - when the schema has a "total_count_schema" selector for the number of
+      products of the listing, every page is requested from the first one;
+    - otherwise "load_more_prefetch" pages (LOAD_MORE_PREFETCH by default)
+      are kept in flight: each page that still has products and a "Load
+      More" button requests the page that many places ahead, so the crawl
+      stops at the first empty page with at most that many requests wasted.
+    """
+    LOAD_MORE_PREFETCH = 4
+
     def parse_site_products_page(self, response):
         """Parse the products page"""
         # Extract product URLs from the response
-        cur_page_products_urls = response.css(self.schema['products_urls_schema']).getall()
+        cur_page_products_urls = self.extract(response, 'products_urls_schema', getall=True)
         self.logger.info(f"Found {len(cur_page_products_urls)} product URLs on page {response.url}")
-        self.parse_urls(response,
+        # Prefetched pages past the end of the listing are expected to be empty
+        if 'load_more_page' not in response.meta:
+            rendering = self.render_if_incomplete(response, [] if cur_page_products_urls else ['products_urls_schema'])
+            if rendering is not None:
+                yield rendering
+                return
+        yield from self.parse_urls(response,
                         cur_page_products_urls,
                         self.parse_product_page,
                         meta={'brand_url': response.meta['brand_url'],
-                              "playwright": self.config.get('playwright' , False),})
-
-        # Check if there is a "Load More" button
-        load_more_button = response.css(self.schema['pagination_schema'])
-        if load_more_button:
-            # Update the offset for the next request
-            if str(self.config['load_more_offset']) in response.url:
-                cur_offset = response.meta.get('last_offset', 0) + self.config['load_more_offset']
-            else:
-                # If the offset is not in the URL, set the offset to get the second page
-                cur_offset = self.config['load_more_offset'] * 2
-
-            # If there is a "Load More" button, follow the URL to load more products
-            load_more_url = self.make_absolute_url(
-                f"{self.config['load_more_query']}{cur_offset}",
-                parent_url=response.url
-            )
-            yield response.follow(load_more_url,
-                                 callback=self.parse_site_products_page,
-                                 meta={'brand_url': response.meta['brand_url'],
-                                       'last_offset': cur_offset})
+                              "playwright": self.render_always,},
+                        priority=self.priorities['product'])
+
+        # An empty page is past the end of the listing
+        if not cur_page_products_urls or self.crawler.stats.get_value('closespider_itemcount_reached'):
+            return
+
+        page = response.meta.get('load_more_page', 1)
+        listing_url = response.meta.get('listing_url', response.url)
+        prefetch = self.config.get('load_more_prefetch', self.LOAD_MORE_PREFETCH)
+        last_page = self.last_page(response) if page == 1 else response.meta.get('load_more_last_page')
+        if last_page is not None:
+            # Every page is requested from the first one
+            pages = range(2, last_page + 1) if page == 1 else []
+        elif not self.extract(response, 'pagination_schema'):
+            pages = []
+        elif page == 1:
+            pages = range(2, 2 + prefetch)
+        else:
+            pages = [page + prefetch]
+
+        for next_page in pages:
+            yield response.follow(self.load_more_url(listing_url, next_page),
+                                  callback=self.parse_site_products_page,
+                                  priority=self.priorities['next_page'],
+                                  meta={'brand_url': response.meta['brand_url'],
+                                        'listing_url': listing_url,
+                                        'load_more_page': next_page,
+                                        'load_more_last_page': last_page})
+
+    def load_more_url(self, listing_url, page):
+        """URL of page ``page`` (1-based) of a listing"""
+        offset = (page - 1) * self.config['load_more_offset']
+        return add_query_params(listing_url, f"{self.config['load_more_query']}{offset}")
+
+    def last_page(self, response):
+        """Number of pages of the listing from its product count, or None if the page does not show it"""
+        total = self.extract_number(response, 'total_count_schema')
+        return -(-total // self.config['load_more_offset']) if total is not None else None
 
 class NextPageScraper(BaseScraper):
+    """Scraper for websites whose listings link to the next page
+
+    With "pagination_type": "numbered" in websites.json, the first page of a
+    listing requests all the other pages at once instead of one per round
+    trip. The number of pages is the largest number matched by the schema's
+    "last_page_schema" (e.g. the numbered page links), or the product count
+    of "total_count_schema" divided by the site's "page_size". Page n is the
+    listing URL with "page_query" added, "{page}" replaced by n (e.g.
+    "?page={page}"). Listings showing neither fall back to the next link.
+    """
     def parse_site_products_page(self, response):
         """Parse the products page"""
-        # Extract product URLs from the response
-        cur_page_products_urls = response.css(self.schema['products_urls_schema']).getall()
-        self.logger.info(f"Found {len(cur_page_products_urls)} product URLs on page {response.url}")
-        yield from self.parse_urls(response,
-                        cur_page_products_urls,
-                        self.parse_product_page,
-                        meta={'brand_url': response.meta['brand_url'],
-                              "playwright": self.config.get('playwright' , False),})
+        product_meta = {'brand_url': response.meta['brand_url'],
+                        "playwright": self.render_always,}
+        if self.price_sweep:
+            # Prices come from the listing tiles; only new or changed products are opened
+            yield from self.sweep_listing(response, meta=product_meta)
+        else:
+            # Extract product URLs from the response
+            cur_page_products_urls = self.extract(response, 'products_urls_schema', getall=True)
+            self.logger.info(f"Found {len(cur_page_products_urls)} product URLs on page {response.url}")
+            rendering = self.render_if_incomplete(response, [] if cur_page_products_urls else ['products_urls_schema'])
+            if rendering is not None:
+                yield rendering
+                return
+            yield from self.parse_urls(response,
+                            cur_page_products_urls,
+                            self.parse_product_page,
+                            meta=product_meta,
+                            priority=self.priorities['product'])
 
         
         # Only check for next page if we haven't reached item limit
         if not self.crawler.stats.get_value('closespider_itemcount_reached'):
+            # Pages requested by the first page of a numbered listing
+            if response.meta.get('page_number'):
+                return
+            last_page = self.last_page(response) if self.config.get('pagination_type') == 'numbered' else None
+            if last_page is not None:
+                # A single-page listing has nothing more to request, not even its next link
+                if last_page > 1:
+                    self.logger.info(f"Requesting pages 2-{last_page} of {response.url}")
+                for page_number in range(2, last_page + 1):
+                    yield response.follow(self.page_url(response.url, page_number),
+                                          callback=self.parse_site_products_page,
+                                          priority=self.priorities['next_page'],
+                                          meta={'brand_url': response.meta['brand_url'],
+                                                'page_number': page_number})
+                return
+
             # Check if there is a "Next Page" button
-            next_page_button = response.css(self.schema['pagination_schema']).get()
-            if next_page_button:
-                next_page_url = self.make_absolute_url(next_page_button)
+            next_page_button = self.extract(response, 'pagination_schema')
+            next_page_url = self.canonical_url(next_page_button, parent_url=response.url) if next_page_button else None
+            if next_page_url:
                 yield response.follow(next_page_url,
                                     callback=self.parse_site_products_page,
+                                    priority=self.priorities['next_page'],
                                     meta={'brand_url': response.meta['brand_url']})
 
+    def page_url(self, listing_url, page_number):
+        """URL of page ``page_number`` of a numbered listing"""
+        return add_query_params(listing_url, self.config['page_query'].format(page=page_number))
+
+    def last_page(self, response):
+        """Number of pages of a numbered listing, or None if the page does not show it"""
+        last_page = self.extract_number(response, 'last_page_schema')
+        if last_page is None:
+            total = self.extract_number(response, 'total_count_schema')
+            if total is not None and self.config.get('page_size'):
+                last_page = -(-total // self.config['page_size'])
+        return last_page
+
 
 class DataCleanser():
+    """Kept for spiders outside this repo; the parsing lives in unifiedscraper.prices"""
+
     def _convert_currency_symbols_to_code(self, price_string):
         """Convert currency symbol to code
         :arg
             price_string: string e.g. '€75.5', '60$', '3£'
         :return
-            string: string e.g. 'EUR', 'USD', 'GBP'
+            string: string e.g. 'EUR', 'USD', 'GBP', or None without a currency
         """
-        currency_symbol = self._extract_currency_symbols(price_string)
-        if currency_symbol == '€':
-            return 'EUR'
-        elif currency_symbol == '$':
-            return 'USD'
-        elif currency_symbol == '£':
-            return 'GBP'
-        else:
-            return price_string
+        return currency_code(price_string) if price_string else None
 
     def _extract_currency_symbols(self,text):
-        # Matches common currency symbols (including crypto and rare ones)
-        pattern = r'[€$£¥₹₽₩₪₺₴₸₿฿₫៛₡₱₲₵₶₾₼₠₣₤₥₦₧₨₩₪₫₭₮₯₰₳₷₺₻₼₽₾₿]'
-        return re.findall(pattern, text)[0]
\ No newline at end of file
+        """The first currency symbol or ISO code of the text, or None"""
+        match = CURRENCY_PATTERN.search(text)
+        return match.group() if match else None
+
+    def _parse_price(self, price_string, locale=None):
+        """Parse a price string such as '1.234,50 €' into a float (None without a number)"""
+        return parse_price(price_string, locale=locale) if price_string else None
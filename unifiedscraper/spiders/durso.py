@@ -1,56 +1,19 @@
-import re
+from unifiedscraper.spiders.base_scraper import NextPageScraper
 
 
-
-from unifiedscraper.spiders.base_scraper import NextPageScraper, DataCleanser
-
-
-class Durso(NextPageScraper , DataCleanser):
+class Durso(NextPageScraper):
     """Spider for Deflorio store"""
 
     name = "durso"
     allowed_domains = ["dursoboutique.com"]
     start_urls = ["https://www.dursoboutique.com"]
 
-    def parse_product_page(self, response):
-        """Parse product page and extract product data"""
-        product_schema = self.schema['product_page_schema']
-        product = {
-            "Brand": response.css(product_schema['Brand']).get(),
-            "ProductName": response.css(product_schema['ProductName']).get(),
-            "ProductImage": response.css(product_schema['ProductImage']).get(),
-            "ProductColor": response.css(product_schema['ProductColor']).get(),
-            "CurrentPrice": response.css(product_schema['CurrentPrice']).get(),
-            "OriginalPrice": response.css(product_schema['OldPrice']).get(),
-            "AvailableSizes": response.css(product_schema['AvailableSizes']).getall(),
-            "Category": response.css(product_schema['Category']).get(),
-            "Department": response.css(product_schema['Department']).get(),
-            "sku": response.css(product_schema['sku']).get(),
-            "ProductURL": response.url,
-            "StockAvailability" : "".join(response.css(product_schema['Availability']).getall())
-        }
-
-        # Clean the data
-        product['PriceCurrency'] = self._convert_currency_symbols_to_code(product['CurrentPrice'])
-        product['CurrentPrice'] = float(
-            re.search(r'[\d,]+', product['CurrentPrice']).group().replace(',', '.'))
-        if product['OriginalPrice']:
-            product['OriginalPrice'] = float(
-                re.search(r'[\d,]+', product['OriginalPrice']).group().replace(',', '.'))
-        else:
-            product['OriginalPrice'] = product['CurrentPrice']
-
-        # Clean the availability
-        if product['StockAvailability']:
-            product['StockAvailability'] = product['StockAvailability'].replace("\n" , "").strip()
-        else:
-            product['StockAvailability'] = None
-
+    def finalize_product(self, product, response):
+        # The colour is picked in the variant list, else it ends the URL slug,
+        # else it is in the description
         if not product["ProductColor"]:
             product["ProductColor"] = product["ProductURL"].split("-")[-1]
         if 'html' in product["ProductColor"]:
-            product["ProductColor"] = response.css(product_schema['alternateColor']).get()
-
-        product['ProductCode'] = product['sku'].split('-')[0] if product['sku'] else None
+            product["ProductColor"] = self.extract(response, 'alternateColor')
 
-        yield product
\ No newline at end of file
+        return product
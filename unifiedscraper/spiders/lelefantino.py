@@ -17,13 +17,13 @@ class LelefantinoSpider(LoadMoreScrapper):
             # Check if the field requires extracting a list or an attribute
             if '::attr' in selector:
                 # Extract attributes like 'href' or 'srcset'
-                product_details[field] = response.css(selector).get()
+                product_details[field] = self.extract(response, field)
             elif selector.endswith(' li'):
                 # Extract list items
                 product_details[field] = self.get_list_field(response, selector)
             else:
                 # Extract text for standard fields
-                product_details[field] = response.css(selector).get()
+                product_details[field] = self.extract(response, field)
 
         # Yield the product details dictionary
         yield product_details
@@ -1,44 +1,8 @@
-import re
+from .base_scraper import NextPageScraper
 
-from .base_scraper import NextPageScraper , DataCleanser
 
-class TendenzeSpider(NextPageScraper,DataCleanser):
+class TendenzeSpider(NextPageScraper):
     """Spider for Tendenze store"""
     name = "tendenze"
     allowed_domains = ["tendenzestore.com"]
     start_urls = ["https://www.tendenzestore.com/en/"]
-
-    def parse_product_page(self, response):
-        product_schema = self.schema['product_page_schema']
-        product = {
-            "Brand": response.css(product_schema['Brand']).get(),
-            "ProductName": response.css(product_schema['ProductName']).get(),
-            "ProductImage": response.css(product_schema['ProductImage']).get(),
-            "sku": response.css(product_schema['sku']).get(),
-            "Category": response.css(product_schema['Category']).get(),
-            "Department": response.css(product_schema['Department']).get(),
-            "ProductURL": response.url,
-        }
-
-        product["ProductImage"] = self.make_absolute_url(product["ProductImage"])
-        product['Category'] = product['Category'].strip() if product['Category'] else ""
-        product['Department'] = product['Department'].strip() if product['Department'] else ""
-
-        available_sizes = response.css(product_schema['AvailableSizes.option1']).getall()
-        if not available_sizes:
-            available_sizes = response.css(product_schema['AvailableSizes.option2']).getall()
-        product['AvailableSizes'] = available_sizes
-        product["sku"]  = product["sku"].replace("Art." , " ").strip()
-        
-        discount_price = response.css(product_schema['CurrentPrice']).get()
-        if discount_price:
-            product['CurrentPrice'] = discount_price
-            product["OriginalPrice"] = response.css(product_schema['OldPrice']).get()
-        else:
-            product['CurrentPrice'] = response.css(product_schema['PriceNoDiscount']).get()
-            product["OriginalPrice"] = response.css(product_schema['PriceNoDiscount']).get()
-        product["PriceCurrency"] = self._convert_currency_symbols_to_code(product['CurrentPrice'])
-        product['OriginalPrice'] = float(re.search(r'[\d,]+', product['OriginalPrice'].replace(".","")).group().replace(",","."))
-        product['CurrentPrice'] = float(re.search(r'[\d,]+', product['CurrentPrice'].replace(".","")).group().replace(",","."))
-
-        yield product
\ No newline at end of file
@@ -1,49 +1,13 @@
-import re
+from .base_scraper import NextPageScraper
 
-from .base_scraper import NextPageScraper, DataCleanser
 
-
-class Wardow(NextPageScraper, DataCleanser):
+class Wardow(NextPageScraper):
     """Spider for Wardow store"""
     name = "wardow"
     allowed_domains = ["wardow.com"]
     start_urls = ["https://www.wardow.com/it"]
 
-    def parse_product_page(self, response):
-        product_schema = self.schema['product_page_schema']
-        product = {
-        "Brand": response.css(product_schema['Brand']).get(),
-        "ProductName": response.css(product_schema['ProductName']).get(),
-        "ProductImage": response.css(product_schema['ProductImage']).get(),
-        "ProductColor" : response.css(product_schema['ProductColor']).get(),
-        "CurrentPrice": response.css(product_schema['CurrentPrice']).get(),
-        "OriginalPrice": response.css(product_schema['OldPrice']).get(),
-        "NoDiscountPrice": response.css(product_schema['NoDiscountPrice']).get(),
-        "PriceCurrency": response.css(product_schema['PriceCurrency']).get(),
-        "Category": response.css(product_schema['Category']).get(),
-        "sku": response.css(product_schema['sku']).get(),
-        "AvailableSizes" : "One Size",
-        "WebCode" : response.css(product_schema['WebCode']).getall(),
-        "StockAvailability" : response.css(product_schema['StockAvailability']).get(),
-        "ProductURL": response.url,
-        }
-
-        # Clean Data
-        product['Brand'] = product['Brand'].replace("\n" , "").strip()
-        product['Category'] = product['Brand'].replace("\n", "").strip()
-        product['WebCode'] = product['WebCode'][-1].replace("\n", "").strip() if product['WebCode'] else None
-        product['WebCode'] = str(product['WebCode']) if product['WebCode'] else None
-
-
-
-        if product['NoDiscountPrice']:
-            product['CurrentPrice'] = float(product['NoDiscountPrice'])
-            product['OriginalPrice'] = product['CurrentPrice']
-        else:
-            product['CurrentPrice'] = float(product['CurrentPrice'] )
-            product['OriginalPrice'] = float(
-                re.search(r'[\d.,]+', product['OriginalPrice']).group().replace('.' , "").replace(',', '.'))
-        product.pop('NoDiscountPrice')
+    def finalize_product(self, product, response):
         description = {}
         
         # Extract key-value pairs from description-general
@@ -66,4 +30,4 @@ class Wardow(NextPageScraper, DataCleanser):
 
         product['Description'] = description
 
-        yield product
+        return product
@@ -0,0 +1,119 @@
+from fnmatch import fnmatchcase
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from w3lib.url import safe_url_string
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = ('utm_*', 'gclid', 'gbraid', 'wbraid', 'fbclid', 'msclkid', 'yclid', 'mc_cid', 'mc_eid',
+                   '_ga', '_gl', 'srsltid')
+
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+class UrlCanonicalizer:
+    """
+    Per-site URL normalization, applied to links before they are followed
+
+    Every URL loses its fragment, default port, host case and tracking
+    parameters (TRACKING_PARAMS), and its remaining query parameters are
+    sorted, so the same page found through different links gets one URL and
+    is downloaded once. The "url_canonicalization" object of a site in
+    websites.json adds site rules:
+
+        "url_canonicalization": {
+            "strip_params": ["sort", "colore"],   # also drop these (wildcards allowed)
+            "keep_params": ["id_product"],        # or keep only these
+            "trailing_slash": "strip",            # "strip" or "add"; unchanged by default
+            "lowercase_path": true                # for sites with case-insensitive paths
+        }
+    """
+
+    def __init__(self, allowed_domains=None, strip_params=(), keep_params=None, trailing_slash=None,
+                 lowercase_path=False):
+        if trailing_slash not in (None, 'strip', 'add'):
+            raise ValueError(f"trailing_slash must be 'strip' or 'add', not {trailing_slash!r}")
+        self.allowed_domains = [domain.lower() for domain in allowed_domains or []]
+        self.strip_params = TRACKING_PARAMS + tuple(strip_params)
+        self.keep_params = tuple(keep_params) if keep_params is not None else None
+        self.trailing_slash = trailing_slash
+        self.lowercase_path = lowercase_path
+
+    @classmethod
+    def from_config(cls, config, allowed_domains=None):
+        """
+        Build the canonicalizer of a site
+
+        Args:
+            config (dict): The site's entry of websites.json
+            allowed_domains (list): The spider's allowed_domains
+
+        Returns:
+            UrlCanonicalizer: The site's canonicalizer
+        """
+        return cls(allowed_domains, **config.get('url_canonicalization', {}))
+
+    def _keeps(self, param):
+        if self.keep_params is not None:
+            return any(fnmatchcase(param, pattern) for pattern in self.keep_params)
+        return not any(fnmatchcase(param, pattern) for pattern in self.strip_params)
+
+    def canonicalize(self, url):
+        """
+        Canonical form of an absolute URL
+
+        Args:
+            url (str): Absolute URL as found on a page
+
+        Returns:
+            str: The URL with the site's rules applied
+        """
+        parts = urlsplit(safe_url_string(url))
+        scheme = parts.scheme.lower()
+        netloc = (parts.hostname or '').lower()
+        if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+            netloc = f'{netloc}:{parts.port}'
+
+        path = parts.path or '/'
+        if self.lowercase_path:
+            path = path.lower()
+        if self.trailing_slash == 'strip' and path != '/':
+            path = path.rstrip('/')
+        elif self.trailing_slash == 'add' and not path.endswith('/') and '.' not in path.rsplit('/', 1)[-1]:
+            path += '/'
+
+        query = sorted((name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+                       if self._keeps(name))
+        return urlunsplit((scheme, netloc, path, urlencode(query), ''))
+
+    def is_allowed(self, url):
+        """Whether the URL's host is one of the allowed domains or a subdomain of one, on any port"""
+        if not self.allowed_domains:
+            return True
+        host = urlsplit(url).hostname or ''
+        return any(host == domain or host.endswith(f'.{domain}') for domain in self.allowed_domains)
+
+
+def add_query_params(url, params):
+    """
+    Add listing parameters such as '?resultsPerPage=10000' or '/?show=all' to a URL
+
+    A path prefix ('/' in '/?show=all') is added unless the path already ends
+    with it, and the parameters replace those of the same name already in the
+    query instead of being appended after it.
+
+    Args:
+        url (str): Absolute URL
+        params (str): The site's "products_page_query_params"
+
+    Returns:
+        str: The URL with the parameters
+    """
+    suffix, _, query = params.partition('?')
+    parts = urlsplit(url)
+    path = parts.path
+    if suffix and not path.endswith(suffix):
+        path = path.rstrip('/') + suffix if suffix.startswith('/') else path + suffix
+    added = parse_qsl(query, keep_blank_values=True)
+    names = {name for name, _ in added}
+    merged = [(name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True) if name not in names]
+    return urlunsplit((parts.scheme, parts.netloc, path, urlencode(merged + added), parts.fragment))
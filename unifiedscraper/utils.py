@@ -0,0 +1,25 @@
+from datetime import datetime
+
+
+def feed_uri_params(params, spider):
+    """Add the current date and the batch number to the feed URI parameters.
+
+    The date is computed when each feed is opened, not when the settings module
+    is imported, so batches run by the in-process runner in ``run_spider.py``
+    still write into the right day's folder after midnight. The batch number
+    (BATCH_NUMBER, set by the batch runners) keeps two batches closing within
+    the same second, which ``%(time)s`` cannot tell apart, in separate files.
+
+    Args:
+        params (dict): Default parameters built by Scrapy's FeedExporter
+        spider (scrapy.Spider): The spider the feed belongs to
+
+    Returns:
+        dict: Parameters with ``year``, ``month``, ``day`` and ``batch`` added
+    """
+    today = datetime.now()
+    params['year'] = today.year
+    params['month'] = today.month
+    params['day'] = today.day
+    params['batch'] = spider.settings.getint('BATCH_NUMBER', 1)
+    return params